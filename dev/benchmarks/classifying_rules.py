@@ -0,0 +1,109 @@
+"""Benchmarks the rule file against the former lambda rules
+
+Entries drawn from every device are matched with the rules loaded from
+assets/classifying_rules.yaml through the rule engine, and with the lambda
+rules that were hard-coded before, applied one after the other; the rules
+themselves are checked against each other in tests/test_classifying_rules.py.
+Run from the repository root:
+
+    python -m dev.benchmarks.classifying_rules --entries 200000
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from pyfairdatatools.classifying_rules import DicomEntry, RuleEngine, load_rules
+from tests.test_classifying_rules import legacy_match
+
+OCT = "1.2.840.10008.5.1.4.1.1.77.1.5.4"
+PHOTO = "1.2.840.10008.5.1.4.1.1.77.1.5.1"
+
+
+def make_entries(count, seed=0):
+    """Return entries spread over the devices and protocols in the rules."""
+    values = {
+        "filename": ["1.2.3.1.1.dcm", "A_0-infrared.dcm", "A_3-visible.dcm", "b.dcm"],
+        "device": [
+            "Aurora",
+            "Eidon",
+            "3DOCT-1Maestro2",
+            "Triton plus",
+            "Spectralis",
+            "Cirrus",
+        ],
+        "sopclassuid": [OCT, PHOTO],
+        "slicethickness": [0.0703125, 0.04, 0.01, 0.03, 0.02, ""],
+        "framenumber": ["N/A", 27, 61, 512, 128],
+        "rows": [496, 768, 1536],
+        "columns": [512, 768, 1536],
+        "privatetag": ["N/A", "Super Slim"],
+        "gaze": ["R-1022D", "N/A"],
+    }
+    rng = random.Random(seed)
+    entries = []
+
+    for _ in range(count):
+        picked = {key: rng.choice(options) for key, options in values.items()}
+        entries.append(
+            DicomEntry(
+                picked["filename"],
+                "1001",
+                picked["sopclassuid"],
+                "1.2.3",
+                "R",
+                picked["rows"],
+                picked["columns"],
+                picked["device"],
+                picked["framenumber"],
+                "1.2.4",
+                picked["slicethickness"],
+                "fo-dicom 4.0.8",
+                picked["gaze"],
+                picked["privatetag"],
+                "1.0",
+                1,
+            )
+        )
+
+    return entries
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=200000)
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+
+    start = time.perf_counter()
+    engine = RuleEngine(load_rules())
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [legacy_match(entry) for entry in entries]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = []
+    for entry in entries:
+        rule = engine.match(entry)
+        compiled.append(rule.name if rule is not None else "No rules apply.")
+    compiled_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    protocols = len(set(itertools.chain(legacy, compiled)))
+
+    print(f"entries         : {len(entries):10d}")
+    print(f"protocols seen  : {protocols:10d}")
+    print(f"mismatches      : {mismatches:10d}")
+    print(f"rule file load  : {load * 1000:10.2f} ms")
+    print(f"lambda rules    : {len(entries) / legacy_time:10.0f} entries/s")
+    print(f"rule file       : {len(entries) / compiled_time:10.0f} entries/s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,68 @@
+"""Benchmarks restarting a CFP/IR conversion over unchanged zip files
+
+Every zip file holds one synthetic CFP/IR file and is converted with
+convert_zip_dicom, as cfpir.convert does, once with an empty conversion cache
+and once more as a restarted run over the same inputs.
+
+Run from the repository root:
+
+    python -m dev.benchmarks.conversion_cache --zips 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+from tests.dicom_samples import FUNDUS_PHOTO, write_sample
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--zips", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=1)
+    args = parser.parse_args()
+
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(__file__), "..", "..", "pyfairdatatools")
+    )
+    # pylint: disable=import-outside-toplevel,import-error
+    import cfpir_converter
+    import conversion_cache
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = write_sample(
+            os.path.join(folder, "source.dcm"),
+            sop_class_uid=FUNDUS_PHOTO,
+            frames=args.frames,
+            rows=1024,
+            columns=1024,
+        )
+        zip_files = []
+        for i in range(args.zips):
+            zip_files.append(os.path.join(folder, f"{i}.zip"))
+            with zipfile.ZipFile(zip_files[-1], "w") as zip_ref:
+                zip_ref.write(source, f"{i}/source.dcm")
+
+        os.makedirs(os.path.join(folder, "out"))
+        cache_file = os.path.join(folder, "out", "conversions.jsonl")
+
+        for run in ["first run", "restart"]:
+            # a restarted job starts from the records file, not from memory
+            cache = conversion_cache.ConversionCache(cache_file)
+            start = time.perf_counter()
+
+            for i, zip_file in enumerate(zip_files):
+                output = os.path.join(folder, "out", f"{i}.dcm")
+                cfpir_converter.convert_zip_dicom(zip_file, output, cache=cache)
+
+            elapsed = time.perf_counter() - start
+            print(f"{run:<16}: {elapsed:8.2f} s {args.zips / elapsed:10.1f} files/s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,64 @@
+"""Benchmarks header-only DICOM reads against full reads
+
+Compares what extract_dicom_entry used to do (two full dcmread calls and a
+to_json_dict) with read_dicom_header on a large multi-frame OCT file. Run from
+the repository root:
+
+    python -m dev.benchmarks.dicom_header_read --frames 128 --rows 885 --columns 512
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import pydicom
+
+from pyfairdatatools.classifying_rules import read_dicom_header
+from tests.dicom_samples import write_sample
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=128)
+    parser.add_argument("--rows", type=int, default=885)
+    parser.add_argument("--columns", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_path = write_sample(
+            os.path.join(folder, "oct.dcm"),
+            frames=args.frames,
+            rows=args.rows,
+            columns=args.columns,
+        )
+        size = os.path.getsize(file_path) / 1e6
+
+        def full_read():
+            pydicom.dcmread(file_path).to_json_dict()
+            pydicom.dcmread(file_path)
+
+        def header_read():
+            read_dicom_header(file_path)
+
+        full = timed(full_read, args.repeat)
+        header = timed(header_read, args.repeat)
+
+        print(f"file size       : {size:10.1f} MB")
+        print(f"full reads      : {full * 1000:10.2f} ms")
+        print(f"header only     : {header * 1000:10.2f} ms")
+        print(f"speedup         : {full / header:10.1f}x")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,66 @@
+"""Benchmarks the throughput of DicomWriter settings on a storage folder
+
+The same converted dataset is written a number of times with each fsync batch
+size, and the files and megabytes per second of the writer are reported. Point
+--folder at the storage to tune, e.g. a network share:
+
+    python -m dev.benchmarks.dicom_writer --folder /mnt/share/tmp --files 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import pydicom
+
+from tests.dicom_samples import FUNDUS_PHOTO, write_sample
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--folder", default=None)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=4)
+    parser.add_argument("--buffer-size", type=int, default=8 * 1024 * 1024)
+    parser.add_argument("--fsync-every", type=int, nargs="+", default=[0, 1, 16])
+    args = parser.parse_args()
+
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(__file__), "..", "..", "pyfairdatatools")
+    )
+    # pylint: disable=import-outside-toplevel,import-error
+    import cfpir_converter
+    from dicom_writer import DicomWriter
+
+    with tempfile.TemporaryDirectory(dir=args.folder) as folder:
+        source = write_sample(
+            os.path.join(folder, "source.dcm"),
+            sop_class_uid=FUNDUS_PHOTO,
+            frames=args.frames,
+            rows=1024,
+            columns=1024,
+        )
+        dataset = cfpir_converter.convert_dataset(
+            cfpir_converter.cfp_ir, pydicom.dcmread(source)
+        )
+
+        for fsync_every in args.fsync_every:
+            writer = DicomWriter(args.buffer_size, fsync_every)
+
+            with writer:
+                for i in range(args.files):
+                    writer.write(dataset, os.path.join(folder, f"{i}.dcm"))
+
+            stats = writer.stats()
+            print(
+                f"fsync every {fsync_every:<4}: "
+                f"{stats['files_per_second']:10.1f} files/s "
+                f"{stats['bytes_per_second'] / 1024 / 1024:10.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
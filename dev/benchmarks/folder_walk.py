@@ -0,0 +1,81 @@
+"""Benchmarks the parallel folder walker against path_to_dict
+
+A synthetic tree is created in a temporary folder and a fixed latency is added
+to every filesystem call to mimic NFS or FUSE mounts. Run from the repository
+root:
+
+    python -m dev.benchmarks.folder_walk --width 8 --depth 3 --latency 0.002
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from unittest import mock
+
+from pyfairdatatools.validate import folder_to_dict_parallel, path_to_dict
+
+
+def make_tree(root, width, depth, files):
+    """Create a tree with width subfolders per folder, depth levels deep."""
+    for index in range(files):
+        with open(os.path.join(root, f"file_{index}.txt"), "w", encoding="utf-8"):
+            pass
+
+    if depth == 0:
+        return
+
+    for index in range(width):
+        subfolder = os.path.join(root, f"folder_{index}")
+        os.mkdir(subfolder)
+        make_tree(subfolder, width, depth - 1, files)
+
+
+def with_latency(function, latency):
+    def slow(*args, **kwargs):
+        time.sleep(latency)
+        return function(*args, **kwargs)
+
+    return slow
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.002)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, args.width, args.depth, args.files)
+
+        with mock.patch.multiple(
+            os,
+            listdir=with_latency(os.listdir, args.latency),
+            scandir=with_latency(os.scandir, args.latency),
+        ), mock.patch.object(
+            os.path, "isdir", with_latency(os.path.isdir, args.latency)
+        ):
+            start = time.perf_counter()
+            expected = path_to_dict(root)
+            baseline = time.perf_counter() - start
+            print(f"path_to_dict          : {baseline:8.3f}s")
+
+            for workers in [1, 4, 16, 64]:
+                start = time.perf_counter()
+                tree = folder_to_dict_parallel(root, workers=workers)
+                elapsed = time.perf_counter() - start
+
+                assert tree == expected
+
+                print(
+                    f"parallel workers={workers:<4}: {elapsed:8.3f}s  "
+                    f"speedup {baseline / elapsed:6.2f}x"
+                )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,52 @@
+"""Benchmarks is_valid_language_code against reading and scanning languages.json
+
+Run from the repository root:
+
+    python -m dev.benchmarks.language_codes --lookups 300
+"""
+
+import argparse
+import json
+import os
+import time
+
+from pyfairdatatools.validate import is_valid_language_code
+
+LANGUAGES_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "pyfairdatatools", "assets", "languages.json"
+)
+
+
+def linear_scan(code):
+    """Check a code the way it was checked before the index."""
+    with open(LANGUAGES_PATH, encoding="utf-8") as f:
+        return any(language["code"] == code for language in json.load(f))
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=300)
+    args = parser.parse_args()
+
+    codes = (["en", "zu", "invalid"] * args.lookups)[: args.lookups]
+    is_valid_language_code("en")
+
+    start = time.perf_counter()
+    indexed = [is_valid_language_code(code) for code in codes]
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scanned = [linear_scan(code) for code in codes]
+    scanned_time = time.perf_counter() - start
+
+    assert indexed == scanned
+
+    print(f"indexed    : {indexed_time:10.6f} s")
+    print(f"linear scan: {scanned_time:10.6f} s")
+    print(f"speedup    : {scanned_time / indexed_time:10.0f}x")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,117 @@
+"""Benchmarks the peak memory of CFP/IR conversion modes on a large file
+
+A synthetic multi-frame file is converted in a fresh process per mode and the
+peak resident set size of that process is reported:
+
+    json    extract_dicom_dict and write_dicom, the former conversion path
+    direct  convert_dicom, which converts the Dataset directly
+    mapped  convert_dicom with memory_map, streaming the pixel data
+
+Run from the repository root:
+
+    python -m dev.benchmarks.pixel_passthrough --frames 256 --rows 1024 --columns 1024
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from tests.dicom_samples import FUNDUS_PHOTO, write_sample
+
+MODES = ["json", "direct", "mapped"]
+
+
+def convert(mode, source, output):
+    """Convert source with one of MODES and return the elapsed seconds."""
+    sys.path.insert(
+        0, os.path.join(os.path.dirname(__file__), "..", "..", "pyfairdatatools")
+    )
+    import cfpir_converter  # pylint: disable=import-outside-toplevel,import-error
+
+    start = time.perf_counter()
+
+    if mode == "json":
+        rule = cfpir_converter.cfp_ir.compile()
+        cfpir_converter.write_dicom(
+            rule, cfpir_converter.extract_dicom_dict(source, rule.tags), output
+        )
+    else:
+        cfpir_converter.convert_dicom(source, output, memory_map=mode == "mapped")
+
+    return time.perf_counter() - start
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in MB."""
+    # ru_maxrss survives fork and exec on Linux, so it would report the peak of
+    # the parent that wrote the sample; VmHWM belongs to this process only
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, source, output):
+    elapsed = convert(mode, source, output)
+    print(f"{elapsed} {peak_rss()}")
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=256)
+    parser.add_argument("--rows", type=int, default=1024)
+    parser.add_argument("--columns", type=int, default=1024)
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "SOURCE", "OUTPUT"))
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = write_sample(
+            os.path.join(folder, "source.dcm"),
+            sop_class_uid=FUNDUS_PHOTO,
+            frames=args.frames,
+            rows=args.rows,
+            columns=args.columns,
+        )
+        size = os.path.getsize(source) / 1024 / 1024
+        print(f"source size     : {size:10.1f} MB")
+
+        for mode in MODES:
+            output = os.path.join(folder, f"{mode}.dcm")
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "dev.benchmarks.pixel_passthrough",
+                    "--child",
+                    mode,
+                    source,
+                    output,
+                ],
+                capture_output=True,
+                check=True,
+                text=True,
+            )
+            elapsed, peak = (float(value) for value in result.stdout.split())
+            os.remove(output)
+
+            print(f"{mode:<16}: {peak:10.1f} MB peak RSS {elapsed:8.2f} s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
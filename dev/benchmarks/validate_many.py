@@ -0,0 +1,57 @@
+"""Benchmarks validate_many against a plain validate_dataset_description loop
+
+Run from the repository root:
+
+    python -m dev.benchmarks.validate_many --records 10000
+
+Throughput should grow roughly linearly with the worker count up to the number
+of cores on the machine.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from copy import deepcopy
+
+from pyfairdatatools.validate import validate_dataset_description, validate_many
+from tests.test_validate import TestValidateDatasetDescription
+
+
+def main():
+    """CLI entrypoint."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+
+    records = [
+        deepcopy(TestValidateDatasetDescription.valid_data) for _ in range(args.records)
+    ]
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for record in records:
+            validate_dataset_description(record)
+    baseline = time.perf_counter() - start
+    print(f"loop      : {baseline:8.2f}s  {args.records / baseline:10.0f} records/s")
+
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cores})
+
+    for workers in [count for count in worker_counts if count <= cores]:
+        start = time.perf_counter()
+        for _ in validate_many("dataset_description", records, workers=workers):
+            pass
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"workers={workers:<3}: {elapsed:8.2f}s  "
+            f"{args.records / elapsed:10.0f} records/s  "
+            f"speedup {baseline / elapsed:5.2f}x"
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,17 @@
+"""Pulls the SPDX license texts into a snapshot bundled with the package"""
+
+from pyfairdatatools.licenses import BUNDLED_TEXTS_PATH, LicenseTextStore
+
+
+def main():
+    """CLI entrypoint."""
+
+    store = LicenseTextStore(bundle_path=None)
+
+    print(f"Pulling license texts to {BUNDLED_TEXTS_PATH}")
+
+    store.export_bundle(BUNDLED_TEXTS_PATH)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()  # pylint: disable=no-value-for-parameter
@@ -1,6 +1,6 @@
 from importlib.metadata import PackageNotFoundError, version
 
-from . import generate, utils, validate
+from . import datatypes, generate, licenses, utils, validate
 
 try:
     __version__ = version("pyfairdatatools")
@@ -1,7 +1,8 @@
 import sys
 
-from cfpir_converter import convert_zip_dicom
+from cfpir_converter import convert_zip_dicom, convert_zip_dicoms
 from cfpir_metadata_extract import save_dicom_info_as_tsv
+from conversion_cache import get_conversion_cache
 from standards import DataDomain
 
 
@@ -9,30 +10,62 @@ class cfpir(DataDomain):
     """
     Custom data domain class for CFP/IR DICOM data.
 
-    This class inherits from the DataDomain class and defines methods to convert and extract
-    metadata from CFP/IR DICOM data files.
+    This class inherits from the DataDomain class and defines methods to convert and
+    extract metadata from CFP/IR DICOM data files.
 
     Inherits:
         DataDomain (class): Base class for data domain implementation.
 
     Methods:
-        convert(infile, outfile): Converts a CFP/IR DICOM file to the right format.
-        metadata(files, outfile): Extracts metadata from CFP/IR DICOM files and saves it as a TSV file.
+        convert(infile, outfile, cache_file): Converts a CFP/IR DICOM file to the
+            right format.
+        convert_many(infiles, outdir, workers, fsync_every, cache_file): Converts
+            every CFP/IR DICOM file of many zip files.
+        metadata(files, outfile): Extracts metadata from CFP/IR DICOM files and
+            saves it as a TSV file.
     """
 
     def __init__(self):
         super().__init__()
 
-    def convert(self, infile, outfile):
+    def convert(self, infile, outfile, cache_file=None):
         """
         Convert a CFP/IR DICOM file to the right format.
 
         Args:
             infile (str): Path to the input CFP/IR DICOM file.
             outfile (str): Path to the output converted file.
+            cache_file (str): Path to a conversion cache, to skip the conversion
+                when outfile was already converted from the same input and rule.
         """
 
-        convert_zip_dicom(infile, outfile)
+        cache = get_conversion_cache(cache_file) if cache_file else None
+        convert_zip_dicom(infile, outfile, cache=cache)
+
+    def convert_many(
+        self, infiles, outdir, workers=None, fsync_every=0, cache_file=None
+    ):
+        """
+        Convert every CFP/IR DICOM file of many zip files across a pool of processes.
+
+        Args:
+            infiles (list): List of paths to the input zip files.
+            outdir (str): Path to the folder for the converted files.
+            workers (int): Number of worker processes, defaults to the CPU count.
+            fsync_every (int): Flush the converted files to disk in batches of this
+                many files, or 0 to leave it to the operating system.
+            cache_file (str): Path to a conversion cache, to skip the members whose
+                output was already converted from the same input and rule.
+
+        Returns:
+            list: A manifest row per zip member with its output, status, error and
+                timing.
+        """
+
+        cache = get_conversion_cache(cache_file) if cache_file else None
+        return convert_zip_dicoms(
+            infiles, outdir, workers, fsync_every=fsync_every, cache=cache
+        )
 
     def metadata(self, files, outfile):
         """
@@ -1,110 +1,35 @@
+import contextlib
+import functools
+import itertools
+import mmap
+import multiprocessing
 import os
+import posixpath
 import shutil
+import struct
 import tempfile
+import time
 import zipfile
 
 import pydicom
-
-KEEP = 0
-BLANK = 1
-HARMONIZE = 2
-
-
-class ConversionRule:
-    """
-    Represents a conversion rule for processing data.
-
-    This class defines a rule used for data conversion and processing. It contains attributes
-    such as the rule's name, header elements, individual elements, and sequences of elements.
-
-    Attributes:
-        name (str): The name of the conversion rule.
-        header_elements (list): List of Element instances representing header elements.
-        elements (list): List of Element instances representing individual elements.
-        sequences (list): List of Sequence instances representing sequences of elements.
-
-    Methods:
-        header_tags(): Extracts unique tags from header elements.
-        tags(): Extracts unique tags from individual elements.
-        sequence_tags(): Generates a dictionary of sequence tags and associated element tags.
-
-    """
-
-    def __init__(self, name, headers, elements, sequences):
-        self.name = name
-        self.header_elements = headers
-        self.elements = elements
-        self.sequences = sequences
-
-    def header_tags(self):
-        headertags = set()
-        for header_element in self.header_elements:
-            headertags.add(header_element.tag)
-
-        return list(headertags)
-
-    def tags(self):
-        tags = set()
-        for element in self.elements:
-            tags.add(element.tag)
-
-        return list(tags)
-
-    def sequence_tags(self):
-        tags_dict = {}
-        for sequence in self.sequences:
-            element_tags = [element.tag for element in sequence.elements]
-            tags_dict[sequence.tag] = element_tags
-
-        return tags_dict
-
-
-class Element:
-    """
-    Represents an individual data element.
-
-    This class defines an individual data element with attributes such as its name, tag,
-    value representation (vr), decision, and harmonized value.
-
-    Attributes:
-        name (str): The name of the data element.
-        tag (str): The tag associated with the data element.
-        vr (str): The value representation of the data element.
-        decision (int): The decision related to the data element (default is 0).
-        harmonized_value (int): The harmonized value of the data element (default is 0).
-    """
-
-    def __init__(self, name, tag, vr, decision=0, harmonized_value=0):
-        self.name = name
-        self.tag = tag
-        self.vr = vr
-        self.decision = decision
-        self.harmonized_value = harmonized_value
-
-
-class ElementList:
-    """
-    Represents a list of related data elements.
-
-    This class defines a list of related data elements with attributes such as its name,
-    tag, value representation (vr), and the list of elements.
-
-    Attributes:
-        name (str): The name of the element list.
-        tag (str): The tag associated with the element list.
-        vr (str): The value representation of the element list.
-        elements (list): List of Element instances representing the data elements in the list (default is an empty list).
-    """
-
-    def __init__(self, name, tag, vr, elements=None):
-        self.name = name
-        self.tag = tag
-        self.vr = vr
-        self.elements = elements if elements is not None else []
-
+from conversion_rules import (
+    BLANK,
+    HARMONIZE,
+    ConversionRule,
+    ConversionRuleRegistry,
+    Element,
+    ElementList,
+    load_conversion_rules,
+)
+from dicom_writer import DicomWriter, dicom_writer
 
 cfp_ir = ConversionRule(
     "CFP IR",
+    # Ophthalmic Photography 8 Bit and 16 Bit Image Storage
+    sop_class_uids=[
+        "1.2.840.10008.5.1.4.1.1.77.1.5.1",
+        "1.2.840.10008.5.1.4.1.1.77.1.5.2",
+    ],
     # DICOM header elements
     headers=[
         Element("FileMetaInformationGroupLength", "00020000", "UL"),
@@ -240,6 +165,11 @@ cfp_ir = ConversionRule(
 )
 
 
+# Rules of every SOP class that is converted; files of other SOP classes are
+# not converted
+conversion_rules = ConversionRuleRegistry([cfp_ir] + load_conversion_rules())
+
+
 def process_tags(tags, dicom):
     """
     Process DICOM tags and create a dictionary of DicomEntry instances.
@@ -381,123 +311,155 @@ def extract_dicom_dict(file, tags):
     return output, transfersyntax, pixeldata
 
 
-def write_dicom(protocol, dicom_dict_list, file_path):
+def build_dicom(protocol, source, header, transfersyntax, pixeldata):
     """
-    Write DICOM data to a new DICOM file.
+    Build the converted dataset from the elements of a source.
 
-    This function takes a protocol, a list of DICOM dictionaries, and a file path. It constructs
-    a new DICOM dataset using the provided protocol and DICOM dictionaries. The dataset is then
-    written to a new DICOM file at the specified path.
+    The source can be the DicomEntry dictionary made by extract_dicom_dict or a
+    pydicom Dataset, as both are indexed by tag strings.
 
     Args:
-        protocol (ConversionRule): The ConversionRule instance containing processing instructions.
-        dicom_dict_list (list): List containing DICOM dictionaries and related information.
-        file_path (str): The path to the new DICOM file to be created.
+        protocol (ConversionRule): The ConversionRule instance containing processing instructions,
+            or its CompiledConversionRule.
+        source (dict or pydicom.Dataset): The elements of the source file.
+        header (dict or pydicom.Dataset): The file meta elements of the source file.
+        transfersyntax (list): The is_little_endian and is_implicit_VR flags.
+        pixeldata (bytes): The pixel data, which is used as is, or None to leave it out.
+
+    Returns:
+        pydicom.Dataset: The converted dataset.
 
     """
-    headertags = protocol.header_tags()
-    tags = protocol.tags()
-    sequencetags = protocol.sequence_tags()
+    if isinstance(protocol, ConversionRule):
+        protocol = protocol.compile()
 
     file_meta = pydicom.Dataset()
 
-    for headertag in headertags:
-        value = dicom_dict_list[0][headertag].value
-        element_name = pydicom.datadict.keyword_for_tag(
-            dicom_dict_list[0][headertag].tag
-        )
-        setattr(file_meta, element_name, value)
+    for headertag, element_name in protocol.header_keywords.items():
+        setattr(file_meta, element_name, header[headertag].value)
 
     dataset = pydicom.Dataset()
     dataset.file_meta = file_meta
 
-    for tag in tags:
-        for element in protocol.elements:
-            if element.tag == tag:
-                desired_element = element
-
-        if desired_element.decision == BLANK:
+    for tag, (element_name, decision, harmonized_value) in protocol.elements.items():
+        if decision == BLANK:
             value = []
 
-        elif desired_element.decision == HARMONIZE:
-            value = [desired_element.harmonized_value]
+        elif decision == HARMONIZE:
+            value = [harmonized_value]
 
-        elif tag in dicom_dict_list[0]:
-            value = dicom_dict_list[0][tag].value
+        elif tag in source:
+            value = source[tag].value
 
         else:
             value = []
 
-        element_name = (
-            pydicom.datadict.keyword_for_tag(dicom_dict_list[0][tag].tag)
-            if tag in dicom_dict_list[0]
-            else pydicom.datadict.keyword_for_tag(tag)
-        )
         setattr(dataset, element_name, value)
 
-    dataset.is_little_endian = dicom_dict_list[1][0]
-    dataset.is_implicit_VR = dicom_dict_list[1][1]
-    dataset.PixelData = dicom_dict_list[2]
+    dataset.is_little_endian = transfersyntax[0]
+    dataset.is_implicit_VR = transfersyntax[1]
+    if pixeldata is not None:
+        dataset.PixelData = pixeldata
 
-    if dicom_dict_list[0]["00081090"].value == ["Triton"]:
+    # extract_dicom_dict values are lists, Dataset values are not
+    if "00081090" in source and source["00081090"].value in (["Triton"], "Triton"):
         dataset.Manufacturer = ["Topcon"]
 
-    keys = list(sequencetags.keys())
-
-    for key in keys:
-        for sequence in protocol.sequences:
-            if sequence.tag == key:
-                desired_sequence = sequence
-
-        if key in dicom_dict_list[0]:
-            sequencetag = key
-            seq = pydicom.Sequence()
-            elementkeys = sequencetags[sequencetag]
-
-            if dicom_dict_list[0][key].value:
-                x = dicom_dict_list[0][key].value[0]
-                key_list = list(x.keys())
-
-                item = pydicom.Dataset()
-                for elementkey in elementkeys:
-                    for element in desired_sequence.elements:
-                        if element.tag == elementkey:
-                            desired_element = element
-                    if elementkey in key_list and desired_element.decision == BLANK:
-                        value = []
-                    elif (
-                        elementkey in key_list and desired_element.decision == HARMONIZE
-                    ):
-                        value = desired_element.harmonized_value
-                    elif elementkey in key_list:
-                        value = dicom_dict_list[0][key].value[0][elementkey].value
-                    element_tag = (
-                        dicom_dict_list[0][sequencetag].value[0][elementkey].tag
-                    )
-                    element_name = pydicom.datadict.keyword_for_tag(element_tag)
-                    setattr(item, element_name, value)
-                seq.append(item)
-
-                value = seq
-                element_name = pydicom.datadict.keyword_for_tag(
-                    dicom_dict_list[0][key].tag
-                )
-                setattr(dataset, element_name, value)
+    for key, (sequence_name, sequence_elements) in protocol.sequences.items():
+        seq = pydicom.Sequence()
+
+        if key in source and source[key].value:
+            x = source[key].value[0]
+
+            item = pydicom.Dataset()
+            for elementkey, (
+                element_name,
+                decision,
+                harmonized_value,
+            ) in sequence_elements.items():
+                # elements missing from the source item are left out of the item
+                if elementkey not in x:
+                    continue
+
+                if decision == BLANK:
+                    value = []
+                elif decision == HARMONIZE:
+                    value = harmonized_value
+                else:
+                    value = x[elementkey].value
+                setattr(item, element_name, value)
+            seq.append(item)
+
+        setattr(dataset, sequence_name, seq)
+
+    return dataset
+
+
+def write_dicom(protocol, dicom_dict_list, file_path, writer=None):
+    """
+    Write DICOM data to a new DICOM file.
+
+    This function takes a protocol, a list of DICOM dictionaries, and a file path. It constructs
+    a new DICOM dataset using the provided protocol and DICOM dictionaries. The dataset is then
+    written to a new DICOM file at the specified path.
+
+    Args:
+        protocol (ConversionRule): The ConversionRule instance containing processing instructions,
+            or its CompiledConversionRule.
+        dicom_dict_list (list): List containing DICOM dictionaries and related information.
+        file_path (str): The path to the new DICOM file to be created.
+        writer (DicomWriter): Writes the file atomically, if given.
+
+    """
+    dataset = build_dicom(
+        protocol,
+        dicom_dict_list[0],
+        dicom_dict_list[0],
+        dicom_dict_list[1],
+        dicom_dict_list[2],
+    )
+
+    if writer is not None:
+        writer.write(dataset, file_path)
+        return
 
-            else:
-                value = seq
-                element_name = pydicom.datadict.keyword_for_tag(
-                    dicom_dict_list[0][key].tag
-                )
-                setattr(dataset, element_name, value)
-        else:
-            value = pydicom.Sequence()
-            element_name = pydicom.datadict.keyword_for_tag(key)
-            setattr(dataset, element_name, value)
     pydicom.filewriter.write_file(file_path, dataset, write_like_original=False)
 
 
-def convert_dicom(input, output):
+def convert_dataset(protocol, dataset):
+    """
+    Convert a DICOM dataset directly, without the JSON round trip of extract_dicom_dict.
+
+    The KEEP, BLANK and HARMONIZE decisions are applied to the elements of the source
+    dataset, whose values are copied as they are. The pixel data is shared with the
+    source dataset rather than copied, keeping its VR, and left out for datasets
+    without any, such as surface segmentations.
+
+    Args:
+        protocol (ConversionRule): The ConversionRule instance containing processing instructions,
+            or its CompiledConversionRule.
+        dataset (pydicom.Dataset): The source dataset, as read by pydicom.dcmread.
+
+    Returns:
+        pydicom.Dataset: The converted dataset.
+
+    """
+    converted = build_dicom(
+        protocol,
+        dataset,
+        dataset.file_meta,
+        [dataset.is_little_endian, dataset.is_implicit_VR],
+        dataset.get("PixelData"),
+    )
+
+    # rather than the VR pydicom would choose from BitsAllocated when writing
+    if "PixelData" in dataset:
+        converted["PixelData"].VR = dataset["PixelData"].VR
+
+    return converted
+
+
+def convert_dicom(input_file, output, memory_map=False, writer=None, rule=None):
     """
     Convert DICOM data from an input file to an output file using a conversion rule.
 
@@ -506,18 +468,146 @@ def convert_dicom(input, output):
     output file.
 
     Args:
-        input (str): The path to the input DICOM file.
+        input_file (str): The path to the input DICOM file.
         output (str): The path to the output DICOM file to be created.
+        memory_map (bool): Stream the pixel data of an uncompressed input from a memory
+            map of the file instead of reading it into memory, see convert_dicom_mapped.
+        writer (DicomWriter): Writes the output atomically, if given.
+        rule (ConversionRule): The rule to convert with, defaults to the rule of the
+            SOPClassUID of the input in conversion_rules. Inputs of a SOP class
+            without a rule raise ValueError.
 
     """
-    conversion_rule = cfp_ir
-    tags = (
-        conversion_rule.header_tags()
-        + conversion_rule.tags()
-        + list(conversion_rule.sequence_tags().keys())
-    )
-    x = extract_dicom_dict(input, tags)
-    write_dicom(conversion_rule, x, output)
+    if memory_map:
+        convert_dicom_mapped(input_file, output, writer=writer, rule=rule)
+        return
+
+    source = pydicom.dcmread(input_file)
+    dataset = convert_dataset(rule or conversion_rules.match(source), source)
+
+    if writer is not None:
+        writer.write(dataset, output)
+        return
+
+    pydicom.filewriter.write_file(output, dataset, write_like_original=False)
+
+
+# Bytes of pixel data written, and released from the memory map, at a time
+MAPPED_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def _read_pixel_data_header(fp, dataset):
+    """
+    Return the offset, length and VR of the pixel data value, or None if unmappable.
+
+    The VR is None for implicit VR datasets. fp must be positioned where dcmread with
+    stop_before_pixels left it, at the start of the pixel data element.
+    """
+    if (
+        not dataset.is_little_endian
+        or dataset.file_meta.TransferSyntaxUID.is_compressed
+    ):
+        return None
+
+    start = fp.tell()
+
+    if dataset.is_implicit_VR:
+        header = fp.read(8)
+        if len(header) < 8:
+            return None
+        group, element, length = struct.unpack("<HHI", header)
+        vr = None
+    else:
+        header = fp.read(12)
+        if len(header) < 12:
+            return None
+        group, element, vr, length = struct.unpack("<HH2s2xI", header)
+        if vr not in (b"OB", b"OW"):
+            return None
+
+    if (group, element) != (0x7FE0, 0x0010) or length == 0xFFFFFFFF:
+        return None
+
+    return start + len(header), length, vr
+
+
+def _write_mapped_pixel_data(fp, source_fp, offset, length, vr, chunk_size):
+    """
+    Append a PixelData element to fp, streaming its value from a memory map.
+
+    The element is written with the VR of the source element, or without a VR when
+    vr is None.
+    """
+    if vr is None:
+        fp.write(struct.pack("<HHI", 0x7FE0, 0x0010, length))
+    else:
+        fp.write(struct.pack("<HH2s2xI", 0x7FE0, 0x0010, vr, length))
+
+    dontneed = getattr(mmap, "MADV_DONTNEED", None)
+
+    with mmap.mmap(source_fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            for start in range(offset, offset + length, chunk_size):
+                stop = min(start + chunk_size, offset + length)
+                fp.write(view[start:stop])
+
+                # drop the pages already written from the resident set
+                if dontneed is not None:
+                    page_start = start - start % mmap.PAGESIZE
+                    mapped.madvise(dontneed, page_start, stop - page_start)
+        finally:
+            view.release()
+
+
+def convert_dicom_mapped(
+    input_file, output, chunk_size=MAPPED_CHUNK_SIZE, writer=None, rule=None
+):
+    """
+    Convert a DICOM file without ever holding its pixel data in memory.
+
+    The header of the input is read and converted as in convert_dicom, then the pixel
+    data element is copied from a memory map of the input straight into the output
+    file, a chunk at a time. Inputs with compressed or big endian pixel data are
+    converted by convert_dicom instead.
+
+    Args:
+        input_file (str): The path to the input DICOM file.
+        output (str): The path to the output DICOM file to be created.
+        chunk_size (int): Number of bytes of pixel data copied at a time.
+        writer (DicomWriter): Writes the output atomically, if given.
+        rule (ConversionRule): The rule to convert with, defaults to the rule of the
+            SOPClassUID of the input in conversion_rules. Inputs of a SOP class
+            without a rule raise ValueError.
+
+    """
+    with open(input_file, "rb") as source_fp:
+        source = pydicom.dcmread(source_fp, stop_before_pixels=True)
+        pixel_data = _read_pixel_data_header(source_fp, source)
+
+        if pixel_data is None:
+            convert_dicom(input_file, output, writer=writer, rule=rule)
+            return
+
+        offset, length, vr = pixel_data
+        dataset = build_dicom(
+            rule or conversion_rules.match(source),
+            source,
+            source.file_meta,
+            [source.is_little_endian, source.is_implicit_VR],
+            None,
+        )
+
+        def append(fp):
+            _write_mapped_pixel_data(fp, source_fp, offset, length, vr, chunk_size)
+
+        if writer is not None:
+            writer.write(dataset, output, append)
+            return
+
+        with open(output, "wb") as fp:
+            pydicom.filewriter.write_file(fp, dataset, write_like_original=False)
+            append(fp)
 
 
 def list_files_recursive(directory):
@@ -529,15 +619,317 @@ def list_files_recursive(directory):
     return all_files
 
 
-def convert_zip_dicom(zip_file_path, output):
+def zip_member_key(info):
+    """
+    Return the content key of a zip member, without reading the member.
+
+    The key is the CRC-32 and size of the uncompressed bytes that the archive
+    stores for the member, and that zipfile checks when the member is read.
+
+    Args:
+        info (zipfile.ZipInfo): The member.
+
+    Returns:
+        str: The content key.
+    """
+    return f"crc32:{info.CRC:08x}:{info.file_size}"
+
+
+def convert_zip_dicom(zip_file_path, output, memory_map=False, cache=None):
+    """
+    Convert the first DICOM file of a zip file.
+
+    The file is converted with the rule of its SOP class in conversion_rules. Files
+    of a SOP class without a rule are reported and not converted.
+
+    Args:
+        zip_file_path (str): The path to the input zip file.
+        output (str): The path to the output DICOM file to be created.
+        memory_map (bool): Stream the pixel data from a memory map, see convert_dicom.
+        cache (ConversionCache): Skip the conversion when output is current, and
+            record it otherwise.
+
+    """
     try:
         with tempfile.TemporaryDirectory() as temp_dir:
             with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
-                zip_ref.extractall(temp_dir)
-            extracted_files = list_files_recursive(temp_dir)
-            convert_dicom(extracted_files[0], output)
+                # only the member that is converted is written to disk,
+                # preferring the top-level files the way os.walk lists them
+                members = [
+                    name for name in zip_ref.namelist() if not name.endswith("/")
+                ]
+                member = min(members, key=lambda name: name.count("/"))
+                source_key = zip_member_key(zip_ref.getinfo(member))
+
+                if cache is not None and cache.is_current(
+                    output, source_key, conversion_rules.fingerprint
+                ):
+                    return None
+
+                extracted_file = zip_ref.extract(member, temp_dir)
+
+            convert_dicom(extracted_file, output, memory_map)
+
+            if cache is not None:
+                cache.record(output, source_key, conversion_rules.fingerprint)
     except Exception as e:
         print(f"An error occurred: {str(e)}")
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
     return None
+
+
+def convert_zip_member(task, writer=None, zip_ref=None):
+    """
+    Convert one member of a zip file and report the result as a manifest row.
+
+    Members without the DICM prefix are skipped, and members of a SOP class without
+    a rule in conversion_rules are errors. Errors are reported in the row instead of
+    being raised.
+
+    Args:
+        task (tuple): The zip file path, the member name and the output path, as
+            listed by list_conversion_tasks.
+        writer (DicomWriter): Writes the output, defaults to dicom_writer. With
+            fsync batching, the output appears once the writer is flushed.
+        zip_ref (zipfile.ZipFile): The zip file already opened by the caller, or
+            None to open and close it for this member only.
+
+    Returns:
+        dict: The zip, member, output, status ("converted", "skipped" or "error"),
+            error, bytes written and seconds of the conversion.
+
+    """
+    zip_file_path, member, output = task[:3]
+    row = {
+        "zip": zip_file_path,
+        "member": member,
+        "output": output,
+        "status": "converted",
+        "error": "",
+        "bytes": 0,
+        "seconds": 0.0,
+    }
+    start = time.perf_counter()
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if zip_ref is None:
+                zip_ref = stack.enter_context(zipfile.ZipFile(zip_file_path, "r"))
+
+            stream = stack.enter_context(zip_ref.open(member))
+
+            if stream.read(132)[128:] != b"DICM":
+                row.update(status="skipped", error="Not a DICOM file.", output="")
+                return row
+
+            stream.seek(0)
+            source = pydicom.dcmread(stream)
+            sop_class_uid = source.get("SOPClassUID", "")
+            rule = conversion_rules.rule_for(sop_class_uid)
+
+            if rule is None:
+                row.update(
+                    status="error",
+                    error=f"No conversion rule for SOP class {sop_class_uid}.",
+                    output="",
+                )
+                return row
+
+            dataset = convert_dataset(rule, source)
+
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        row["bytes"] = (writer or dicom_writer).write(dataset, output)
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}", output="")
+    finally:
+        row["seconds"] = round(time.perf_counter() - start, 6)
+
+    return row
+
+
+def list_conversion_tasks(zip_files, output_dir):
+    """
+    List the members of zip files to convert and where to write them.
+
+    Each member is written to output_dir/<zip name>/<member path>. Members whose
+    path would leave that folder are not listed.
+
+    Args:
+        zip_files (list): The paths to the zip files.
+        output_dir (str): The folder to write the converted files to.
+
+    Returns:
+        list: (zip file path, member name, output path, content key) tuples, with
+            the content key of zip_member_key.
+
+    """
+    tasks = []
+
+    for zip_file_path in zip_files:
+        zip_name = os.path.splitext(os.path.basename(zip_file_path))[0]
+
+        with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
+            infos = zip_ref.infolist()
+
+        for info in infos:
+            member = info.filename
+            path = posixpath.normpath(member)
+
+            if (
+                member.endswith("/")
+                or posixpath.isabs(path)
+                or path.split("/")[0] == ".."
+            ):
+                continue
+
+            tasks.append(
+                (
+                    zip_file_path,
+                    member,
+                    os.path.join(output_dir, zip_name, *path.split("/")),
+                    zip_member_key(info),
+                )
+            )
+
+    return tasks
+
+
+def convert_zip_members(tasks, fsync_every=0):
+    """
+    Convert a batch of zip members with one DicomWriter, flushed at the end.
+
+    Each zip is opened once for its members following each other in the batch,
+    and closed before the next one is opened.
+
+    Args:
+        tasks (list): Tasks as taken by convert_zip_member.
+        fsync_every (int): Number of files per fsync batch, 0 to never fsync.
+
+    Returns:
+        list: A manifest row per task. Rows of files the writer could not flush
+            are errors.
+
+    """
+    writer = DicomWriter(fsync_every=fsync_every)
+    rows = []  # type: list
+
+    for zip_file_path, zip_tasks in itertools.groupby(tasks, key=lambda task: task[0]):
+        try:
+            with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
+                rows.extend(
+                    convert_zip_member(task, writer, zip_ref) for task in zip_tasks
+                )
+        except (OSError, zipfile.BadZipFile):
+            # the members left report the error of opening the zip themselves
+            rows.extend(convert_zip_member(task, writer) for task in zip_tasks)
+
+    try:
+        writer.flush()
+    except OSError as e:
+        for row in rows:
+            if row["status"] == "converted" and not os.path.exists(row["output"]):
+                row.update(status="error", error=f"{type(e).__name__}: {e}", output="")
+
+    return rows
+
+
+def _iter_convert_zip_members(tasks, workers, chunksize, fsync_every):
+    batches = [tasks[i : i + chunksize] for i in range(0, len(tasks), chunksize)]
+    convert = functools.partial(convert_zip_members, fsync_every=fsync_every)
+
+    if workers <= 1:
+        for rows in map(convert, batches):
+            yield from rows
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for rows in pool.imap(convert, batches):
+            yield from rows
+
+
+def convert_zip_dicoms(
+    zip_files, output_dir, workers=None, chunksize=4, fsync_every=0, cache=None
+):
+    """
+    Convert every DICOM member of many zip files across a pool of worker processes.
+
+    Unlike convert_zip_dicom, which converts the first file of one zip, every member
+    is converted, each output is written atomically and a failure is reported in
+    the manifest instead of stopping the batch.
+
+    Args:
+        zip_files (list): The paths to the input zip files.
+        output_dir (str): The folder to write the converted files to.
+        workers (int): Number of worker processes, defaults to the CPU count.
+            With 1 worker the members are converted in the current process.
+        chunksize (int): Number of members sent to a worker at a time.
+        fsync_every (int): Flush the outputs to disk in batches of this many
+            files, at most chunksize, or 0 to leave it to the operating system.
+        cache (ConversionCache): Skip the members whose output is current, with
+            an "unchanged" row each, and record the members converted.
+
+    Returns:
+        list: A manifest row per member, as returned by convert_zip_member, in
+            the order of zip_files. Zip files that cannot be opened come first,
+            with an error row each.
+
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    manifest = []
+    tasks = []
+
+    for zip_file_path in zip_files:
+        try:
+            tasks.extend(list_conversion_tasks([zip_file_path], output_dir))
+        except (OSError, zipfile.BadZipFile) as e:
+            manifest.append(
+                {
+                    "zip": zip_file_path,
+                    "member": "",
+                    "output": "",
+                    "status": "error",
+                    "error": f"{type(e).__name__}: {e}",
+                    "bytes": 0,
+                    "seconds": 0.0,
+                }
+            )
+
+    if cache is None:
+        manifest.extend(
+            _iter_convert_zip_members(tasks, workers, chunksize, fsync_every)
+        )
+        return manifest
+
+    unchanged = [
+        cache.is_current(task[2], task[3], conversion_rules.fingerprint)
+        for task in tasks
+    ]
+    converted = _iter_convert_zip_members(
+        [task for task, skip in zip(tasks, unchanged) if not skip],
+        workers,
+        chunksize,
+        fsync_every,
+    )
+
+    for task, skip in zip(tasks, unchanged):
+        if skip:
+            row = {
+                "zip": task[0],
+                "member": task[1],
+                "output": task[2],
+                "status": "unchanged",
+                "error": "",
+                "bytes": 0,
+                "seconds": 0.0,
+            }
+        else:
+            row = next(converted)
+            if row["status"] == "converted":
+                cache.record(row["output"], task[3], conversion_rules.fingerprint)
+
+        manifest.append(row)
+
+    return manifest
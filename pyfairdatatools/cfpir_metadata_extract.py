@@ -1,52 +1,253 @@
 import csv
+import hashlib
+import json
+import multiprocessing
 import os
+from typing import Dict
 
 import pydicom
 
+# Elements written to the TSV file; the pixel data is never read
+METADATA_TAGS = [
+    "SpecificCharacterSet",
+    "Modality",
+    "SOPClassUID",
+    "PatientID",
+    "ImageLaterality",
+    "Manufacturer",
+    "AcquisitionDateTime",
+]
+
+# Columns of every metadata row, in output order
+METADATA_COLUMNS = [
+    "domain",
+    "modality",
+    "patient_id",
+    "laterality",
+    "manufacturer",
+    "filepath",
+    "acquisitiondatetime",
+]
+
+METADATA_FORMATS = ["tsv", "jsonl", "parquet"]
+
+
+def read_dicom_metadata(file):
+    """
+    Read the metadata row of a DICOM file.
+
+    Missing elements are left empty. Files that are not DICOM get the "Not DICOM"
+    domain and files that cannot be read at all an "Error: <exception>" domain,
+    so that every row has the same columns and one bad file does not stop an
+    export.
+
+    Args:
+        file (str): The path to the DICOM file.
+
+    Returns:
+        dict: The row, with a string value for every name in METADATA_COLUMNS.
+    """
+    row = dict.fromkeys(METADATA_COLUMNS, "")
+    row["filepath"] = os.path.abspath(file)
+
+    try:
+        dicom = pydicom.dcmread(
+            file, stop_before_pixels=True, specific_tags=METADATA_TAGS
+        )
+    except pydicom.errors.InvalidDicomError:
+        row["domain"] = "Not DICOM"
+    except Exception as e:
+        row["domain"] = f"Error: {type(e).__name__}: {e}"
+    else:
+        row["domain"] = "DICOM"
+        if dicom.get("SOPClassUID", "") == "1.2.840.10008.5.1.4.1.1.77.1.5.1":
+            row["modality"] = "CFP/IR"
+        else:
+            row["modality"] = "not CFP/IR"
+        row["patient_id"] = dicom.get("PatientID", "")
+        row["laterality"] = dicom.get("ImageLaterality", "")
+        row["manufacturer"] = dicom.get("Manufacturer", "")
+        row["acquisitiondatetime"] = dicom.get("AcquisitionDateTime", "")
+
+    return {column: str(value) for column, value in row.items()}
+
+
+def _iter_metadata(files, workers, chunksize):
+    if workers <= 1:
+        yield from map(read_dicom_metadata, files)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(read_dicom_metadata, files, chunksize)
+
+
+def _files_digest(files):
+    """Return a digest of the file list, to only resume a run over the same files."""
+    digest = hashlib.sha1()
+    for file in files:
+        digest.update(file.encode("utf-8", "surrogateescape") + b"\0")
+
+    return digest.hexdigest()
+
+
+def _load_checkpoint(checkpoint_path, digest, stream_path):
+    """Return the rows done and the stream size of a resumable run, or (0, 0)."""
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return 0, 0
+
+    if (
+        checkpoint.get("digest") != digest
+        or not os.path.isfile(stream_path)
+        or os.path.getsize(stream_path) < checkpoint["size"]
+    ):
+        return 0, 0
+
+    return checkpoint["done"], checkpoint["size"]
+
+
+def _save_checkpoint(checkpoint_path, digest, done, size):
+    temp_path = checkpoint_path + ".tmp"
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"digest": digest, "done": done, "size": size}, f)
+
+    os.replace(temp_path, checkpoint_path)
+
+
+def _write_parquet(spool_path, output_file):
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        print("Parquet output requires the pyarrow package.")
+        raise error
+
+    columns: Dict[str, list] = {column: [] for column in METADATA_COLUMNS}
+    with open(spool_path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            for column in METADATA_COLUMNS:
+                columns[column].append(row[column])
+
+    pyarrow.parquet.write_table(pyarrow.table(columns), output_file)
+
+
+def export_dicom_metadata(
+    files,
+    output_file,
+    workers=None,
+    chunksize=16,
+    output_format=None,
+    checkpoint_every=1000,
+    resume=True,
+):
+    """
+    Export the metadata of many DICOM files, reading headers across a worker pool.
+
+    Rows are written in input order, with the columns of METADATA_COLUMNS, as soon
+    as they are read. Every checkpoint_every rows the progress is saved next to
+    the output file, so that an interrupted run over the same files continues
+    where it stopped instead of starting over. Parquet files cannot be appended
+    to, so their rows are spooled to a JSON Lines file that is converted once
+    every file has been read.
+
+    Args:
+        files (list): List of paths to the input DICOM files.
+        output_file (str): The path to the output file to be created.
+        workers (int): Number of worker processes, defaults to the CPU count.
+            With 1 worker the files are read in the current process.
+        chunksize (int): Number of files sent to a worker at a time.
+        output_format (str): "tsv", "jsonl" or "parquet", defaults to the
+            extension of output_file and to "tsv" for other extensions.
+        checkpoint_every (int): Number of rows between checkpoints, or None to
+            not checkpoint.
+        resume (bool): Continue an interrupted run from its checkpoint.
+
+    Returns:
+        int: The number of rows in the output file.
+
+    """
+    if output_format is None:
+        extension = os.path.splitext(output_file)[1].lstrip(".")
+        output_format = extension if extension in METADATA_FORMATS else "tsv"
+
+    if output_format not in METADATA_FORMATS:
+        print("Output format is invalid.")
+        raise ValueError("Invalid output format")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    files = list(files)
+    digest = _files_digest(files)
+    checkpoint_path = output_file + ".checkpoint"
+    stream_path = (
+        output_file + ".partial.jsonl" if output_format == "parquet" else output_file
+    )
+
+    done, size = 0, 0
+    if resume:
+        done, size = _load_checkpoint(checkpoint_path, digest, stream_path)
+
+    if done:
+        os.truncate(stream_path, size)
+        mode = "a"
+    else:
+        mode = "w"
+
+    with open(stream_path, mode, newline="", encoding="utf-8") as stream:
+        if output_format == "tsv":
+            writer = csv.DictWriter(stream, fieldnames=METADATA_COLUMNS, delimiter="\t")
+            if not done:
+                writer.writeheader()
+
+        for row in _iter_metadata(files[done:], workers, chunksize):
+            if output_format == "tsv":
+                writer.writerow(row)
+            else:
+                stream.write(json.dumps(row) + "\n")
+
+            done += 1
+
+            if checkpoint_every and done % checkpoint_every == 0:
+                stream.flush()
+                _save_checkpoint(
+                    checkpoint_path, digest, done, os.fstat(stream.fileno()).st_size
+                )
+
+    if output_format == "parquet":
+        _write_parquet(stream_path, output_file)
+        os.remove(stream_path)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return done
+
 
 def save_dicom_info_as_tsv(files, output_file):
     """
     Save DICOM metadata information as a TSV file.
 
-    This function takes a list of DICOM files and saves selected metadata information from each file
-    into a Tab-Separated Values (TSV) file. The saved information includes domain, modality, patient ID,
-    laterality, manufacturer, file path, and acquisition datetime.
+    This function takes a list of DICOM files and saves selected metadata information
+    from each file into a Tab-Separated Values (TSV) file. The saved information
+    includes domain, modality, patient ID, laterality, manufacturer, file path, and
+    acquisition datetime. Use export_dicom_metadata to read many files in parallel or
+    to write JSON Lines or Parquet.
 
     Args:
         files (list): List of paths to the input DICOM files.
         output_file (str): The path to the output TSV file to be created.
 
     """
-    with open(output_file, "w", newline="") as tsv_file:
-        writer = csv.writer(tsv_file, delimiter="\t")
-        writer.writerow(
-            [
-                "domain",
-                "modality",
-                "patient_id",
-                "laterality",
-                "manufacturer",
-                "filepath",
-                "acquisitiondatetime",
-            ]
-        )
-
-        for file in files:
-            data_dict = {}
-            try:
-                dicom = pydicom.dcmread(file)
-                data_dict["domain"] = "DICOM"
-                data_dict["modality"] = dicom.Modality
-                if dicom.SOPClassUID == "1.2.840.10008.5.1.4.1.1.77.1.5.1":
-                    data_dict["modality"] = "CFP/IR"
-                else:
-                    data_dict["modality"] = "not CFP/IR"
-                data_dict["patient_id"] = dicom.PatientID
-                data_dict["laterality"] = dicom.ImageLaterality
-                data_dict["manufacturer"] = dicom.Manufacturer
-                data_dict["filepath"] = os.path.abspath(file)
-                data_dict["acquisitiondatetime"] = dicom.AcquisitionDateTime
-            except pydicom.errors.InvalidDicomError:
-                data_dict["domain"] = "Not DICOM"
-
-            writer.writerow(data_dict.values())
+    export_dicom_metadata(
+        files,
+        output_file,
+        workers=1,
+        output_format="tsv",
+        checkpoint_every=None,
+        resume=False,
+    )
@@ -1,196 +1,299 @@
 # type: ignore
 
+import json
 import os
+import posixpath
 import shutil
 import tempfile
+import threading
+import time
 import zipfile
+from operator import attrgetter
 
 import pydicom
 import xmltodict
+import yaml
 from defusedxml import minidom
 
+CLASSIFYING_RULES_PATH = os.path.join(
+    os.path.dirname(__file__), "assets", "classifying_rules.yaml"
+)
+
+# Fields of a DicomEntry that a rule file can refer to
+RULE_FIELDS = {
+    "filename",
+    "patientid",
+    "sopclassuid",
+    "sopinstanceuid",
+    "laterality",
+    "rows",
+    "columns",
+    "device",
+    "framenumber",
+    "referencedsopinstance",
+    "slicethickness",
+    "implementationversion",
+    "gaze",
+    "privatetag",
+    "softwareversion",
+    "numberoffiles",
+}
+
+# Check of each rule operator, called with the entry field and the rule value
+RULE_OPERATORS = {
+    "==": lambda field, value: str(field) == value,
+    "contains": lambda field, value: value in field,
+    "icontains": lambda field, value: value in str(field).lower(),
+    "startswith": lambda field, value: str(field).startswith(value),
+    "endswith": lambda field, value: str(field).endswith(value),
+    "between": lambda field, value: not isinstance(field, str)
+    and value[0] <= int(field) <= value[1],
+}
+
+# Fields whose == conditions are used as RuleEngine keys
+RULE_KEYS = ("device", "sopclassuid")
+
+
+def _rule_condition(field, operator, value):
+    """Return the function checking one condition of a rule on an entry."""
+    check = RULE_OPERATORS[operator]
+    get_field = attrgetter(field)
+
+    def condition(entry):
+        return check(get_field(entry), value)
+
+    return condition
+
 
 class ClassifyingRule:
-    def __init__(self, name, conditions):
+    """A named protocol and the conditions a DicomEntry must meet to match it.
+
+    device and sopclassuid, when given, must equal the values of the entry and
+    are used by the RuleEngine to index the rule. The conditions are the
+    remaining checks. Rules built with from_spec keep their declarative
+    definition in spec, which can be compared and saved back to a rule file.
+    """
+
+    def __init__(self, name, conditions, device=None, sopclassuid=None, spec=None):
         self.name = name
         self.conditions = conditions
+        self.device = device
+        self.sopclassuid = sopclassuid
+        self.spec = spec
 
-    def apply(self, dicom_entry):
+    @classmethod
+    def from_spec(cls, spec):
+        """Build a rule from its declarative definition.
+
+        The == conditions on device and sopclassuid become the rule keys and
+        every other condition becomes a function of the entry, in order.
+
+        Args:
+            spec (dict): The rule name and its "<field> <operator>" conditions.
+
+        Returns:
+            ClassifyingRule: The rule.
+        """
+        keys = {}
+        conditions = []
+
+        for condition, value in spec.items():
+            if condition == "name":
+                continue
+
+            field, _, operator = condition.partition(" ")
+
+            if field not in RULE_FIELDS or operator not in RULE_OPERATORS:
+                print(f"Invalid condition {condition} in rule {spec.get('name')}.")
+                raise ValueError("Invalid rule condition")
+
+            if operator == "between":
+                value = [int(bound) for bound in value]
+            elif operator == "icontains":
+                value = str(value).lower()
+            else:
+                value = str(value)
+
+            if operator == "==" and field in RULE_KEYS:
+                keys[field] = value
+                continue
+
+            conditions.append(_rule_condition(field, operator, value))
+
+        return cls(spec["name"], conditions, spec=dict(spec), **keys)
+
+    def check_conditions(self, dicom_entry):
         for condition in self.conditions:
             if not condition(dicom_entry):
                 return False
         return True
 
+    def apply(self, dicom_entry):
+        if self.device is not None and dicom_entry.device != self.device:
+            return False
+        if self.sopclassuid is not None and dicom_entry.sopclassuid != self.sopclassuid:
+            return False
+        return self.check_conditions(dicom_entry)
+
+
+def load_rules(file_path=CLASSIFYING_RULES_PATH):
+    """Load the classifying rules of a YAML or JSON rule file.
+
+    Args:
+        file_path (str): The path to the rule file.
+
+    Returns:
+        list: The ClassifyingRule instances, in file order.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        if file_path.endswith(".json"):
+            specs = json.load(f)["rules"]
+        else:
+            specs = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))[
+                "rules"
+            ]
+
+    return [ClassifyingRule.from_spec(spec) for spec in specs]
+
+
+def save_rules(rule_list, file_path):
+    """Save rules built with from_spec to a YAML or JSON rule file.
+
+    Args:
+        rule_list (list): The ClassifyingRule instances.
+        file_path (str): The path to the rule file to create.
+    """
+    specs = {"rules": [rule.spec for rule in rule_list]}
+
+    with open(file_path, "w", encoding="utf-8") as f:
+        if file_path.endswith(".json"):
+            json.dump(specs, f, indent=2)
+        else:
+            yaml.safe_dump(specs, f, sort_keys=False)
+
 
 # List of ClassifyingRule instances
-rules = [
-    # optomed
-    ClassifyingRule(
-        "OptoMed_CFP_Disc_or_Mac_centered",
-        conditions=[lambda entry: "Aurora" == entry.device],
-    ),
-    # eidon
-    ClassifyingRule(
-        "Eidon_UWF_Central_IR",
-        conditions=[
-            lambda entry: "0-infrared" in entry.filename.lower()
-            and "Eidon" in entry.device
-        ],
-    ),
-    ClassifyingRule(
-        "Eidon_UWF_Central_FAF",
-        conditions=[
-            lambda entry: "0-af-" in entry.filename.lower() and "Eidon" in entry.device
-        ],
-    ),
-    ClassifyingRule(
-        "Eidon_UWF_Central_CFP",
-        conditions=[
-            lambda entry: "0-visible" in entry.filename.lower()
-            and "Eidon" in entry.device
-        ],
-    ),
-    ClassifyingRule(
-        "Eidon_UWF_Nasal_CFP",
-        conditions=[
-            lambda entry: "3-visible" in entry.filename.lower()
-            and "Eidon" in entry.device
-        ],
-    ),
-    ClassifyingRule(
-        "Eidon_UWF_Temporal_CFP",
-        conditions=[
-            lambda entry: "4-visible" in entry.filename.lower()
-            and "Eidon" in entry.device
-        ],
-    ),
-    ClassifyingRule(
-        "Eidon_UWF_Mosaic_CFP",
-        conditions=[
-            lambda entry: "11-visible" in entry.filename.lower()
-            and "Eidon" in entry.device
-        ],
-    ),
-    # maestro
-    ClassifyingRule(
-        "Maestro2_3D_Wide_OCT",
-        conditions=[
-            lambda entry: "3DOCT-1Maestro2" == entry.device
-            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
-            and str(entry.slicethickness).startswith("0.07")
-        ],
-    ),
-    ClassifyingRule(
-        "Maestro2_3D_Macula_OCT",
-        conditions=[
-            lambda entry: "3DOCT-1Maestro2" == entry.device
-            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
-            and str(entry.slicethickness).startswith("0.04")
-        ],
-    ),
-    ClassifyingRule(
-        "Maestro2_Mac_6x6-360x360_OCTA",
-        conditions=[
-            lambda entry: entry.device == "3DOCT-1Maestro2"
-            and "fo-dicom 4.0.8" == entry.implementationversion
-            and str(entry.slicethickness).startswith("0.01")
-            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
-            and entry.filename.endswith(".1.1.dcm")
-        ],
-    ),
-    # triton
-    ClassifyingRule(
-        "Triton_3D(H)_Radial_OCT",
-        conditions=[
-            lambda entry: "fo-dicom 4.0.8" == entry.implementationversion
-            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
-            and str(entry.slicethickness).startswith("0.03")
-            and "Triton plus" == entry.device
-        ],
-    ),
-    ClassifyingRule(
-        "Triton_Macula_6*6_OCTA",
-        conditions=[
-            lambda entry: entry.device == "Triton plus"
-            and str(entry.slicethickness).startswith("0.01")
-            and "fo-dicom 4.0.8" == entry.implementationversion
-            and entry.filename.endswith(".1.1.dcm")
-        ],
-    ),
-    ClassifyingRule(
-        "Triton_Macula_12*12_OCTA",
-        conditions=[
-            lambda entry: entry.device == "Triton plus"
-            and str(entry.slicethickness).startswith("0.02")
-            and "fo-dicom 4.0.8" == entry.implementationversion
-            and entry.filename.endswith(".1.1.dcm")
-        ],
-    ),
-    # #spectralis
-    ClassifyingRule(
-        "Spec_ONH_RC_HR_OCT",
-        conditions=[
-            lambda entry: entry.device == "Spectralis"
-            and (not isinstance(entry.framenumber, str))
-            and (26 <= int(entry.framenumber) <= 28)
-            and str(entry.rows) == "496"
-            and str(entry.columns) == "768"
-            and entry.slicethickness == ""
-        ],
-    ),
-    ClassifyingRule(
-        "Spec_ONH_RC_HR_OCT_reference_IR",
-        conditions=[
-            lambda entry: entry.device == "Spectralis"
-            and str(entry.rows) == "1536"
-            and str(entry.columns) == "1536"
-        ],
-    ),
-    ClassifyingRule(
-        "Spec_PPole_Mac_HR_OCT",
-        conditions=[
-            lambda entry: entry.device == "Spectralis"
-            and (not isinstance(entry.framenumber, str))
-            and (60 <= int(entry.framenumber) <= 62)
-            and str(entry.rows) == "496"
-            and str(entry.columns) == "768"
-        ],
-    ),
-    ClassifyingRule(
-        "Spec_PPole_Mac_HR_OCT_reference_IR",
-        conditions=[
-            lambda entry: entry.device == "Spectralis"
-            and str(entry.rows) == "768"
-            and str(entry.columns) == "768"
-            and str(entry.privatetag) == "N/A"
-            and str(entry.gaze) == "R-1022D"
-        ],
-    ),
-    ClassifyingRule(
-        "Spec-Mac-20x20-HS_OCTA_reference_Bscan",
-        conditions=[
-            lambda entry: entry.device == "Spectralis"
-            and (not isinstance(entry.framenumber, str))
-            and (511 <= int(entry.framenumber) <= 513)
-            and str(entry.rows) == "496"
-            and str(entry.columns) == "512"
-        ],
-    ),
-    ClassifyingRule(
-        "Spec-Mac-20x20-HS_OCTA_reference_IR",
-        conditions=[
-            lambda entry: entry.device == "Spectralis"
-            and str(entry.rows) == "768"
-            and str(entry.columns) == "768"
-            and str(entry.privatetag) == "Super Slim"
-        ],
-    )
-    # OCTA
-    # FLIO
-]
+rules = load_rules()
+
+
+class RuleEngine:
+    """Dispatches a DicomEntry to the rules that can match it.
+
+    Rules are bucketed by their (device, sopclassuid) keys, with None standing
+    for a rule that does not constrain that key. An entry is only checked
+    against the conditions of the rules in its four candidate buckets, in the
+    order the rules were given, so the first matching rule is the same as when
+    every rule is applied in turn.
+
+    When asked to report ambiguous entries, each combination of matching rules
+    is reported once, for the first entry it is seen on.
+    """
+
+    def __init__(self, rule_list):
+        self.rules = list(rule_list)
+        self._buckets = {}  # type: dict
+        # merged candidate list of every (device, sopclassuid) seen so far
+        self._candidates = {}  # type: dict
+        # names of the ambiguous rule combinations already reported
+        self._reported = set()  # type: set
+
+        for position, rule in enumerate(self.rules):
+            self._buckets.setdefault((rule.device, rule.sopclassuid), []).append(
+                (position, rule)
+            )
+
+    def candidates(self, dicom_entry):
+        """Return the rules whose keys match the entry, in rule order."""
+        key = (dicom_entry.device, dicom_entry.sopclassuid)
+        candidates = self._candidates.get(key)
+
+        if candidates is None:
+            device, sopclassuid = key
+            # dict.fromkeys drops the repeated keys of an entry with None values
+            bucket_keys = dict.fromkeys(
+                (
+                    (device, sopclassuid),
+                    (device, None),
+                    (None, sopclassuid),
+                    (None, None),
+                )
+            )
+            buckets = [self._buckets.get(bucket_key, []) for bucket_key in bucket_keys]
+            candidates = [
+                rule
+                for _, rule in sorted(item for bucket in buckets for item in bucket)
+            ]
+            self._candidates[key] = candidates
+
+        return candidates
+
+    def matches(self, dicom_entry):
+        """Return every rule matching the entry, in rule order."""
+        return [
+            rule
+            for rule in self.candidates(dicom_entry)
+            if rule.check_conditions(dicom_entry)
+        ]
+
+    def match(self, dicom_entry, report_ambiguous=False):
+        """Return the first rule matching the entry, or None.
+
+        Args:
+            dicom_entry (DicomEntry): The entry to classify.
+            report_ambiguous (bool): Check every candidate rule and print a
+                warning when more than one of them matches, once per
+                combination of matching rules.
+        """
+        if report_ambiguous:
+            matching_rules = self.matches(dicom_entry)
+            names = tuple(rule.name for rule in matching_rules)
+
+            if len(names) > 1 and names not in self._reported:
+                self._reported.add(names)
+                print(
+                    f"Warning: {dicom_entry.filename} matches several rules "
+                    f"({', '.join(names)}), "
+                    f"using {matching_rules[0].name}."
+                )
+
+            return matching_rules[0] if matching_rules else None
+
+        for rule in self.candidates(dicom_entry):
+            if rule.check_conditions(dicom_entry):
+                return rule
+
+        return None
+
+
+rule_engine = RuleEngine(rules)
 
 
 class DicomEntry:
+    """The values of a DICOM file used by the classifying rules.
+
+    Entries use __slots__ so that inventories of millions of files stay small;
+    use to_dict instead of vars.
+    """
+
+    __slots__ = (
+        "filename",
+        "patientid",
+        "sopclassuid",
+        "sopinstanceuid",
+        "laterality",
+        "rows",
+        "columns",
+        "device",
+        "framenumber",
+        "referencedsopinstance",
+        "slicethickness",
+        "implementationversion",
+        "gaze",
+        "privatetag",
+        "softwareversion",
+        "numberoffiles",
+    )
+
     def __init__(
         self,
         filename,
@@ -228,8 +331,21 @@ class DicomEntry:
         self.softwareversion = softwareversion
         self.numberoffiles = numberoffiles
 
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, type(self)):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
 
 class DicomSummary:
+    __slots__ = ("domain", "patientid", "laterality", "protocol")
+
     def __init__(
         self, domain, patientid, laterality, protocol
     ):  # sopinstance, matchingcfpifsopinstance
@@ -238,66 +354,195 @@ class DicomSummary:
         self.laterality = laterality  # laterality
         self.protocol = protocol  # belongs to which one in AIREADI checklist
 
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        if not isinstance(other, type(self)):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+# Elements read by extract_dicom_entry; everything else, including the pixel
+# data, is skipped when reading a file
+CLASSIFYING_TAGS = [
+    "SpecificCharacterSet",
+    "PatientID",
+    "SOPClassUID",
+    "SOPInstanceUID",
+    "Rows",
+    "Columns",
+    "ImageLaterality",
+    "ManufacturerModelName",
+    "SoftwareVersions",
+    "NumberOfFrames",
+    "FrameOfReferenceUID",
+    "PatientEyeMovementCommandCodeSequence",
+    "SharedFunctionalGroupsSequence",
+    "ReferencedSeriesSequence",
+    "SourceImageSequence",
+    0x00511017,
+]
+
+
+def read_dicom_header(file, tags=None):
+    """Read the header of a DICOM file without its pixel data.
+
+    Args:
+        file (str): The path to the DICOM file.
+        tags (list): Keywords or tags of the elements to read, defaults to
+            the elements used by the classifying rules.
+
+    Returns:
+        pydicom.Dataset: The dataset holding the file meta and requested elements.
+    """
+    return pydicom.dcmread(
+        file,
+        stop_before_pixels=True,
+        specific_tags=CLASSIFYING_TAGS if tags is None else tags,
+    )
+
+
+def _value(dataset, tag):
+    """Return the first value of an element the way to_json_dict reports it."""
+    element = dataset[tag]
+    value = element.value
+
+    if element.VR == "SQ" or isinstance(value, pydicom.multival.MultiValue):
+        value = value[0]
+
+    if element.VR == "DS":
+        return float(value)
+    if element.VR == "IS":
+        return int(value)
+
+    return value
 
-def extract_dicom_entry(file):
+
+class FolderFileCounts:
+    """Cache of the number of files in each folder.
+
+    A count is reused for as long as the mtime, ctime and link count of its
+    folder are unchanged, so classifying every file of a folder lists it only
+    once. On filesystems with coarse mtimes, such as NFS, a file added in the
+    same mtime tick as the listing leaves the stat unchanged, so counts of
+    folders modified within MTIME_WINDOW_NS of their listing are not kept.
+    """
+
+    # coarsest mtime granularity expected, 2 s on FAT and 1 s on NFS or ext3
+    MTIME_WINDOW_NS = 2_000_000_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}  # type: dict
+
+    def get(self, folder_path):
+        """Return the number of files, not folders, in a folder."""
+        folder_path = os.path.abspath(folder_path)
+        stat = os.stat(folder_path)
+        key = (stat.st_mtime_ns, stat.st_ctime_ns, stat.st_nlink)
+
+        cached = self._counts.get(folder_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        # listed after the stat, so that a change while listing is seen next time
+        listed_ns = time.time_ns()
+        with os.scandir(folder_path) as entries:
+            count = sum(1 for entry in entries if entry.is_file())
+
+        with self._lock:
+            if listed_ns - stat.st_mtime_ns >= self.MTIME_WINDOW_NS:
+                self._counts[folder_path] = (key, count)
+            else:
+                self._counts.pop(folder_path, None)
+
+        return count
+
+    def clear(self):
+        """Drop every cached count."""
+        with self._lock:
+            self._counts = {}
+
+
+folder_file_counts = FolderFileCounts()
+
+
+def extract_dicom_entry(file, filecount=None):
+    """Read the header of a DICOM file into a DicomEntry.
+
+    Args:
+        file (str): The path to the DICOM file.
+        filecount (int): The number of files in the folder of the file. When
+            classifying a batch from one folder the caller can pass it in,
+            otherwise it is looked up in folder_file_counts.
+
+    Returns:
+        DicomEntry: The values used by the classifying rules.
+    """
     if not os.path.exists(file):
         raise FileNotFoundError(f"File {file} not found.")
 
-    dicom = pydicom.dcmread(file).to_json_dict()
-    ds = pydicom.dcmread(file)
+    ds = read_dicom_header(file)
 
-    filename = os.path.basename(file)
-    patientid = dicom["00100020"]["Value"][0]
-    sopclassuid = dicom["00080016"]["Value"][0]
-    sopinstanceuid = dicom["00080018"]["Value"][0]
+    if filecount is None:
+        filecount = folder_file_counts.get(os.path.dirname(file) or ".")
+
+    return dicom_entry_from_dataset(ds, os.path.basename(file), filecount)
 
-    folder_path = os.path.dirname(file)
-    folder_files = os.listdir(folder_path)
-    filecount = len(
-        [f for f in folder_files if os.path.isfile(os.path.join(folder_path, f))]
-    )
+
+def dicom_entry_from_dataset(ds, filename, filecount):
+    """Build the DicomEntry of a dataset read with read_dicom_header.
+
+    Args:
+        ds (pydicom.Dataset): The header of the DICOM file.
+        filename (str): The name of the DICOM file.
+        filecount (int): The number of files in the folder of the DICOM file.
+
+    Returns:
+        DicomEntry: The values used by the classifying rules.
+    """
+    patientid = _value(ds, 0x00100020)
+    sopclassuid = _value(ds, 0x00080016)
+    sopinstanceuid = _value(ds, 0x00080018)
 
     # Fundus photo 2D
     if sopclassuid == "1.2.840.10008.5.1.4.1.1.77.1.5.1":
-        rows = dicom["00280010"]["Value"][0]
-        columns = dicom["00280011"]["Value"][0]
-        laterality = dicom["00200062"]["Value"][0]
+        rows = _value(ds, 0x00280010)
+        columns = _value(ds, 0x00280011)
+        laterality = _value(ds, 0x00200062)
         implementationversion = ds.file_meta.ImplementationVersionName
-        device = dicom["00081090"]["Value"][0]
-        softwareversion = dicom["00181020"]["Value"][0]
+        device = _value(ds, 0x00081090)
+        softwareversion = _value(ds, 0x00181020)
         numberoffiles = filecount
-        if "00511017" in dicom:
-            privatetag = dicom["00511017"]["Value"][0]
+        if 0x00511017 in ds:
+            privatetag = _value(ds, 0x00511017)
         else:
             privatetag = "N/A"
 
-        if "00220006" in dicom and "00080100" in dicom["00220006"]["Value"][0]:
-            gaze = dicom["00220006"]["Value"][0]["00080100"]["Value"][0]
+        if 0x00220006 in ds and 0x00080100 in _value(ds, 0x00220006):
+            gaze = _value(_value(ds, 0x00220006), 0x00080100)
         else:
             gaze = "N/A"
 
         framenumber = referencedsopinstance = slicethickness = "N/A"
     # B-Scan OCT
     elif sopclassuid == "1.2.840.10008.5.1.4.1.1.77.1.5.4":
-        rows = dicom["00280010"]["Value"][0]
-        columns = dicom["00280011"]["Value"][0]
-        laterality = dicom["00200062"]["Value"][0]
+        rows = _value(ds, 0x00280010)
+        columns = _value(ds, 0x00280011)
+        laterality = _value(ds, 0x00200062)
         implementationversion = ds.file_meta.ImplementationVersionName
-        device = dicom["00081090"]["Value"][0]
-        framenumber = dicom["00280008"]["Value"][0]
-        softwareversion = dicom["00181020"]["Value"][0]
+        device = _value(ds, 0x00081090)
+        framenumber = _value(ds, 0x00280008)
+        softwareversion = _value(ds, 0x00181020)
         numberoffiles = filecount
-        referencedsopinstance = dicom["52009229"]["Value"][0]["00081140"]["Value"][0][
-            "00081155"
-        ]["Value"][0]
-        if (
-            "52009229" in dicom
-            and "00289110" in dicom["52009229"]["Value"][0]
-            and "00180050" in dicom["52009229"]["Value"][0]["00289110"]["Value"][0]
-        ):
-            slicethickness = dicom["52009229"]["Value"][0]["00289110"]["Value"][0][
-                "00180050"
-            ]["Value"][0]
+        shared = _value(ds, 0x52009229)
+        referencedsopinstance = _value(_value(shared, 0x00081140), 0x00081155)
+        if 0x00289110 in shared and 0x00180050 in _value(shared, 0x00289110):
+            slicethickness = _value(_value(shared, 0x00289110), 0x00180050)
         else:
             slicethickness = ""
 
@@ -305,28 +550,25 @@ def extract_dicom_entry(file):
 
     # B-scan Volume Analysis Storage
     elif sopclassuid == "1.2.840.10008.5.1.4.1.1.77.1.5.8":
-        laterality = dicom["52009229"]["Value"][0]["00209071"]["Value"][0]["00209072"][
-            "Value"
-        ][0]
-        rows = dicom["00280010"]["Value"][0]
-        columns = dicom["00280011"]["Value"][0]
-        framenumber = dicom["00280008"]["Value"][0]
-        device = dicom["00081090"]["Value"][0]
+        shared = _value(ds, 0x52009229)
+        laterality = _value(_value(shared, 0x00209071), 0x00209072)
+        rows = _value(ds, 0x00280010)
+        columns = _value(ds, 0x00280011)
+        framenumber = _value(ds, 0x00280008)
+        device = _value(ds, 0x00081090)
         implementationversion = ds.file_meta.ImplementationVersionName
-        slicethickness = dicom["52009229"]["Value"][0]["00289110"]["Value"][0][
-            "00180050"
-        ]["Value"][0]
-        referencedsopinstance = dicom["00200052"]["Value"][0]
+        slicethickness = _value(_value(shared, 0x00289110), 0x00180050)
+        referencedsopinstance = _value(ds, 0x00200052)
         privatetag = softwareversion = gaze = "N/A"
         numberoffiles = filecount
 
     # segmentation
     elif sopclassuid == "1.2.840.10008.5.1.4.1.1.66.5":
-        laterality = dicom["00200062"]["Value"][0]
-        device = dicom["00081090"]["Value"][0]
-        referencedsopinstance = dicom["00081115"]["Value"][0]["0008114A"]["Value"][0][
-            "00081155"
-        ]["Value"][0]
+        laterality = _value(ds, 0x00200062)
+        device = _value(ds, 0x00081090)
+        referencedsopinstance = _value(
+            _value(_value(ds, 0x00081115), 0x0008114A), 0x00081155
+        )
         implementationversion = ds.file_meta.ImplementationVersionName
         numberoffiles = filecount
         rows = (
@@ -335,13 +577,13 @@ def extract_dicom_entry(file):
 
     # en face
     elif sopclassuid == "1.2.840.10008.5.1.4.1.1.77.1.5.7":  # en face
-        laterality = dicom["00200062"]["Value"][0]
-        rows = dicom["00280010"]["Value"][0]
-        columns = dicom["00280011"]["Value"][0]
+        laterality = _value(ds, 0x00200062)
+        rows = _value(ds, 0x00280010)
+        columns = _value(ds, 0x00280011)
         implementationversion = ds.file_meta.ImplementationVersionName
-        device = dicom["00081090"]["Value"][0]
+        device = _value(ds, 0x00081090)
         numberoffiles = filecount
-        referencedsopinstance = dicom["00082112"]["Value"][0]["00081155"]["Value"][0]
+        referencedsopinstance = _value(_value(ds, 0x00082112), 0x00081155)
         framenumber = slicethickness = privatetag = gaze = softwareversion = "N/A"
 
     # unknown
@@ -382,27 +624,27 @@ def extract_dicom_entry(file):
     return output
 
 
-def find_rule(file):
-    dicomentry = extract_dicom_entry(file)
-    matching_rules = [rule for rule in rules if rule.apply(dicomentry)]
-    if matching_rules:
-        for rule in matching_rules:
-            return str(rule.name)
-    else:
+def match_rule(dicomentry, report_ambiguous=True):
+    rule = rule_engine.match(dicomentry, report_ambiguous)
+    if rule is None:
         return "No rules apply."
+    return str(rule.name)
+
+
+def find_rule(file, filecount=None):
+    dicomentry = extract_dicom_entry(file, filecount)
+    return match_rule(dicomentry)
 
 
 ## Domain, Modality, Protocol, Patient ID, Laterlity, sopinstanceuid, referencedsopinstance
-def extract_dicom_summary(file):
-    dicomentry = extract_dicom_entry(file)
-    sopclassuid = dicomentry.sopclassuid
+def extract_dicom_summary(file, filecount=None):
+    # extract_dicom_entry raises InvalidDicomError for files that are not DICOM
+    return summarize_dicom_entry(extract_dicom_entry(file, filecount))
 
-    try:
-        dcm = pydicom.dcmread(file)
-        domain = "DICOM"
 
-    except pydicom.errors.InvalidDicomError:
-        domain = "NOT DICOM"
+def summarize_dicom_entry(dicomentry):
+    sopclassuid = dicomentry.sopclassuid
+    domain = "DICOM"
 
     if sopclassuid == "1.2.840.10008.5.1.4.1.1.77.1.5.1":
         modality = "CFP/IR/FAF"
@@ -424,18 +666,68 @@ def extract_dicom_summary(file):
     referencedsopinstance = dicomentry.referencedsopinstance
     softwareversion = dicomentry.softwareversion
     numberoffiles = dicomentry.numberoffiles
-    protocol = find_rule(file)
+    protocol = match_rule(dicomentry)
 
     output = DicomSummary(domain, patientid, laterality, protocol)
     return output
 
 
-def get_dicom_summary(file):
-    dicomsummary = extract_dicom_summary(file)
-    obj_dict = vars(dicomsummary)
+def get_dicom_summary(file, filecount=None):
+    dicomsummary = extract_dicom_summary(file, filecount)
+    obj_dict = dicomsummary.to_dict()
     return obj_dict
 
 
+# Columns returned by extract_dicom_columns
+DICOM_COLUMNS = ("file",) + DicomEntry.__slots__ + ("protocol", "error")
+
+
+def extract_dicom_columns(files):
+    """Classify many DICOM files into columns instead of one object per file.
+
+    Files that are not DICOM, cannot be read or lack required elements get None
+    values and the exception in the error column; other errors are raised. The
+    result can be passed as is to pandas.DataFrame to summarize an
+    inventory per patient, laterality or protocol. Fields such as rows or
+    framenumber hold "N/A" for the SOP classes without them, so they must be
+    cast to str before building a pyarrow table.
+
+    Args:
+        files (iterable): The paths to the DICOM files.
+
+    Returns:
+        dict: A list per name in DICOM_COLUMNS, all in the order of files.
+    """
+    columns = {name: [] for name in DICOM_COLUMNS}
+
+    for file in files:
+        try:
+            dicomentry = extract_dicom_entry(file)
+        except (
+            pydicom.errors.InvalidDicomError,
+            OSError,
+            AttributeError,
+            KeyError,
+            ValueError,
+        ) as e:
+            values = dict.fromkeys(DicomEntry.__slots__)
+            values["filename"] = os.path.basename(file)
+            protocol = None
+            error = f"{type(e).__name__}: {e}"
+        else:
+            values = dicomentry.to_dict()
+            protocol = match_rule(dicomentry)
+            error = ""
+
+        columns["file"].append(file)
+        for field, value in values.items():
+            columns[field].append(value)
+        columns["protocol"].append(protocol)
+        columns["error"].append(error)
+
+    return columns
+
+
 def list_files_recursive(directory):
     all_files = []
     for root, _, files in os.walk(directory):
@@ -445,35 +737,77 @@ def list_files_recursive(directory):
     return all_files
 
 
-def process_dicom_zip(zip_file_path):
+def find_dicom_member(names):
+    """Pick the DICOM file to classify among the members of a zip archive.
+
+    Args:
+        names (list): The member names, as returned by ZipFile.namelist().
+
+    Returns:
+        str: The member name, or None if the archive holds no usable DICOM file.
+    """
+    dicom_files = [
+        name for name in names if name.endswith(".dcm") and "/__" not in "/" + name
+    ]
+
+    if len(dicom_files) == 1:
+        return dicom_files[0]
+
+    for dicom_file in dicom_files:
+        if dicom_file.endswith(".1.1.dcm") and "/." not in "/" + dicom_file:
+            return dicom_file
+
+    return None
+
+
+def read_zip_dicom_summary(zip_ref, member):
+    """Summarize a DICOM member of a zip archive without extracting it.
+
+    Only the preamble and header of the member are read from the archive
+    stream, the pixel data is never decompressed.
+
+    Args:
+        zip_ref (zipfile.ZipFile): The open zip archive.
+        member (str): The name of the DICOM member.
+
+    Returns:
+        dict: The DicomSummary of the member as a dictionary.
+    """
+    folder = posixpath.dirname(member)
+    filecount = len(
+        [
+            name
+            for name in zip_ref.namelist()
+            if not name.endswith("/") and posixpath.dirname(name) == folder
+        ]
+    )
+
+    with zip_ref.open(member) as stream:
+        ds = read_dicom_header(stream)
+
+    dicomentry = dicom_entry_from_dataset(ds, posixpath.basename(member), filecount)
+
+    return summarize_dicom_entry(dicomentry).to_dict()
+
+
+def process_dicom_zip(zip_file_path, raise_errors=False):
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
-                zip_ref.extractall(temp_dir)
-            extracted_files = list_files_recursive(temp_dir)
+        with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
+            member = find_dicom_member(zip_ref.namelist())
 
-            dicom_files = [
-                f for f in extracted_files if f.endswith(".dcm") and "/__" not in f
-            ]
+            if member is None:
+                if raise_errors:
+                    raise ValueError("No DICOM file present in the zip archive.")
 
-            if len(dicom_files) == 1:
-                dicom_file_path = os.path.join(temp_dir, dicom_files[0])
-                dicom = get_dicom_summary(dicom_file_path)
-                return dicom
-
-            elif len(dicom_files) > 1:
-                for dicom_file in dicom_files:
-                    if dicom_file.endswith(".1.1.dcm") and "/." not in dicom_file:
-                        dicom_file_path = os.path.join(temp_dir, dicom_file)
-                        dicom = get_dicom_summary(dicom_file_path)
-                        return dicom
-            else:
                 print("Error: no DICOM file present in the zip archive.")
+                return None
+
+            return read_zip_dicom_summary(zip_ref, member)
 
     except Exception as e:
+        if raise_errors:
+            raise e
         print(f"An error occurred: {str(e)}")
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
     return None
 
 
@@ -518,7 +852,7 @@ def process_flio_zip(file_path):
     return info_dict
 
 
-def process_ecg_zip(zip_file_path):
+def process_ecg_zip(zip_file_path, raise_errors=False):
     try:
         with tempfile.TemporaryDirectory() as temp_dir:
             with zipfile.ZipFile(zip_file_path, "r") as zip_ref:
@@ -546,6 +880,8 @@ def process_ecg_zip(zip_file_path):
             return key_items
 
     except Exception as e:
+        if raise_errors:
+            raise e
         print(f"An error occurred: {str(e)}")
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,137 @@
+import json
+import os
+
+
+class ConversionCache:
+    """
+    Remembers the source and rules each output was converted from, to skip unchanged ones.
+
+    An output is current when its recorded source key and rules fingerprint match
+    and the file still has the size and modification time recorded after it was
+    written. Records are appended to a JSON Lines file, so that every conversion
+    finished before a crash is remembered, and the last record of an output wins.
+
+    Attributes:
+        path (str): The path to the JSON Lines file of the records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._records = None
+
+    @property
+    def records(self):
+        """dict: Absolute output path to its record, read on first use."""
+        if self._records is None:
+            self._records = {}
+            lines = 0
+
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        lines += 1
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # the line being appended when a run was killed
+                            continue
+                        self._records[record["output"]] = record
+            except FileNotFoundError:
+                pass
+
+            if lines > 2 * len(self._records) + 1000:
+                self.compact()
+
+        return self._records
+
+    def is_current(self, output, source_key, fingerprint):
+        """
+        Tell whether output was converted from source_key with the rules and is intact.
+
+        Args:
+            output (str): The path to the output file.
+            source_key (str): The content key of the input, see zip_member_key.
+            fingerprint (str): The fingerprint of the rules the output is wanted
+                with, such as conversion_rules.fingerprint.
+
+        Returns:
+            bool: True when the conversion can be skipped.
+        """
+        record = self.records.get(os.path.abspath(output))
+
+        if (
+            record is None
+            or record["source"] != source_key
+            or record["rule"] != fingerprint
+        ):
+            return False
+
+        try:
+            stat = os.stat(output)
+        except OSError:
+            return False
+
+        return record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns
+
+    def record(self, output, source_key, fingerprint):
+        """
+        Remember that output was just converted from source_key with the rules.
+
+        Args:
+            output (str): The path to the output file.
+            source_key (str): The content key of the input, see zip_member_key.
+            fingerprint (str): The fingerprint of the rules the output was
+                converted with.
+        """
+        stat = os.stat(output)
+        record = {
+            "output": os.path.abspath(output),
+            "source": source_key,
+            "rule": fingerprint,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        self.records[record["output"]] = record
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def compact(self):
+        """Rewrite the records file with one record per output."""
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record) + "\n")
+
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        """Forget every record and remove the records file."""
+        self._records = {}
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ConversionCache of each records file used by this process, so that repeated
+# conversions do not reread it
+_conversion_caches = {}  # type: dict
+
+
+def get_conversion_cache(path):
+    """
+    Return the ConversionCache of a records file, shared within this process.
+
+    Args:
+        path (str): The path to the JSON Lines file of the records.
+
+    Returns:
+        ConversionCache: The cache.
+    """
+    path = os.path.abspath(path)
+
+    if path not in _conversion_caches:
+        _conversion_caches[path] = ConversionCache(path)
+
+    return _conversion_caches[path]
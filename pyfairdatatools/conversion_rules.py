@@ -0,0 +1,361 @@
+import hashlib
+import json
+import os
+
+import pydicom
+import yaml
+
+KEEP = 0
+BLANK = 1
+HARMONIZE = 2
+
+# Decisions as they are written in conversion rule files
+DECISIONS = {"keep": KEEP, "blank": BLANK, "harmonize": HARMONIZE}
+
+CONVERSION_RULES_PATH = os.path.join(
+    os.path.dirname(__file__), "assets", "conversion_rules.yaml"
+)
+
+
+class ConversionRule:
+    """
+    Represents a conversion rule for processing data.
+
+    This class defines a rule used for data conversion and processing. It contains attributes
+    such as the rule's name, header elements, individual elements, and sequences of elements.
+
+    Attributes:
+        name (str): The name of the conversion rule.
+        header_elements (list): List of Element instances representing header elements.
+        elements (list): List of Element instances representing individual elements.
+        sequences (list): List of Sequence instances representing sequences of elements.
+        sop_class_uids (list): The SOP classes of the files this rule converts.
+
+    Methods:
+        header_tags(): Extracts unique tags from header elements.
+        tags(): Extracts unique tags from individual elements.
+        sequence_tags(): Generates a dictionary of sequence tags and associated element tags.
+
+    """
+
+    def __init__(self, name, headers, elements, sequences, sop_class_uids=None):
+        self.name = name
+        self.header_elements = headers
+        self.elements = elements
+        self.sequences = sequences
+        self.sop_class_uids = sop_class_uids if sop_class_uids is not None else []
+        self._compiled = None
+
+    @classmethod
+    def from_spec(cls, spec):
+        """
+        Build a rule from its definition in a conversion rule file.
+
+        Elements are named by DICOM keyword, from which their tag and VR are looked
+        up, and given a decision of "keep", "blank" or ["harmonize", value].
+
+        Args:
+            spec (dict): The rule name, sopclassuids, headers, elements and sequences.
+
+        Returns:
+            ConversionRule: The rule.
+        """
+
+        def element(keyword, decision="keep"):
+            tag = pydicom.datadict.tag_for_keyword(keyword)
+            harmonized_value = 0
+
+            if isinstance(decision, list):
+                decision, harmonized_value = decision
+
+            if tag is None or decision not in DECISIONS:
+                print(f"Invalid element {keyword} in rule {spec.get('name')}.")
+                raise ValueError("Invalid rule element")
+
+            return Element(
+                keyword,
+                f"{tag:08X}",
+                pydicom.datadict.dictionary_VR(tag),
+                DECISIONS[decision],
+                harmonized_value,
+            )
+
+        sequences = []
+        for keyword, items in spec.get("sequences", {}).items():
+            sequence = element(keyword)
+            sequences.append(
+                ElementList(
+                    sequence.name,
+                    sequence.tag,
+                    sequence.vr,
+                    [element(name, decision) for name, decision in items.items()],
+                )
+            )
+
+        return cls(
+            spec["name"],
+            headers=[element(keyword) for keyword in spec.get("headers", [])],
+            elements=[
+                element(keyword, decision)
+                for keyword, decision in spec.get("elements", {}).items()
+            ],
+            sequences=sequences,
+            sop_class_uids=[str(uid) for uid in spec.get("sopclassuids", [])],
+        )
+
+    def compile(self):
+        """
+        Return the lookup tables of this rule, built on first use and then reused.
+
+        Returns:
+            CompiledConversionRule: The compiled form of this rule.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledConversionRule(self)
+
+        return self._compiled
+
+    def header_tags(self):
+        headertags = set()
+        for header_element in self.header_elements:
+            headertags.add(header_element.tag)
+
+        return list(headertags)
+
+    def tags(self):
+        tags = set()
+        for element in self.elements:
+            tags.add(element.tag)
+
+        return list(tags)
+
+    def sequence_tags(self):
+        tags_dict = {}
+        for sequence in self.sequences:
+            element_tags = [element.tag for element in sequence.elements]
+            tags_dict[sequence.tag] = element_tags
+
+        return tags_dict
+
+
+class CompiledConversionRule:
+    """
+    Lookup tables of a ConversionRule, so that converting a file needs no tag searches.
+
+    Every table maps a tag to its keyword, decision and harmonized value. When a tag
+    is defined more than once, the last definition wins, as it always has in
+    write_dicom.
+
+    Attributes:
+        name (str): The name of the conversion rule.
+        header_keywords (dict): Header element tag to keyword.
+        elements (dict): Element tag to a (keyword, decision, harmonized_value) tuple.
+        sequences (dict): Sequence tag to a (keyword, elements) tuple, where elements
+            is a table like the one above for the elements of the sequence item.
+        tags (list): Every header, element and sequence tag, to extract from a file.
+        fingerprint (str): Digest of the tables, which changes whenever a tag,
+            decision or harmonized value of the rule changes.
+    """
+
+    def __init__(self, rule):
+        keyword_for_tag = pydicom.datadict.keyword_for_tag
+
+        self.name = rule.name
+        self.header_keywords = {
+            element.tag: keyword_for_tag(element.tag)
+            for element in rule.header_elements
+        }
+        self.elements = {
+            element.tag: (
+                keyword_for_tag(element.tag),
+                element.decision,
+                element.harmonized_value,
+            )
+            for element in rule.elements
+        }
+        self.sequences = {
+            sequence.tag: (
+                keyword_for_tag(sequence.tag),
+                {
+                    element.tag: (
+                        keyword_for_tag(element.tag),
+                        element.decision,
+                        element.harmonized_value,
+                    )
+                    for element in sequence.elements
+                },
+            )
+            for sequence in rule.sequences
+        }
+        self.tags = (
+            list(self.header_keywords) + list(self.elements) + list(self.sequences)
+        )
+        self.fingerprint = hashlib.sha1(
+            repr(
+                (
+                    self.name,
+                    sorted(self.header_keywords.items()),
+                    sorted(self.elements.items()),
+                    sorted(
+                        (tag, keyword, sorted(elements.items()))
+                        for tag, (keyword, elements) in self.sequences.items()
+                    ),
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+
+
+class Element:
+    """
+    Represents an individual data element.
+
+    This class defines an individual data element with attributes such as its name, tag,
+    value representation (vr), decision, and harmonized value.
+
+    Attributes:
+        name (str): The name of the data element.
+        tag (str): The tag associated with the data element.
+        vr (str): The value representation of the data element.
+        decision (int): The decision related to the data element (default is 0).
+        harmonized_value (int): The harmonized value of the data element (default is 0).
+    """
+
+    def __init__(self, name, tag, vr, decision=0, harmonized_value=0):
+        self.name = name
+        self.tag = tag
+        self.vr = vr
+        self.decision = decision
+        self.harmonized_value = harmonized_value
+
+
+class ElementList:
+    """
+    Represents a list of related data elements.
+
+    This class defines a list of related data elements with attributes such as its name,
+    tag, value representation (vr), and the list of elements.
+
+    Attributes:
+        name (str): The name of the element list.
+        tag (str): The tag associated with the element list.
+        vr (str): The value representation of the element list.
+        elements (list): List of Element instances representing the data elements in the list (default is an empty list).
+    """
+
+    def __init__(self, name, tag, vr, elements=None):
+        self.name = name
+        self.tag = tag
+        self.vr = vr
+        self.elements = elements if elements is not None else []
+
+
+def load_conversion_rules(file_path=CONVERSION_RULES_PATH):
+    """
+    Load the conversion rules of a YAML or JSON rule file.
+
+    Args:
+        file_path (str): The path to the rule file.
+
+    Returns:
+        list: The ConversionRule instances, in file order.
+    """
+    with open(file_path, encoding="utf-8") as f:
+        if file_path.endswith(".json"):
+            specs = json.load(f)["rules"]
+        else:
+            specs = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))[
+                "rules"
+            ]
+
+    return [ConversionRule.from_spec(spec) for spec in specs]
+
+
+class ConversionRuleRegistry:
+    """
+    Conversion rules by SOP class, compiled once when they are registered.
+
+    Attributes:
+        default (ConversionRule): The rule of the SOP classes without one, or None.
+        fingerprint (str): Digest of the fingerprints of every registered rule.
+    """
+
+    def __init__(self, rule_list=(), default=None):
+        self.default = default
+        self._rules = {}
+        self.fingerprint = ""
+
+        for rule in rule_list:
+            self.register(rule)
+
+    def register(self, rule):
+        """
+        Compile a rule and make it the rule of its SOP classes.
+
+        Args:
+            rule (ConversionRule): The rule to register.
+        """
+        for sop_class_uid in rule.sop_class_uids:
+            registered = self._rules.get(sop_class_uid)
+            if registered is not None and registered is not rule:
+                print(
+                    f"SOP class {sop_class_uid} of rule {rule.name} already belongs "
+                    f"to rule {registered.name}."
+                )
+                raise ValueError("Duplicate conversion rule")
+
+        rule.compile()
+        for sop_class_uid in rule.sop_class_uids:
+            self._rules[sop_class_uid] = rule
+
+        self._update_fingerprint()
+
+    def rule_for(self, sop_class_uid):
+        """
+        Return the rule of a SOP class.
+
+        Args:
+            sop_class_uid (str): The SOPClassUID of a file.
+
+        Returns:
+            ConversionRule: The registered rule, or the default rule.
+        """
+        return self._rules.get(str(sop_class_uid), self.default)
+
+    def match(self, dataset):
+        """
+        Return the rule of a dataset, raising ValueError when there is none.
+
+        Args:
+            dataset (pydicom.Dataset): The source dataset.
+
+        Returns:
+            ConversionRule: The rule to convert the dataset with.
+        """
+        sop_class_uid = dataset.get("SOPClassUID", "")
+        rule = self.rule_for(sop_class_uid)
+
+        if rule is None:
+            print(f"No conversion rule for SOP class {sop_class_uid}.")
+            raise ValueError("No conversion rule")
+
+        return rule
+
+    def rules(self):
+        """Return the registered rules, each once."""
+        return list({id(rule): rule for rule in self._rules.values()}.values())
+
+    def clear(self):
+        """Unregister every rule."""
+        self._rules.clear()
+        self._update_fingerprint()
+
+    def _update_fingerprint(self):
+        digest = hashlib.sha1()
+        rules = sorted(self._rules.items())
+        if self.default is not None:
+            rules.append(("", self.default))
+
+        for sop_class_uid, rule in rules:
+            digest.update(f"{sop_class_uid}={rule.compile().fingerprint};".encode())
+
+        self.fingerprint = digest.hexdigest()
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from typing import Optional
+
+import yaml
+
+from . import utils
+
+DATATYPE_DICTIONARY_PATH = os.path.join(
+    os.path.dirname(__file__), "assets", "datatype_dictionary.yaml"
+)
+
+
+class DatatypeDictionary:
+    """Cached datatype dictionary with an index of code names and aliases.
+
+    The YAML file in the assets folder is parsed once and every code_name and
+    alias is mapped to its canonical entry. The parsed entries are also saved
+    as JSON in the cache folder so later processes skip the YAML parse; the
+    JSON copy is only used for the YAML file it was made from, with the same
+    size and mtime.
+    """
+
+    def __init__(self, file_path=DATATYPE_DICTIONARY_PATH, cache_path=None):
+        self.file_path = file_path
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries = None  # type: Optional[list]
+        self._index = {}  # type: dict
+
+    @property
+    def json_cache_path(self):
+        """Return the path of the JSON copy of the dictionary."""
+        return self.cache_path or os.path.join(
+            utils.default_cache_dir(), "datatype_dictionary.json"
+        )
+
+    def _source(self):
+        """Return the fields that identify the YAML file a JSON copy was made from."""
+        stat = os.stat(self.file_path)
+
+        return {
+            "source_path": os.path.abspath(self.file_path),
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _read_json_cache(self, source):
+        try:
+            with open(self.json_cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if any(cached.get(key) != value for key, value in source.items()):
+            return None
+
+        return cached["datatype_dictionary"]
+
+    @staticmethod
+    def _write_json(file_path, source, entries):
+        # written whole and renamed, as worker processes may load at once
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({**source, "datatype_dictionary": entries}, f)
+
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def dump(self, file_path):
+        """Save the parsed dictionary as JSON.
+
+        Args:
+            file_path (str): The path to the JSON file to create
+        """
+        self._write_json(file_path, self._source(), self.entries)
+
+    def _load(self):
+        source = self._source()
+        entries = self._read_json_cache(source)
+
+        if entries is None:
+            with open(self.file_path, encoding="utf-8") as f:
+                entries = yaml.safe_load(f)["datatype_dictionary"]
+
+            try:
+                os.makedirs(os.path.dirname(self.json_cache_path), exist_ok=True)
+                self._write_json(self.json_cache_path, source, entries)
+            except OSError:
+                # the JSON copy is only an optimization
+                pass
+
+        index = {}  # type: dict
+        for entry in entries:
+            index.setdefault(entry["code_name"], entry)
+            for alias in entry.get("aliases") or []:
+                index.setdefault(alias, entry)
+
+        self._index = index
+        self._entries = entries
+
+    def _ensure_loaded(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._load()
+
+    @property
+    def entries(self):
+        """Return the list of datatype dictionary entries."""
+        self._ensure_loaded()
+
+        return self._entries
+
+    @property
+    def index(self):
+        """Return the mapping of every code_name and alias to its entry."""
+        self._ensure_loaded()
+
+        return self._index
+
+    def get(self, name):
+        """Return the entry for a code_name or alias, or None if it is unknown."""
+        return self.index.get(name) if isinstance(name, str) else None
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def clear(self):
+        """Drop the loaded entries and index."""
+        with self._lock:
+            self._entries = None
+            self._index = {}
+
+
+datatype_dictionary = DatatypeDictionary()
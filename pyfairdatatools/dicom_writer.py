@@ -0,0 +1,135 @@
+import os
+import time
+
+import pydicom
+
+# Buffer of the stream a DicomWriter writes through, large enough that network
+# storage sees few, large writes
+WRITER_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+class DicomWriter:
+    """
+    Writes DICOM files atomically, so that a path is either absent or complete.
+
+    Every file is written through a large buffer to a temporary file in the folder
+    of its path, which is then renamed over the path. With fsync_every set, the
+    temporary files are flushed to disk before they are renamed, and a batch of
+    fsync_every files is renamed at once, followed by a single fsync of each of
+    their folders. Files of an unfinished batch only appear once it is flushed.
+
+    Attributes:
+        buffer_size (int): Size of the write buffer in bytes.
+        fsync_every (int): Number of files per fsync batch, 0 to never fsync.
+        files (int): Number of files written.
+        bytes (int): Number of bytes written.
+        seconds (float): Time spent writing and flushing.
+    """
+
+    def __init__(self, buffer_size=WRITER_BUFFER_SIZE, fsync_every=0):
+        self.buffer_size = buffer_size
+        self.fsync_every = fsync_every
+        self._pending = []
+        self.clear()
+
+    def write(self, dataset, file_path, append=None):
+        """
+        Write a dataset to file_path.
+
+        Args:
+            dataset (pydicom.Dataset): The dataset to write.
+            file_path (str): The path to the DICOM file to be created.
+            append (callable): Called with the open file after the dataset is
+                written, to write elements that are not in the dataset.
+
+        Returns:
+            int: The size of the file in bytes.
+        """
+        start = time.perf_counter()
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+
+        try:
+            with open(temp_path, "wb", buffering=self.buffer_size) as fp:
+                pydicom.filewriter.write_file(fp, dataset, write_like_original=False)
+                if append is not None:
+                    append(fp)
+                fp.flush()
+                size = fp.tell()
+                if self.fsync_every:
+                    os.fsync(fp.fileno())
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.files += 1
+        self.bytes += size
+        self._pending.append((temp_path, file_path))
+        self.seconds += time.perf_counter() - start
+
+        if len(self._pending) >= max(self.fsync_every, 1):
+            self.flush()
+
+        return size
+
+    def flush(self):
+        """Rename the pending files over their paths and fsync their folders."""
+        start = time.perf_counter()
+        pending, self._pending = self._pending, []
+
+        try:
+            for temp_path, file_path in pending:
+                os.replace(temp_path, file_path)
+
+            if self.fsync_every and os.name == "posix":
+                for folder in {os.path.dirname(path) or "." for _, path in pending}:
+                    fd = os.open(folder, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+        finally:
+            for temp_path, _ in pending:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self.seconds += time.perf_counter() - start
+
+    def clear(self):
+        """Reset the throughput counters."""
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def files_per_second(self):
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def stats(self):
+        """
+        Return the throughput counters.
+
+        Returns:
+            dict: The files, bytes and seconds written, files_per_second and
+                bytes_per_second.
+        """
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "seconds": self.seconds,
+            "files_per_second": self.files_per_second,
+            "bytes_per_second": self.bytes_per_second,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+# Writer of the batch conversions, renaming every file once it is written
+dicom_writer = DicomWriter()
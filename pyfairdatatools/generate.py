@@ -8,6 +8,8 @@ import dicttoxml
 import yaml
 import requests
 from . import utils, validate
+from .datatypes import datatype_dictionary
+from .licenses import license_registry, license_text_store
 
 
 def generate_dataset_description(data, file_path, file_type):
@@ -674,41 +676,34 @@ def generate_license_file(
                 raise error
         # if data is not provided, use identifier
         else:
-            with open(
-                path.join(path.dirname(__file__), "assets", "licenses.json"),
-                encoding="utf-8",
-            ) as f:
-                list_of_licenses = json.load(f)["licenses"]
-
-                license_text = ""
-                for item in list_of_licenses:
-                    if "licenseId" in item and item["licenseId"] == identifier:
-                        if "detailsUrl" in item:
-                            try:
-                                response = utils.requestJSON(item["detailsUrl"])
-
-                                if "licenseText" in response:
-                                    license_text = response["licenseText"]
-                                else:
-                                    print("Could not get text for license.")
-                                    raise NotImplementedError(
-                                        "License text not available"
-                                    )
-
-                                with open(file_path, "w", encoding="utf8") as f:
-                                    f.write(license_text)
-                                    print("License file generated.")
-
-                                return
-
-                            except Exception as error:
-                                print(error)
-                                raise error
-
-                        else:
+            item = license_registry.get(identifier)
+
+            license_text = ""
+            if item is not None:
+                if "detailsUrl" in item:
+                    try:
+                        license_text = license_text_store.get(
+                            identifier, item["detailsUrl"]
+                        )
+
+                        if license_text is None:
                             print("Could not get text for license.")
                             raise NotImplementedError("License text not available")
 
+                        with open(file_path, "w", encoding="utf8") as f:
+                            f.write(license_text)
+                            print("License file generated.")
+
+                        return
+
+                    except Exception as error:
+                        print(error)
+                        raise error
+
+                else:
+                    print("Could not get text for license.")
+                    raise NotImplementedError("License text not available")
+
 
 def generate_datatype_file(data, file_path, file_type):
     """Generate a datatype file.
@@ -741,28 +736,22 @@ def generate_datatype_file(data, file_path, file_type):
         # Create the datatype file before generating the datatype description file
         datatype_data: Dict[str, List[Dict[str, Any]]] = {"datatype_dictionary": []}
 
-        with open(
-            path.join(path.dirname(__file__), "assets", "datatype_dictionary.yaml"),
-            encoding="utf-8",
-        ) as f:
-            schema = yaml.safe_load(f)
-
         for entry in data:
-            for item in schema["datatype_dictionary"]:
-                if entry == item["code_name"] or entry in item["aliases"]:
-                    print(item)
-                    new_item = {}
-                    if "code_name" in item:
-                        new_item["code_name"] = item["code_name"]
-                    if "datatype_description" in item:
-                        new_item["datatype_description"] = item["datatype_description"]
-                    if "aliases" in item:
-                        new_item["aliases"] = item["aliases"]
-                    if "related_terms" in item:
-                        new_item["related_terms"] = item["related_terms"]
-                    if "related_standards" in item:
-                        new_item["related_standards"] = item["related_standards"]
-                    datatype_data["datatype_dictionary"].append(new_item)
+            item = datatype_dictionary.get(entry)
+            if item is not None:
+                print(item)
+                new_item = {}
+                if "code_name" in item:
+                    new_item["code_name"] = item["code_name"]
+                if "datatype_description" in item:
+                    new_item["datatype_description"] = item["datatype_description"]
+                if "aliases" in item:
+                    new_item["aliases"] = item["aliases"]
+                if "related_terms" in item:
+                    new_item["related_terms"] = item["related_terms"]
+                if "related_standards" in item:
+                    new_item["related_standards"] = item["related_standards"]
+                datatype_data["datatype_dictionary"].append(new_item)
 
         if file_type == "yaml":
             try:
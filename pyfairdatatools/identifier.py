@@ -1,3 +1,9 @@
+import csv
+import glob
+import json
+import multiprocessing
+import os
+
 from classifying_rules import (
     process_dicom_zip,
     process_ecg_zip,
@@ -6,7 +12,7 @@ from classifying_rules import (
 )
 
 
-def data_identifier(zip_file_path):
+def data_identifier(zip_file_path, raise_errors=False):
     if not zip_file_path.endswith(".zip"):
         return "Not a zip file"
 
@@ -14,7 +20,7 @@ def data_identifier(zip_file_path):
         return process_env_zip(zip_file_path)
 
     elif "xml" in zip_file_path:
-        return process_ecg_zip(zip_file_path)
+        return process_ecg_zip(zip_file_path, raise_errors)
 
     elif "FLIO" in zip_file_path:
         return process_flio_zip(zip_file_path)
@@ -30,7 +36,135 @@ def data_identifier(zip_file_path):
             "Spectralis",
         ]
     ):
-        return process_dicom_zip(zip_file_path)
+        return process_dicom_zip(zip_file_path, raise_errors)
 
     else:
         return "Unknown file type"
+
+
+MANIFEST_FIELDS = [
+    "file",
+    "status",
+    "error",
+    "domain",
+    "patient_id",
+    "laterality",
+    "protocol",
+    "sensor_id",
+    "docname",
+    "pos",
+]
+
+
+def list_zip_files(source):
+    """List the zip files to classify.
+
+    Args:
+        source (str or list): A folder, searched recursively for .zip files, a
+            glob pattern, or a list of paths.
+
+    Returns:
+        list: The sorted zip file paths.
+    """
+    if not isinstance(source, str):
+        return list(source)
+
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(root, file_name)
+            for root, _, files in os.walk(source)
+            for file_name in files
+            if file_name.endswith(".zip")
+        )
+
+    return sorted(glob.glob(source, recursive=True))
+
+
+def identify_zip(zip_file_path):
+    """Classify one zip file into a manifest row, capturing any failure.
+
+    Args:
+        zip_file_path (str): The path to the zip file.
+
+    Returns:
+        dict: The manifest row, with status "ok", "skipped" or "error".
+    """
+    row = {"file": zip_file_path, "status": "ok", "error": ""}
+
+    try:
+        result = data_identifier(zip_file_path, raise_errors=True)
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+        return row
+
+    if isinstance(result, str):
+        row.update(status="skipped", error=result)
+    elif result is None:
+        row.update(status="error", error="No result returned.")
+    else:
+        for key, value in result.items():
+            # the DICOM and ECG summaries spell it patientid
+            row["patient_id" if key == "patientid" else key] = value
+
+    return row
+
+
+def _iter_identify_many(zip_files, workers, chunksize):
+    if workers <= 1:
+        yield from map(identify_zip, zip_files)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(identify_zip, zip_files, chunksize)
+
+
+def identify_many(source, output, workers=None, chunksize=8, manifest_format=None):
+    """Classify many zip files and write a single manifest of the results.
+
+    Each zip file is classified independently across a pool of worker
+    processes. Files that cannot be classified are written as error rows
+    instead of stopping the run.
+
+    Args:
+        source (str or list): A folder, a glob pattern or a list of zip files.
+        output (str): The path to the manifest file.
+        workers (int): Number of worker processes, defaults to the CPU count.
+            With 1 worker the files are classified in the current process.
+        chunksize (int): Number of files sent to a worker at a time.
+        manifest_format (str): Either "tsv" or "jsonl", defaults to "jsonl"
+            for a .jsonl output and "tsv" otherwise.
+
+    Returns:
+        dict: The number of rows written for each status.
+    """
+    if manifest_format is None:
+        manifest_format = "jsonl" if output.endswith(".jsonl") else "tsv"
+
+    if manifest_format not in ("tsv", "jsonl"):
+        print("Manifest format is invalid.")
+        raise ValueError("Invalid manifest format")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    zip_files = list_zip_files(source)
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        if manifest_format == "tsv":
+            writer = csv.DictWriter(
+                f, fieldnames=MANIFEST_FIELDS, delimiter="\t", restval=""
+            )
+            writer.writeheader()
+
+        for row in _iter_identify_many(zip_files, workers, chunksize):
+            counts[row["status"]] += 1
+
+            if manifest_format == "tsv":
+                writer.writerow(
+                    {field: row.get(field, "") for field in MANIFEST_FIELDS}
+                )
+            else:
+                f.write(json.dumps(row, default=str) + "\n")
+
+    return counts
@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Optional
+
+from . import utils
+
+LICENSES_PATH = os.path.join(os.path.dirname(__file__), "assets", "licenses.json")
+
+
+class LicenseRegistry:
+    """Lazily loaded, indexed view of the SPDX license list.
+
+    The license list in the assets folder is parsed on first use and each index
+    (by licenseId, name and reference URL) is built the first time it is needed.
+    """
+
+    def __init__(self, file_path=LICENSES_PATH):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._licenses = None  # type: Optional[list]
+        self._indexes = {}  # type: dict
+
+    @property
+    def licenses(self):
+        """Return the list of license entries."""
+        if self._licenses is None:
+            with self._lock:
+                if self._licenses is None:
+                    with open(self.file_path, encoding="utf-8") as f:
+                        self._licenses = json.load(f)["licenses"]
+
+        return self._licenses
+
+    def _index(self, field):
+        index = self._indexes.get(field)
+
+        if index is None:
+            index = {}
+
+            # non-deprecated entries win when a value is shared
+            for item in sorted(
+                self.licenses, key=lambda item: bool(item.get("isDeprecatedLicenseId"))
+            ):
+                if field in item:
+                    index.setdefault(item[field], item)
+
+            self._indexes[field] = index
+
+        return index
+
+    def get(self, identifier):
+        """Return the license entry for a licenseId, or None if it is unknown."""
+        return self._index("licenseId").get(identifier)
+
+    def get_by_name(self, name):
+        """Return the license entry for a license name, or None if it is unknown."""
+        return self._index("name").get(name)
+
+    def get_by_reference(self, reference):
+        """Return the license entry for an SPDX reference URL, or None."""
+        return self._index("reference").get(reference)
+
+    def is_deprecated(self, identifier):
+        """Check if a licenseId is marked as deprecated in the SPDX list."""
+        item = self.get(identifier)
+
+        return item is not None and bool(item.get("isDeprecatedLicenseId"))
+
+    def __contains__(self, identifier):
+        return isinstance(identifier, str) and self.get(identifier) is not None
+
+    def clear(self):
+        """Drop the loaded license list and every index."""
+        with self._lock:
+            self._licenses = None
+            self._indexes = {}
+
+
+license_registry = LicenseRegistry()
+
+
+BUNDLED_TEXTS_PATH = os.path.join(
+    os.path.dirname(__file__), "assets", "license_texts.json"
+)
+
+
+class LicenseTextStore:
+    """Local store of SPDX license texts.
+
+    Texts are looked up in memory, then in an optional bundled snapshot (a JSON
+    object of licenseId to text), then in an SQLite file in the cache folder.
+    Only when all of these miss is the text fetched from the license detailsUrl,
+    after which it is saved to the SQLite file for the next run.
+    """
+
+    def __init__(self, cache_dir=None, bundle_path=BUNDLED_TEXTS_PATH, offline=False):
+        self.cache_dir = cache_dir
+        self.bundle_path = bundle_path
+        self.offline = offline
+        self._texts = {}  # type: dict
+        self._bundle = None  # type: Optional[dict]
+        self._lock = threading.Lock()
+
+    @property
+    def database_path(self):
+        """Return the path of the SQLite file holding fetched texts."""
+        return os.path.join(
+            self.cache_dir or utils.default_cache_dir(), "license_texts.sqlite3"
+        )
+
+    def _bundled(self):
+        if self._bundle is None:
+            bundle = {}
+
+            if self.bundle_path and os.path.isfile(self.bundle_path):
+                with open(self.bundle_path, encoding="utf-8") as f:
+                    bundle = json.load(f)
+
+            self._bundle = bundle
+
+        return self._bundle
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
+
+        connection = sqlite3.connect(self.database_path, timeout=30)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS license_text "
+            "(license_id TEXT PRIMARY KEY, text TEXT NOT NULL)"
+        )
+
+        return connection
+
+    def _read(self, identifier):
+        try:
+            if not os.path.isfile(self.database_path):
+                return None
+
+            with closing(self._connect()) as connection:
+                row = connection.execute(
+                    "SELECT text FROM license_text WHERE license_id = ?", (identifier,)
+                ).fetchone()
+        except (OSError, sqlite3.Error):
+            # an unreadable cache is a miss
+            return None
+
+        return row[0] if row else None
+
+    def put(self, identifier, text):
+        """Save the text of a license to the store."""
+        with self._lock, closing(self._connect()) as connection:
+            # the connection as a context manager commits the transaction
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO license_text (license_id, text) "
+                    "VALUES (?, ?)",
+                    (identifier, text),
+                )
+
+        self._texts[identifier] = text
+
+    def get(self, identifier, details_url=None):
+        """Return the text of a license.
+
+        Args:
+            identifier (str): The SPDX licenseId
+            details_url (str): URL of the SPDX license details, used on a miss
+        Returns:
+            str: The license text, or None if it is not available
+        """
+        text = self._texts.get(identifier)
+        if text is not None:
+            return text
+
+        text = self._bundled().get(identifier)
+        if text is None:
+            text = self._read(identifier)
+
+        if text is None:
+            if self.offline or not details_url:
+                return None
+
+            response = utils.requestJSON(details_url)
+
+            if "licenseText" not in response:
+                return None
+
+            text = response["licenseText"]
+
+            try:
+                self.put(identifier, text)
+            except (OSError, sqlite3.Error):
+                # the SQLite cache is only an optimization
+                pass
+
+        self._texts[identifier] = text
+        return text
+
+    def export_bundle(self, file_path, identifiers=None):
+        """Write a snapshot of license texts that can be used fully offline.
+
+        Args:
+            file_path (str): The path to the JSON snapshot to create
+            identifiers (list): licenseIds to include, defaults to every
+                non-deprecated license in the registry
+        """
+        if identifiers is None:
+            identifiers = [
+                item["licenseId"]
+                for item in license_registry.licenses
+                if not item.get("isDeprecatedLicenseId")
+            ]
+
+        bundle = {}
+        for identifier in identifiers:
+            item = license_registry.get(identifier) or {}
+            text = self.get(identifier, item.get("detailsUrl"))
+
+            if text is not None:
+                bundle[identifier] = text
+
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(bundle, f, indent=2, sort_keys=True)
+
+    def clear(self):
+        """Drop the texts held in memory."""
+        with self._lock:
+            self._texts = {}
+            self._bundle = None
+
+
+license_text_store = LicenseTextStore()
@@ -28,6 +28,19 @@ def requestJSON(url):
         raise e
 
 
+def default_cache_dir():
+    """Return the folder used to cache downloaded and precomputed data."""
+    if "PYFAIRDATATOOLS_CACHE_DIR" in os.environ:
+        return os.environ["PYFAIRDATATOOLS_CACHE_DIR"]
+
+    return os.path.join(
+        os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+        ),
+        "pyfairdatatools",
+    )
+
+
 def validate_file_path(file_path, preexisting_file=False, writable=False):
     """Validate a file path. Checks if the file exists, is a file, and is writable."""
     if file_path == "":
@@ -1,198 +1,459 @@
+import concurrent.futures
+import functools
 import json
+import multiprocessing
 import os
+import re
+import threading
+import time
 
-import yaml
-from jsonschema import ValidationError, validate
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from .datatypes import datatype_dictionary
+from .licenses import license_registry
 
 # from . import utils
 
+SCHEMAS_DIR = os.path.join(os.path.dirname(__file__), "schemas")
 
-def validate_dataset_description(data, verbose=False):  # sourcery skip: extract-method
-    """Validate a dataset description against the schema.
 
-    Args:
-        data (dict): The dataset description to validate
-    Returns:
-        bool: True if the dataset description is valid, False otherwise
+class SchemaRegistry:
+    """Process-wide cache of compiled JSON schema validators.
+
+    Each schema in the schemas folder is read, checked and compiled into a
+    ``Draft*Validator`` once. Entries are keyed by schema name and the file's
+    modification time, so an edited schema file is picked up on the next lookup.
     """
-    schema = {}
 
-    # Import the schema from the schemas folder
+    def __init__(self, schemas_dir=SCHEMAS_DIR):
+        self.schemas_dir = schemas_dir
+        self._validators = {}  # type: dict
+        self._lock = threading.Lock()
+
+    def schema_path(self, name):
+        """Return the path of the schema file for a schema name."""
+        return os.path.join(self.schemas_dir, f"{name}.schema.json")
+
+    def get(self, name):
+        """Return the compiled validator for a schema name.
+
+        Args:
+            name (str): The schema name, e.g. "dataset_description"
+        Returns:
+            jsonschema.protocols.Validator: A reusable validator instance
+        """
+        file_path = self.schema_path(name)
+        mtime = os.stat(file_path).st_mtime_ns
+
+        cached = self._validators.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with self._lock:
+            cached = self._validators.get(name)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+            with open(file_path, encoding="utf-8") as f:
+                schema = json.load(f)
+
+            cls = validator_for(schema)
+            cls.check_schema(schema)
+            validator = cls(schema)
+
+            self._validators[name] = (mtime, validator)
+            return validator
+
+    def validate(self, name, data):
+        """Validate data against a schema, raising the best matching error.
+
+        This mirrors ``jsonschema.validate`` without re-checking the schema.
+
+        Args:
+            name (str): The schema name
+            data: The instance to validate
+        Raises:
+            ValidationError: If the instance is invalid
+        """
+        error = best_match(self.get(name).iter_errors(data))
+        if error is not None:
+            raise error
+
+    def clear(self):
+        """Drop every cached validator."""
+        with self._lock:
+            self._validators.clear()
+
+
+schema_registry = SchemaRegistry()
+
+
+class ValidationIssue:
+    """A single problem found while validating a record.
+
+    Attributes:
+        path (str): JSON path of the offending value, e.g. "$.statusModule"
+        schema_path (str): Path of the failing schema rule, empty for custom rules
+        rule (str): The failing schema keyword or custom rule id
+        message (str): Human readable description of the problem
+    """
+
+    def __init__(self, path, schema_path, rule, message):
+        self.path = path
+        self.schema_path = schema_path
+        self.rule = rule
+        self.message = message
+
+    @classmethod
+    def from_validation_error(cls, error):
+        """Build an issue from a jsonschema ValidationError."""
+        return cls(
+            error.json_path,
+            ".".join(str(p) for p in error.schema_path),
+            str(error.validator),
+            error.schema["error_msg"]
+            if isinstance(error.schema, dict) and "error_msg" in error.schema
+            else error.message,
+        )
+
+    def to_dict(self):
+        """Return the issue as a plain dict."""
+        return {
+            "path": self.path,
+            "schema_path": self.schema_path,
+            "rule": self.rule,
+            "message": self.message,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, ValidationIssue):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"ValidationIssue({self.path!r}, {self.rule!r}, {self.message!r})"
+
+
+@functools.lru_cache(maxsize=None)
+def _language_codes():
+    """Load the language codes from the assets folder once."""
     with open(
-        os.path.join(
-            os.path.dirname(__file__), "schemas", "dataset_description.schema.json"
-        ),
+        os.path.join(os.path.dirname(__file__), "assets", "languages.json"),
         encoding="utf-8",
     ) as f:
-        schema = json.load(f)
+        return frozenset(language["code"] for language in json.load(f))
 
+
+def is_valid_language_code(code):
+    """Check a language code against the list of valid language codes.
+
+    Args:
+        code (str): The language code to check, e.g. "en-US"
+    Returns:
+        bool: True if the language code is valid, False otherwise
+    """
+    return isinstance(code, str) and code in _language_codes()
+
+
+def _member(obj, key, default=None):
+    """Return obj[key] when obj is a dict holding key, default otherwise."""
+    return obj.get(key, default) if isinstance(obj, dict) else default
+
+
+def _dicts(items):
+    """Yield (index, item) for the dict items of a list."""
+    if isinstance(items, list):
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                yield index, item
+
+
+def _dataset_description_rule_errors(data):
+    """Yield issues for dataset description rules the schema cannot express."""
+    # validate the language code
+    if isinstance(data, dict) and "language" in data:
+        if not is_valid_language_code(data["language"]):
+            yield ValidationIssue(
+                "$.language", "", "language", "language code is invalid."
+            )
+
+    related_identifiers = _member(data, "relatedIdentifier", [])
+
+    for index, related_identifier in _dicts(related_identifiers):
+        if related_identifier.get("relationType") in [
+            "IsMetadataFor",
+            "HasMetadata",
+        ]:
+            for field in ["relatedMetadataScheme", "schemeURI", "schemeType"]:
+                if field not in related_identifier:
+                    yield ValidationIssue(
+                        f"$.relatedIdentifier[{index}].{field}",
+                        "",
+                        field,
+                        f"{field} is required for IsMetadataFor and HasMetadata relation types.",  # pylint: disable=line-too-long
+                    )
+
+
+def validate_dataset_description(
+    data, verbose=False, quiet=False
+):  # sourcery skip: extract-method
+    """Validate a dataset description against the schema.
+
+    Use collect_validation_issues to get every violation instead of a bool.
+
+    Args:
+        data (dict): The dataset description to validate
+        quiet (bool): Do not print validation errors
+    Returns:
+        bool: True if the dataset description is valid, False otherwise
+    """
     try:
-        validate(instance=data, schema=schema)
-
-        # validate the language code
-        if "language" in data:
-            with open(
-                os.path.join(os.path.dirname(__file__), "assets", "languages.json"),
-                encoding="utf-8",
-            ) as f:
-                list_of_language_codes = json.load(f)
-
-                valid = any(
-                    language["code"] == data["language"]
-                    for language in list_of_language_codes
-                )
-                if not valid:
-                    print("language code is invalid.")
-                    return False
-
-        if "relatedIdentifier" in data:
-            related_identifiers = data["relatedIdentifier"]
-
-            for related_identifier in related_identifiers:
-                if related_identifier["relationType"] in [
-                    "IsMetadataFor",
-                    "HasMetadata",
-                ]:
-                    if "relatedMetadataScheme" not in related_identifier:
-                        print(
-                            "relatedMetadataScheme is required for IsMetadataFor and HasMetadata relation types."
-                        )
-                        return False
-
-                    if "schemeURI" not in related_identifier:
-                        print(
-                            "schemeURI is required for IsMetadataFor and HasMetadata relation types."
-                        )
-                        return False
-
-                    if "schemeType" not in related_identifier:
-                        print(
-                            "schemeType is required for IsMetadataFor and HasMetadata relation types."
-                        )
-                        return False
+        schema_registry.validate("dataset_description", data)
+
+        issue = next(_dataset_description_rule_errors(data), None)
+        if issue is not None:
+            if not quiet:
+                print(issue.message)
+            return False
 
         return True
     except ValidationError as e:
-        print(e.schema["error_msg"] if "error_msg" in e.schema else e.message)
+        if not quiet:
+            print(e.schema["error_msg"] if "error_msg" in e.schema else e.message)
 
         # return e.message
 
         return False
     except Exception as error:
-        print(error)
+        if not quiet:
+            print(error)
         raise error
 
 
-def validate_study_description(data):  # sourcery skip: extract-method, low-code-quality
-    """Validate a study description against the schema."""
-    schema = {}
+def _study_description_rule_errors(data):  # sourcery skip: low-code-quality
+    """Yield issues for study description rules the schema cannot express."""
+    statusModule = _member(data, "statusModule", {})
 
-    # Import the schema from the schemas folder
-    with open(
-        os.path.join(
-            os.path.dirname(__file__), "schemas", "study_description.schema.json"
-        ),
-        encoding="utf-8",
-    ) as f:
-        schema = json.load(f)
+    overallStatus = _member(statusModule, "overallStatus")
 
-    try:
-        validate(instance=data, schema=schema)
+    if overallStatus in ["Withdrawn", "Terminated", "Suspended"]:
+        if "whyStopped" not in statusModule:
+            yield ValidationIssue(
+                "$.statusModule.whyStopped",
+                "",
+                "whyStopped",
+                "whyStopped is required for Withdrawn, Terminated, and Suspended overallStatus.",  # pylint: disable=line-too-long
+            )
 
-        statusModule = data["statusModule"]
+    studyType = _member(_member(data, "designModule"), "studyType")
 
-        overallStatus = statusModule["overallStatus"]
+    if studyType == "Interventional":
+        armGroupList = _member(_member(data, "armsInterventionsModule"), "armGroupList")
 
-        if overallStatus in ["Withdrawn", "Terminated", "Suspended"]:
-            if "whyStopped" not in statusModule:
-                print(
-                    "whyStopped is required for Withdrawn, Terminated, and Suspended overallStatus."
+        for index, armGroup in _dicts(armGroupList):
+            if "armGroupType" not in armGroup:
+                yield ValidationIssue(
+                    f"$.armsInterventionsModule.armGroupList[{index}].armGroupType",
+                    "",
+                    "armGroupType",
+                    "armGroupType is required is required for interventional studies.",  # pylint: disable=line-too-long
                 )
-                return False
 
-        studyType = data["designModule"]["studyType"]
+    elif studyType == "Observational":
+        eligibilityModule = _member(data, "eligibilityModule", {})
 
-        if studyType == "Interventional":
-            armGroupList = data["armsInterventionsModule"]["armGroupList"]
+        # check if the StudyPopulation key exists and is not empty
+        if "studyPopulation" not in eligibilityModule:
+            yield ValidationIssue(
+                "$.eligibilityModule.studyPopulation",
+                "",
+                "studyPopulation",
+                "studyPopulation is required for observational studies.",
+            )
+        else:
+            studyPopulation = eligibilityModule["studyPopulation"]
 
-            for armGroup in armGroupList:
-                if "armGroupType" not in armGroup:
-                    print(
-                        "armGroupType is required is required for interventional studies."  # pylint: disable=line-too-long
-                    )
-                    return False
+            if studyPopulation is None or studyPopulation == "":
+                yield ValidationIssue(
+                    "$.eligibilityModule.studyPopulation",
+                    "",
+                    "studyPopulation",
+                    "A value for studyPopulation is required for observational studies.",  # pylint: disable=line-too-long
+                )
 
-        elif studyType == "Observational":
-            # check if the StudyPopulation key exists and is not empty
-            if "studyPopulation" not in data["eligibilityModule"]:
-                print("studyPopulation is required for observational studies.")
-                return False
+        # check if the SamplingMethod key exists
+        if "samplingMethod" not in eligibilityModule:
+            yield ValidationIssue(
+                "$.eligibilityModule.samplingMethod",
+                "",
+                "samplingMethod",
+                "samplingMethod is required for observational studies.",
+            )
+
+    contactsLocationsModule = _member(data, "contactsLocationsModule", {})
+
+    if not _member(contactsLocationsModule, "centralContactList"):
+        locationList = _member(contactsLocationsModule, "locationList")
+
+        for index, location in _dicts(locationList):
+            if not location.get("locationContactList"):
+                yield ValidationIssue(
+                    f"$.contactsLocationsModule.locationList[{index}].locationContactList",  # pylint: disable=line-too-long
+                    "",
+                    "locationContactList",
+                    "locationContactList is required if no Central Contact is provided.",  # pylint: disable=line-too-long
+                )
 
-            studyPopulation = data["eligibilityModule"]["studyPopulation"]
 
-            if studyPopulation is None or studyPopulation == "":
-                print(
-                    "A value for studyPopulation is required for observational studies."
-                )
-                return False
+def validate_study_description(data, quiet=False):  # sourcery skip: extract-method
+    """Validate a study description against the schema.
 
-            # check if the SamplingMethod key exists
-            if "samplingMethod" not in data["eligibilityModule"]:
-                print("samplingMethod is required for observational studies.")
-                return False
+    Use collect_validation_issues to get every violation instead of a bool.
 
-        if (
-            "centralContactList" not in data["contactsLocationsModule"]
-            or len(data["contactsLocationsModule"]["centralContactList"]) == 0
-        ):
-            locationList = data["contactsLocationsModule"]["locationList"]
-
-            for location in locationList:
-                if (
-                    "locationContactList" not in location
-                    or len(location["locationContactList"]) == 0
-                ):
-                    print(
-                        "locationContactList is required if no Central Contact is provided."  # pylint: disable=line-too-long
-                    )
-                    return False
+    Args:
+        data (dict): The study description to validate
+        quiet (bool): Do not print validation errors
+    Returns:
+        bool: True if the study description is valid, False otherwise
+    """
+    try:
+        schema_registry.validate("study_description", data)
+
+        issue = next(_study_description_rule_errors(data), None)
+        if issue is not None:
+            if not quiet:
+                print(issue.message)
+            return False
 
         return True
     except ValidationError as e:
-        print(f" Validation Error: {e.message}")
-        print(f"→ Field Path: {'.'.join(str(p) for p in e.path)}")
-        print(f"→ Schema Rule Path: {'.'.join(str(p) for p in e.schema_path)}")
+        if not quiet:
+            print(f" Validation Error: {e.message}")
+            print(f"→ Field Path: {'.'.join(str(p) for p in e.path)}")
+            print(f"→ Schema Rule Path: {'.'.join(str(p) for p in e.schema_path)}")
         return False
     except Exception as error:
-        print(error)
+        if not quiet:
+            print(error)
         raise error
 
 
-def validate_readme(data):
+CUSTOM_RULES = {
+    "dataset_description": _dataset_description_rule_errors,
+    "study_description": _study_description_rule_errors,
+}
+
+
+def collect_validation_issues(kind, data):
+    """Collect every schema and custom rule violation of a record in one pass.
+
+    Args:
+        kind (str): The schema name, e.g. "study_description"
+        data: The record to validate
+    Returns:
+        list: ValidationIssue objects, empty when the record is valid
+    """
+    issues = [
+        ValidationIssue.from_validation_error(error)
+        for error in schema_registry.get(kind).iter_errors(data)
+    ]
+
+    if kind in CUSTOM_RULES:
+        issues.extend(CUSTOM_RULES[kind](data))
+
+    return issues
+
+
+def _record_errors(kind, data, collect_all):
+    """Return the errors of a record, either all issues or the first message."""
+    if collect_all:
+        return collect_validation_issues(kind, data)
+
+    try:
+        schema_registry.validate(kind, data)
+    except ValidationError as e:
+        return [e.schema["error_msg"] if "error_msg" in e.schema else e.message]
+
+    issue = next(CUSTOM_RULES[kind](data), None)
+
+    return [] if issue is None else [issue.message]
+
+
+def _validate_indexed_record(kind, collect_all, indexed_record):
+    index, data = indexed_record
+    errors = _record_errors(kind, data, collect_all)
+
+    return index, not errors, errors
+
+
+def _init_batch_worker(kind):
+    """Compile the validator once when a worker process starts."""
+    schema_registry.get(kind)
+
+
+def _iter_validate_many(kind, records, workers, chunksize, collect_all):
+    check = functools.partial(_validate_indexed_record, kind, collect_all)
+
+    if workers <= 1:
+        _init_batch_worker(kind)
+        yield from map(check, enumerate(records))
+        return
+
+    with multiprocessing.Pool(
+        workers, initializer=_init_batch_worker, initargs=(kind,)
+    ) as pool:
+        yield from pool.imap(check, enumerate(records), chunksize)
+
+
+def validate_many(kind, records, workers=None, chunksize=64, collect_all=False):
+    """Validate many dataset or study descriptions.
+
+    Records are validated across a pool of worker processes, each of which
+    compiles the schema validator once. Nothing is printed; results are
+    streamed back in input order.
+
+    Args:
+        kind (str): Either "dataset_description" or "study_description"
+        records (iterable): The records (dicts) to validate
+        workers (int): Number of worker processes, defaults to the CPU count.
+            With 1 worker the records are validated in the current process.
+        chunksize (int): Number of records sent to a worker at a time
+        collect_all (bool): Report every ValidationIssue of a record instead of
+            the message of the first error
+    Returns:
+        iterator: (index, ok, errors) tuples
+    """
+    if kind not in CUSTOM_RULES:
+        print("Kind is invalid.")
+        raise ValueError("Invalid kind")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    return _iter_validate_many(kind, records, workers, chunksize, collect_all)
+
+
+def validate_readme(data, quiet=False):
     """Validate a readme against the schema.
 
     Args:
         data (dict): The readme to validate
+        quiet (bool): Do not print validation errors
     Returns:
         bool: True if the readme is valid, False otherwise
     """
-    schema = {}
-
-    # Import the schema from the schemas folder
-    with open(
-        os.path.join(os.path.dirname(__file__), "schemas", "readme.schema.json"),
-        encoding="utf-8",
-    ) as f:
-        schema = json.load(f)
-
     try:
-        validate(instance=data, schema=schema)
+        schema_registry.validate("readme", data)
         return True
     except ValidationError as e:
-        print(e.schema["error_msg"] if "error_msg" in e.schema else e.message)
+        if not quiet:
+            print(e.schema["error_msg"] if "error_msg" in e.schema else e.message)
         return False
     except Exception as error:
-        print(error)
+        if not quiet:
+            print(error)
         raise error
 
 
@@ -204,40 +465,20 @@ def validate_license(identifier):
     Returns:
         bool: True if the license identifier is valid, False otherwise
     """
-    list_of_licenses = []
-
-    # Import the license list from the assets folder
-    with open(
-        os.path.join(os.path.dirname(__file__), "assets", "licenses.json"),
-        encoding="utf-8",
-    ) as f:
-        list_of_licenses = json.load(f)["licenses"]
+    return identifier in license_registry
 
-    return any(
-        "licenseId" in item and identifier == item["licenseId"]
-        for item in list_of_licenses
-    )
 
-
-def validate_participants(data):
+def validate_participants(data, quiet=False):
     """Validate a participants file against the schema.
 
     Args:
         data (dict): The participants file to validate
+        quiet (bool): Do not print validation errors
     Returns:
         bool: True if the participants file is valid, False otherwise
     """
-    schema = {}
-
-    # Import the schema from the schemas folder
-    with open(
-        os.path.join(os.path.dirname(__file__), "schemas", "participants.schema.json"),
-        encoding="utf-8",
-    ) as f:
-        schema = json.load(f)
-
     try:
-        validate(instance=data, schema=schema)
+        schema_registry.validate("participants", data)
 
         # TODO: validate species
         # TODO: validate strain
@@ -245,14 +486,396 @@ def validate_participants(data):
 
         return True
     except ValidationError as e:
-        print(e.schema["error_msg"] if "error_msg" in e.schema else e.message)
+        if not quiet:
+            print(e.schema["error_msg"] if "error_msg" in e.schema else e.message)
         return False
     except Exception as error:
-        print(error)
+        if not quiet:
+            print(error)
         raise error
 
 
-def validate_folder_structure(folder_path):
+# JSON schema keywords that constrain the entries of a folder
+FOLDER_CONTENT_KEYWORDS = frozenset(
+    [
+        "required",
+        "properties",
+        "patternProperties",
+        "additionalProperties",
+        "propertyNames",
+        "minProperties",
+        "maxProperties",
+    ]
+)
+
+
+def _entry_schema(schema):
+    """Reduce the schema of a folder entry to the checks on the entry itself."""
+    if not isinstance(schema, dict):
+        return schema
+
+    return {key: schema[key] for key in ("type", "const", "enum") if key in schema}
+
+
+def _level_schema(schema):
+    """Return the checks of a folder schema that apply to its own level.
+
+    Subfolders are represented by empty objects, so the schemas of the entries
+    are reduced to their type, const and enum checks.
+    """
+    if not isinstance(schema, dict):
+        return schema
+
+    level = {
+        key: value
+        for key, value in schema.items()
+        if key not in ("properties", "patternProperties", "additionalProperties")
+    }
+
+    for keyword in ("properties", "patternProperties"):
+        if keyword in schema:
+            level[keyword] = {
+                name: _entry_schema(subschema)
+                for name, subschema in schema[keyword].items()
+            }
+
+    if "additionalProperties" in schema:
+        level["additionalProperties"] = _entry_schema(schema["additionalProperties"])
+
+    return level
+
+
+def _constrains_folder(schema):
+    """Check if a schema constrains the contents of a folder.
+
+    Checks on the folder entry itself are done at the parent level.
+    """
+    return isinstance(schema, dict) and not FOLDER_CONTENT_KEYWORDS.isdisjoint(schema)
+
+
+def _json_path(parts):
+    """Build a JSON path like the ones jsonschema reports from path parts."""
+    path = "$"
+
+    for part in parts:
+        if isinstance(part, int):
+            path += f"[{part}]"
+        elif re.match(r"^[a-zA-Z][a-zA-Z0-9_]*$", part):
+            path += f".{part}"
+        else:
+            escaped = part.replace("\\", "\\\\").replace("'", "\\'")
+            path += f"['{escaped}']"
+
+    return path
+
+
+def _subfolder_schemas(schema, name):
+    """Yield (schema path, schema) for the subschemas that apply to a subfolder.
+
+    Only subschemas that constrain the subfolder are yielded, so folders the
+    schema does not describe are never walked.
+    """
+    if not isinstance(schema, dict):
+        return
+
+    matched = False
+
+    if name in schema.get("properties", {}):
+        matched = True
+        subschema = schema["properties"][name]
+        if _constrains_folder(subschema):
+            yield ("properties", name), subschema
+
+    for pattern, subschema in schema.get("patternProperties", {}).items():
+        if re.search(pattern, name):
+            matched = True
+            if _constrains_folder(subschema):
+                yield ("patternProperties", pattern), subschema
+
+    if not matched and _constrains_folder(schema.get("additionalProperties")):
+        yield ("additionalProperties",), schema["additionalProperties"]
+
+
+def _scan_level(path):
+    """Return the entries of a folder as a shallow dict and its subfolders.
+
+    Subfolders map to empty dicts and files to "file". The type information
+    cached on each DirEntry is used, so no extra stat is needed per entry.
+    """
+    level = {}  # type: dict
+    subfolders = []
+
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    level[entry.name] = {}
+                    subfolders.append(entry)
+                else:
+                    level[entry.name] = "file"
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+
+    return level, subfolders
+
+
+class FolderSnapshot:
+    """Persisted per-folder results used to validate a folder incrementally.
+
+    For every folder visited while validating, the snapshot keeps the folder
+    mtime, ctime and link count, the time it was listed, the subfolders that
+    were walked and the issues found at that level. On the next run, a folder
+    whose stat did not change is neither listed nor validated again; its cached
+    results are used.
+
+    On filesystems with coarse mtimes, such as NFS, an entry added in the same
+    mtime tick as the listing leaves the mtime unchanged. Records of folders
+    modified within MTIME_WINDOW_NS of their listing are therefore not reused,
+    and those folders are listed again on the next run. The snapshot is
+    discarded when the folder structure schema changes.
+    """
+
+    VERSION = 2
+
+    # coarsest mtime granularity expected, 2 s on FAT and 1 s on NFS or ext3
+    MTIME_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, file_path, folder_path):
+        self.file_path = file_path
+        self.folder_path = os.path.abspath(folder_path)
+        self.previous = {}  # type: dict
+        self.current = {}  # type: dict
+
+    def _schema_mtime(self):
+        return os.stat(schema_registry.schema_path("folder_structure")).st_mtime_ns
+
+    def load(self):
+        """Read the snapshot file, ignoring it if it is missing or stale."""
+        try:
+            with open(self.file_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return self
+
+        if (
+            snapshot.get("version") == self.VERSION
+            and snapshot.get("folder_path") == self.folder_path
+            and snapshot.get("schema_mtime_ns") == self._schema_mtime()
+        ):
+            self.previous = snapshot.get("levels", {})
+
+        return self
+
+    @staticmethod
+    def stat(path):
+        """Return the stat fields that change with the entries of a folder.
+
+        Returns:
+            dict: The mtime, ctime and link count, or None if the folder cannot
+                be stat'ed
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        return {
+            "mtime_ns": stat.st_mtime_ns,
+            "ctime_ns": stat.st_ctime_ns,
+            "nlink": stat.st_nlink,
+        }
+
+    def lookup(self, key, stat):
+        """Return the cached record of a folder if its stat is unchanged."""
+        record = self.previous.get(key)
+
+        if record is None or stat is None:
+            return None
+
+        if any(record.get(field) != value for field, value in stat.items()):
+            return None
+
+        # a change within the mtime tick of the listing would not show
+        if record["listed_ns"] - record["mtime_ns"] < self.MTIME_WINDOW_NS:
+            return None
+
+        return record
+
+    def record(self, key, record):
+        """Keep the record of a folder visited in this run."""
+        self.current[key] = record
+
+    def save(self, complete=True):
+        """Write the snapshot file.
+
+        Args:
+            complete (bool): Whether the walk visited every folder. After a
+                partial walk, records of folders not visited are kept.
+        """
+        levels = self.current if complete else {**self.previous, **self.current}
+        temp_path = f"{self.file_path}.tmp"
+
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "folder_path": self.folder_path,
+                    "schema_mtime_ns": self._schema_mtime(),
+                    "levels": levels,
+                },
+                f,
+            )
+
+        os.replace(temp_path, self.file_path)
+
+
+def iter_folder_structure_issues(folder_path, stop_on_first=False, snapshot=None):
+    """Validate a folder structure level by level while walking it.
+
+    Each folder is checked against the part of the folder structure schema
+    that describes it, and only subfolders the schema constrains are walked.
+    The walk is iterative and keeps a single folder level in memory at a time.
+
+    Args:
+        folder_path (str): The path to the folder to validate
+        stop_on_first (bool): Stop walking at the first violation
+        snapshot (FolderSnapshot): Reuse the results of folders whose stat did
+            not change, without listing them, and record the results of this walk
+    Returns:
+        iterator: ValidationIssue objects, one per violation
+    """
+    root_validator = schema_registry.get("folder_structure")
+    validator_class = type(root_validator)
+    level_validators = {}  # type: dict
+
+    # (path, schema, folder parts, schema path) of the folders left to visit
+    stack = [(folder_path, root_validator.schema, (), ())]  # type: list
+
+    while stack:
+        path, schema, folder_parts, schema_path = stack.pop()
+
+        key = stat = record = None
+        if snapshot is not None:
+            key = "/".join(folder_parts) + "#" + ".".join(str(p) for p in schema_path)
+            stat = snapshot.stat(path)
+            record = snapshot.lookup(key, stat)
+
+        if record is not None:
+            issues = [ValidationIssue(**issue) for issue in record["issues"]]
+            subfolder_names = record["subfolders"]
+            listed_ns = record["listed_ns"]
+        else:
+            # listed after the stat, so that a change while listing is seen next run
+            listed_ns = time.time_ns()
+            level, subfolders = _scan_level(path)
+
+            validator = level_validators.get(schema_path)
+            if validator is None:
+                validator = validator_class(_level_schema(schema))
+                level_validators[schema_path] = validator
+
+            issues = []
+            for error in validator.iter_errors(level):
+                issue = ValidationIssue.from_validation_error(error)
+                issue.path = _json_path(folder_parts + tuple(error.absolute_path))
+                issue.schema_path = ".".join(
+                    str(p) for p in schema_path + tuple(error.schema_path)
+                )
+                issues.append(issue)
+
+            subfolder_names = [
+                entry.name
+                for entry in subfolders
+                if any(True for _ in _subfolder_schemas(schema, entry.name))
+            ]
+
+        if snapshot is not None:
+            snapshot.record(
+                key,
+                {
+                    **(stat or {}),
+                    "listed_ns": listed_ns,
+                    "subfolders": subfolder_names,
+                    "issues": [issue.to_dict() for issue in issues],
+                },
+            )
+
+        for issue in issues:
+            yield issue
+
+            if stop_on_first:
+                return
+
+        for name in reversed(subfolder_names):
+            for subschema_path, subschema in _subfolder_schemas(schema, name):
+                stack.append(
+                    (
+                        os.path.join(path, name),
+                        subschema,
+                        folder_parts + (name,),
+                        schema_path + subschema_path,
+                    )
+                )
+
+
+def path_to_dict(path):
+    """Build a nested dict of a folder tree, mapping files to "file"."""
+    d = {}  # type: dict
+
+    if not os.path.exists(path):
+        return d
+
+    for x in os.listdir(path):
+        key = os.path.basename(x)
+
+        if os.path.isdir(os.path.join(path, x)):
+            d[key] = path_to_dict(os.path.join(path, x))
+        else:
+            d[key] = "file"
+
+    return d
+
+
+def _fill_level(path, target):
+    """List one folder into target and return the subfolders left to list."""
+    level, subfolders = _scan_level(path)
+    target.update(level)
+
+    return [(entry.path, level[entry.name]) for entry in subfolders]
+
+
+def folder_to_dict_parallel(path, workers=8):
+    """Build the same nested dict as path_to_dict, listing folders concurrently.
+
+    Every folder is listed by a task in a thread pool as soon as its parent has
+    been listed, which hides the per-call latency of network filesystems.
+
+    Args:
+        path (str): The path to the root folder
+        workers (int): Number of threads listing folders at the same time
+    Returns:
+        dict: The nested folder structure
+    """
+    tree = {}  # type: dict
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_fill_level, path, tree)}
+
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                for subfolder_path, target in future.result():
+                    pending.add(executor.submit(_fill_level, subfolder_path, target))
+
+    return tree
+
+
+def validate_folder_structure(
+    folder_path, streaming=False, stop_on_first=False, workers=1, snapshot_path=None
+):
     """Validate that a folder structure is valid.
 
     We do this by generating a json tree of the folder and file structure and
@@ -262,41 +885,48 @@ def validate_folder_structure(folder_path):
     Certain folder structures (ones inside of dynamic folders) will not be able to
     be validated by this method.
 
+    With streaming, the tree is not built in memory. Each folder level is
+    checked against the schema while walking (see iter_folder_structure_issues)
+    and every violation is printed.
+
+    With a snapshot_path, validation is streaming and incremental: results of
+    the walk are saved to the snapshot file and, on the next run, only folders
+    whose stat changed are listed and validated again.
+
     Args:
         folder_path (str): The path to the folder to validate
+        streaming (bool): Validate level by level while walking the tree
+        stop_on_first (bool): With streaming, stop at the first violation
+        workers (int): Number of threads listing folders concurrently when
+            building the tree, useful on network filesystems
+        snapshot_path (str): Path to the snapshot file used for incremental
+            validation
     Returns:
         bool: True if the folder structure is valid, False otherwise
     """
+    if streaming or snapshot_path is not None:
+        snapshot = None
+        if snapshot_path is not None:
+            snapshot = FolderSnapshot(snapshot_path, folder_path).load()
 
-    def path_to_dict(path):
-        d = {}  # type: dict
-
-        if not os.path.exists(path):
-            return d
+        valid = True
 
-        for x in os.listdir(path):
-            key = os.path.basename(x)
+        for issue in iter_folder_structure_issues(folder_path, stop_on_first, snapshot):
+            print(issue.message)
+            valid = False
 
-            if os.path.isdir(os.path.join(path, x)):
-                d[key] = path_to_dict(os.path.join(path, x))
-            else:
-                d[key] = "file"
+        if snapshot is not None:
+            snapshot.save(complete=valid or not stop_on_first)
 
-        return d
-
-    # Import the schema from the schemas folder
-    with open(
-        os.path.join(
-            os.path.dirname(__file__), "schemas", "folder_structure.schema.json"
-        ),
-        encoding="utf-8",
-    ) as f:
-        schema = json.load(f)
+        return valid
 
-    folder_structure_as_dict = path_to_dict(folder_path)
+    if workers > 1:
+        folder_structure_as_dict = folder_to_dict_parallel(folder_path, workers)
+    else:
+        folder_structure_as_dict = path_to_dict(folder_path)
 
     try:
-        validate(instance=folder_structure_as_dict, schema=schema)
+        schema_registry.validate("folder_structure", folder_structure_as_dict)
 
         return True
     except ValidationError as e:
@@ -315,31 +945,9 @@ def validate_datatype_dictionary(data):
     Returns:
         bool: True if the datatype description is valid, False otherwise
     """
-    # Import the yaml file from the schemas folder
-    with open(
-        os.path.join(
-            os.path.dirname(__file__),
-            "assets",
-            "datatype_dictionary.yaml",
-        ),
-        encoding="utf-8",
-    ) as f:
-        schema = yaml.safe_load(f)
-
     try:
-        # create a list of code_name and aliases from schema to validate against
-        code_name_list = [
-            code_name["code_name"] for code_name in schema["datatype_dictionary"]
-        ]
-        code_name_list += [
-            alias
-            for code_name in schema["datatype_dictionary"]
-            if "aliases" in code_name
-            for alias in code_name["aliases"]
-        ]
-
         for entry in data:
-            if entry not in code_name_list:
+            if entry not in datatype_dictionary:
                 print(f"code_name {entry} is not a valid code_name or alias.")
                 return False
 
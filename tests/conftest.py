@@ -2,4 +2,16 @@
 
 # pylint: disable=unused-import
 
+import pytest
+
 from pyfairdatatools.tests.conftest import pytest_configure
+
+
+@pytest.fixture(name="cache_dir", autouse=True, scope="session")
+def fixture_cache_dir(tmp_path_factory):
+    """Write the caches of the package to a temporary folder, not the user's."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        cache_dir = tmp_path_factory.mktemp("cache")
+        monkeypatch.setenv("PYFAIRDATATOOLS_CACHE_DIR", str(cache_dir))
+
+        yield cache_dir
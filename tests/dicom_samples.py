@@ -0,0 +1,138 @@
+"""Synthetic ophthalmic DICOM files used by the DICOM tests and benchmarks"""
+
+import io
+
+import pydicom
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.sequence import Sequence
+from pydicom.uid import ExplicitVRLittleEndian, ImplicitVRLittleEndian, generate_uid
+
+FUNDUS_PHOTO = "1.2.840.10008.5.1.4.1.1.77.1.5.1"
+OCT_BSCAN = "1.2.840.10008.5.1.4.1.1.77.1.5.4"
+EN_FACE = "1.2.840.10008.5.1.4.1.1.77.1.5.7"
+VOLUME_ANALYSIS = "1.2.840.10008.5.1.4.1.1.77.1.5.8"
+SURFACE_SEGMENTATION = "1.2.840.10008.5.1.4.1.1.66.5"
+
+
+def _code_item(value, meaning):
+    item = Dataset()
+    item.CodeValue = value
+    item.CodingSchemeDesignator = "SRT"
+    item.CodeMeaning = meaning
+    return item
+
+
+def _pixel_bytes(size):
+    # a repeating ramp rather than zeros, so that misplaced bytes show
+    return (bytes(range(256)) * (size // 256 + 1))[:size]
+
+
+def _referenced_item(sop_class_uid):
+    item = Dataset()
+    item.ReferencedSOPClassUID = sop_class_uid
+    item.ReferencedSOPInstanceUID = generate_uid()
+    return item
+
+
+def make_dataset(
+    sop_class_uid=OCT_BSCAN,
+    device="3DOCT-1Maestro2",
+    frames=1,
+    rows=64,
+    columns=64,
+    slice_thickness="0.0703125",
+    bits=8,
+    implicit_vr=False,
+):
+    """Return a dataset with the elements used by the classifier and converter.
+
+    Surface segmentations have no pixel data, like the ones the devices export.
+    """
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = sop_class_uid
+    file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    file_meta.TransferSyntaxUID = (
+        ImplicitVRLittleEndian if implicit_vr else ExplicitVRLittleEndian
+    )
+    file_meta.ImplementationClassUID = generate_uid()
+    file_meta.ImplementationVersionName = "fo-dicom 4.0.8"
+
+    ds = Dataset()
+    ds.file_meta = file_meta
+    ds.SpecificCharacterSet = "ISO_IR 100"
+    ds.SOPClassUID = sop_class_uid
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.PatientName = "Doe^John"
+    ds.PatientID = "1001"
+    ds.PatientBirthDate = "19700101"
+    ds.PatientSex = "M"
+    ds.StudyInstanceUID = generate_uid()
+    ds.SeriesInstanceUID = generate_uid()
+    ds.FrameOfReferenceUID = generate_uid()
+    ds.StudyDate = "20230101"
+    ds.StudyTime = "120000"
+    ds.StudyDescription = "Retina"
+    ds.ReferringPhysicianName = "Doe^Jane"
+    ds.Modality = "OP" if sop_class_uid == FUNDUS_PHOTO else "OPT"
+    ds.Manufacturer = "Topcon"
+    ds.ManufacturerModelName = device
+    ds.SoftwareVersions = "1.0"
+    ds.ImageLaterality = "R"
+    ds.AcquisitionDateTime = "20230101120000"
+    ds.ImageType = ["ORIGINAL", "PRIMARY"]
+    ds.PatientEyeMovementCommandCodeSequence = Sequence(
+        [_code_item("R-1022D", "Fixation")]
+    )
+    ds.AnatomicRegionSequence = Sequence([_code_item("T-AA000", "Eye")])
+
+    if sop_class_uid in (OCT_BSCAN, VOLUME_ANALYSIS):
+        pixel_measures = Dataset()
+        pixel_measures.SliceThickness = slice_thickness
+        shared = Dataset()
+        shared.PixelMeasuresSequence = Sequence([pixel_measures])
+        if sop_class_uid == OCT_BSCAN:
+            shared.ReferencedImageSequence = Sequence([_referenced_item(FUNDUS_PHOTO)])
+        else:
+            frame_anatomy = Dataset()
+            frame_anatomy.FrameLaterality = "R"
+            shared.FrameAnatomySequence = Sequence([frame_anatomy])
+        ds.SharedFunctionalGroupsSequence = Sequence([shared])
+    elif sop_class_uid == EN_FACE:
+        ds.SourceImageSequence = Sequence([_referenced_item(OCT_BSCAN)])
+    elif sop_class_uid == SURFACE_SEGMENTATION:
+        series = Dataset()
+        series.SeriesInstanceUID = generate_uid()
+        series.ReferencedInstanceSequence = Sequence([_referenced_item(OCT_BSCAN)])
+        ds.ReferencedSeriesSequence = Sequence([series])
+
+    if sop_class_uid != SURFACE_SEGMENTATION:
+        ds.Rows = rows
+        ds.Columns = columns
+        ds.BitsAllocated = bits
+        ds.BitsStored = bits
+        ds.HighBit = bits - 1
+        ds.PixelRepresentation = 0
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.NumberOfFrames = frames
+        ds.PixelData = _pixel_bytes(frames * rows * columns * bits // 8)
+
+    ds.is_little_endian = True
+    ds.is_implicit_VR = implicit_vr
+
+    return ds
+
+
+def write_sample(file_path, **kwargs):
+    """Write a synthetic DICOM file and return its path."""
+    pydicom.dcmwrite(file_path, make_dataset(**kwargs), write_like_original=False)
+
+    return file_path
+
+
+def sample_bytes(**kwargs):
+    """Return the bytes of a synthetic DICOM file, e.g. to add to a zip archive."""
+    buffer = io.BytesIO()
+    pydicom.dcmwrite(buffer, make_dataset(**kwargs), write_like_original=False)
+
+    return buffer.getvalue()
@@ -0,0 +1,836 @@
+"""Unit tests for pyfairdatatools.cfpir_converter module."""
+
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+
+PACKAGE_DIR = os.path.join(os.path.dirname(__file__), "..", "pyfairdatatools")
+
+# the DICOM modules import each other by module name
+sys.path.insert(0, PACKAGE_DIR)
+
+# pylint: disable=wrong-import-position,import-error
+import cfpir_converter  # noqa: E402
+from cfpir_converter import (  # noqa: E402
+    cfp_ir,
+    conversion_rules,
+    convert_dicom,
+    convert_dicom_mapped,
+    convert_zip_dicom,
+    convert_zip_dicoms,
+    convert_zip_members,
+    extract_dicom_dict,
+    list_conversion_tasks,
+    write_dicom,
+)
+from conversion_cache import ConversionCache, get_conversion_cache  # noqa: E402
+from conversion_rules import (  # noqa: E402
+    BLANK,
+    HARMONIZE,
+    KEEP,
+    ConversionRule,
+    Element,
+    ElementList,
+)
+from dicom_writer import DicomWriter  # noqa: E402
+
+from tests.dicom_samples import (  # noqa: E402
+    EN_FACE,
+    FUNDUS_PHOTO,
+    OCT_BSCAN,
+    SURFACE_SEGMENTATION,
+    VOLUME_ANALYSIS,
+    make_dataset,
+    sample_bytes,
+    write_sample,
+)
+
+
+def make_cfp(file_path, device="Triton", **kwargs):
+    """Write a CFP file with the sequences and elements that cfp_ir converts."""
+    ds = make_dataset(sop_class_uid=FUNDUS_PHOTO, device=device, **kwargs)
+    # Triton exports are relabelled Topcon by the conversion
+    ds.Manufacturer = "Unknown"
+    ds.LensesCodeSequence = pydicom.Sequence([pydicom.Dataset()])
+    ds.LensesCodeSequence[0].CodeValue = "R-1021A"
+    ds.LensesCodeSequence[0].CodingSchemeDesignator = "SRT"
+    ds.LensesCodeSequence[0].CodeMeaning = "Lens"
+    ds.IlluminationTypeCodeSequence = pydicom.Sequence()
+    ds.PixelSpacing = ["0.01", "0.01"]
+    ds.HorizontalFieldOfView = 45.0
+    ds.StudyID = "42"
+    ds.save_as(file_path, write_like_original=False)
+
+    return file_path
+
+
+def write_zip(file_path, members):
+    """Write a zip file of the given member names and bytes."""
+    with zipfile.ZipFile(file_path, "w") as zip_ref:
+        for name, data in members.items():
+            zip_ref.writestr(name, data)
+
+    return str(file_path)
+
+
+def without_timings(manifest):
+    return [{**row, "seconds": 0.0} for row in manifest]
+
+
+def legacy_write_dicom(protocol, dicom_dict_list, file_path):
+    """Write a converted file the way write_dicom did before convert_dataset."""
+    # pylint: disable=too-many-locals,too-many-branches,undefined-loop-variable
+    headertags = protocol.header_tags()
+    tags = protocol.tags()
+    sequencetags = protocol.sequence_tags()
+
+    file_meta = pydicom.Dataset()
+
+    for headertag in headertags:
+        value = dicom_dict_list[0][headertag].value
+        element_name = pydicom.datadict.keyword_for_tag(
+            dicom_dict_list[0][headertag].tag
+        )
+        setattr(file_meta, element_name, value)
+
+    dataset = pydicom.Dataset()
+    dataset.file_meta = file_meta
+
+    for tag in tags:
+        for element in protocol.elements:
+            if element.tag == tag:
+                desired_element = element
+
+        if desired_element.decision == BLANK:
+            value = []
+        elif desired_element.decision == HARMONIZE:
+            value = [desired_element.harmonized_value]
+        elif tag in dicom_dict_list[0]:
+            value = dicom_dict_list[0][tag].value
+        else:
+            value = []
+
+        element_name = (
+            pydicom.datadict.keyword_for_tag(dicom_dict_list[0][tag].tag)
+            if tag in dicom_dict_list[0]
+            else pydicom.datadict.keyword_for_tag(tag)
+        )
+        setattr(dataset, element_name, value)
+
+    dataset.is_little_endian = dicom_dict_list[1][0]
+    dataset.is_implicit_VR = dicom_dict_list[1][1]
+    dataset.PixelData = dicom_dict_list[2]
+
+    if dicom_dict_list[0]["00081090"].value == ["Triton"]:
+        dataset.Manufacturer = ["Topcon"]
+
+    for key, elementkeys in sequencetags.items():
+        for sequence in protocol.sequences:
+            if sequence.tag == key:
+                desired_sequence = sequence
+
+        seq = pydicom.Sequence()
+
+        if key in dicom_dict_list[0] and dicom_dict_list[0][key].value:
+            x = dicom_dict_list[0][key].value[0]
+
+            item = pydicom.Dataset()
+            for elementkey in elementkeys:
+                for element in desired_sequence.elements:
+                    if element.tag == elementkey:
+                        desired_element = element
+                if elementkey in x and desired_element.decision == BLANK:
+                    value = []
+                elif elementkey in x and desired_element.decision == HARMONIZE:
+                    value = desired_element.harmonized_value
+                elif elementkey in x:
+                    value = x[elementkey].value
+                element_name = pydicom.datadict.keyword_for_tag(x[elementkey].tag)
+                setattr(item, element_name, value)
+            seq.append(item)
+
+        setattr(dataset, pydicom.datadict.keyword_for_tag(key), seq)
+
+    pydicom.filewriter.write_file(file_path, dataset, write_like_original=False)
+
+
+def legacy_convert_dicom(input_file, output):
+    tags = cfp_ir.header_tags() + cfp_ir.tags() + list(cfp_ir.sequence_tags())
+    legacy_write_dicom(cfp_ir, extract_dicom_dict(input_file, tags), output)
+
+
+def make_rule(elements, sequences=(), name="test"):
+    """Return a rule with the file meta headers of cfp_ir and the given elements."""
+    return ConversionRule(name, cfp_ir.header_elements, list(elements), list(sequences))
+
+
+class TestCompiledConversionRule:
+    """Unit tests for the lookup tables compiled from a conversion rule."""
+
+    def test_last_definition_wins(self):
+        rule = make_rule(
+            [
+                Element("PatientName", "00100010", "PN", KEEP),
+                Element("PatientID", "00100020", "LO"),
+                Element("PatientName", "00100010", "PN", HARMONIZE, "Anonymous"),
+            ]
+        )
+
+        compiled = rule.compile()
+
+        assert compiled.elements["00100010"] == ("PatientName", HARMONIZE, "Anonymous")
+        assert list(compiled.elements) == ["00100010", "00100020"]
+
+    def test_cfp_ir_duplicates(self):
+        compiled = cfp_ir.compile()
+        duplicated = ["00220005", "0022000C", "00187004"]
+
+        for tag in duplicated:
+            assert [element.tag for element in cfp_ir.elements].count(tag) == 2
+
+        assert len(compiled.elements) == len(cfp_ir.elements) - len(duplicated)
+        assert len(compiled.tags) == len(set(compiled.tags))
+        assert set(compiled.tags) == set(
+            cfp_ir.header_tags() + cfp_ir.tags() + list(cfp_ir.sequence_tags())
+        )
+
+    def test_matches_element_search(self):
+        compiled = cfp_ir.compile()
+
+        # the search write_dicom did for every tag before the rules were compiled
+        for tag in cfp_ir.tags():
+            for element in cfp_ir.elements:
+                if element.tag == tag:
+                    desired_element = element
+
+            assert compiled.elements[tag] == (
+                pydicom.datadict.keyword_for_tag(tag),
+                desired_element.decision,
+                desired_element.harmonized_value,
+            )
+
+        for sequence in cfp_ir.sequences:
+            keyword, elements = compiled.sequences[sequence.tag]
+
+            assert keyword == sequence.name
+            assert list(elements) == [element.tag for element in sequence.elements]
+
+    def test_compiled_once(self):
+        assert cfp_ir.compile() is cfp_ir.compile()
+
+    def test_fingerprint_is_stable(self):
+        rule = make_rule(cfp_ir.elements, cfp_ir.sequences, cfp_ir.name)
+
+        assert rule.compile().fingerprint == cfp_ir.compile().fingerprint
+        assert (
+            make_rule(list(reversed(cfp_ir.elements[:10]))).compile().fingerprint
+            == make_rule(cfp_ir.elements[:10]).compile().fingerprint
+        )
+
+    def test_fingerprint_is_stable_across_processes(self):
+        script = (
+            "import cfpir_converter; "
+            "print(cfpir_converter.cfp_ir.compile().fingerprint)"
+        )
+        fingerprints = set()
+
+        for seed in ("1", "2"):
+            result = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=PACKAGE_DIR,
+                env=dict(os.environ, PYTHONHASHSEED=seed),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            fingerprints.add(result.stdout.strip())
+
+        assert fingerprints == {cfp_ir.compile().fingerprint}
+
+    @pytest.mark.parametrize(
+        "element",
+        [
+            Element("PatientID", "00100020", "LO", BLANK),
+            Element("PatientID", "00100020", "LO", HARMONIZE, "1001"),
+            Element("PatientSex", "00100040", "CS"),
+        ],
+    )
+    def test_fingerprint_changes_with_elements(self, element):
+        base = make_rule([Element("PatientID", "00100020", "LO")])
+        changed = make_rule(
+            [Element("PatientID", "00100020", "LO"), element]
+            if element.tag != "00100020"
+            else [element]
+        )
+
+        assert base.compile().fingerprint != changed.compile().fingerprint
+
+    def test_fingerprint_changes_with_sequences(self):
+        def sequence_rule(decision, harmonized_value=0):
+            return make_rule(
+                [],
+                [
+                    ElementList(
+                        "AnatomicRegionSequence",
+                        "00082218",
+                        "SQ",
+                        [
+                            Element(
+                                "CodeValue",
+                                "00080100",
+                                "SH",
+                                decision,
+                                harmonized_value,
+                            )
+                        ],
+                    )
+                ],
+            )
+
+        fingerprints = {
+            sequence_rule(KEEP).compile().fingerprint,
+            sequence_rule(HARMONIZE, "T-AA610").compile().fingerprint,
+            sequence_rule(HARMONIZE, "T-AA000").compile().fingerprint,
+            make_rule([]).compile().fingerprint,
+        }
+
+        assert len(fingerprints) == 4
+
+    def test_fingerprint_changes_with_name(self):
+        rule = make_rule(cfp_ir.elements, cfp_ir.sequences, "CFP IR copy")
+
+        assert rule.compile().fingerprint != cfp_ir.compile().fingerprint
+
+
+class TestConvertDicom:
+    """Unit tests for converting a dataset without the JSON round trip."""
+
+    @pytest.mark.parametrize(
+        "device, kwargs",
+        [
+            ("Triton", {}),
+            ("Maestro2", {}),
+            ("Triton", {"implicit_vr": True}),
+            ("Triton", {"bits": 16}),
+        ],
+    )
+    def test_matches_json_conversion(self, device, kwargs, tmp_path):
+        source = make_cfp(str(tmp_path / "source.dcm"), device, **kwargs)
+        legacy = str(tmp_path / "legacy.dcm")
+        output = str(tmp_path / "output.dcm")
+
+        legacy_convert_dicom(source, legacy)
+        convert_dicom(source, output)
+
+        with open(legacy, "rb") as f, open(output, "rb") as g:
+            assert f.read() == g.read()
+
+    def test_converted_values(self, tmp_path):
+        source = make_cfp(str(tmp_path / "source.dcm"))
+        output = str(tmp_path / "output.dcm")
+
+        convert_dicom(source, output)
+        ds = pydicom.dcmread(output)
+
+        assert ds.Manufacturer == "Topcon"
+        assert ds.PatientName == ""
+        assert ds.StudyID == ""
+        assert ds.PatientID == "1001"
+        assert ds.StudyDescription == "CFP/IR"
+        assert ds.LensesCodeSequence[0].CodeValue == "R-1021A"
+        assert ds.AnatomicRegionSequence[0].CodeMeaning == "Retina"
+        assert len(ds.IlluminationTypeCodeSequence) == 0
+        assert ds.PixelData == pydicom.dcmread(source).PixelData
+
+    def test_item_missing_an_element(self, tmp_path):
+        source = make_cfp(str(tmp_path / "source.dcm"))
+        ds = pydicom.dcmread(source)
+        del ds.LensesCodeSequence[0].CodeMeaning
+        ds.save_as(source, write_like_original=False)
+        direct = str(tmp_path / "direct.dcm")
+        legacy = str(tmp_path / "legacy.dcm")
+        tags = cfp_ir.header_tags() + cfp_ir.tags() + list(cfp_ir.sequence_tags())
+
+        convert_dicom(source, direct)
+        write_dicom(cfp_ir, extract_dicom_dict(source, tags), legacy)
+
+        for output in (direct, legacy):
+            item = pydicom.dcmread(output).LensesCodeSequence[0]
+            assert item.CodeValue == "R-1021A"
+            assert "CodeMeaning" not in item
+
+    def test_keeps_manufacturer_of_other_devices(self, tmp_path):
+        source = make_cfp(str(tmp_path / "source.dcm"), "Maestro2")
+        output = str(tmp_path / "output.dcm")
+
+        convert_dicom(source, output)
+
+        assert pydicom.dcmread(output).Manufacturer == "Unknown"
+
+
+class TestConvertZipDicoms:
+    """Unit tests for converting every member of many zip files."""
+
+    @pytest.fixture(name="zip_files")
+    def fixture_zip_files(self, tmp_path):
+        """A zip of two CFP files, a text file and a member outside its folder."""
+        cfp = sample_bytes(sop_class_uid=FUNDUS_PHOTO)
+
+        return [
+            write_zip(
+                tmp_path / "Triton_1001.zip",
+                {
+                    "scan/": b"",
+                    "scan/1.2.3.1.1.dcm": cfp,
+                    "scan/notes.txt": b"notes",
+                    "../escape.dcm": cfp,
+                },
+            ),
+            write_zip(tmp_path / "Triton_1002.zip", {"image.dcm": cfp}),
+        ]
+
+    def test_manifest(self, zip_files, tmp_path):
+        output_dir = str(tmp_path / "output")
+
+        manifest = convert_zip_dicoms(zip_files, output_dir, workers=1)
+
+        assert [(row["member"], row["status"]) for row in manifest] == [
+            ("scan/1.2.3.1.1.dcm", "converted"),
+            ("scan/notes.txt", "skipped"),
+            ("image.dcm", "converted"),
+        ]
+
+        converted = manifest[0]
+        assert converted["zip"] == zip_files[0]
+        assert converted["output"] == os.path.join(
+            output_dir, "Triton_1001", "scan", "1.2.3.1.1.dcm"
+        )
+        assert converted["bytes"] == os.path.getsize(converted["output"])
+        assert pydicom.dcmread(converted["output"]).StudyDescription == "CFP/IR"
+
+        assert manifest[1]["error"] == "Not a DICOM file."
+        assert manifest[1]["output"] == ""
+
+    def test_member_outside_folder_is_not_listed(self, zip_files, tmp_path):
+        output_dir = str(tmp_path / "output")
+
+        with zipfile.ZipFile(zip_files[0]) as zip_ref:
+            assert "../escape.dcm" in zip_ref.namelist()
+
+        tasks = list_conversion_tasks(zip_files[:1], output_dir)
+        convert_zip_dicoms(zip_files[:1], output_dir, workers=1)
+
+        assert "../escape.dcm" not in [task[1] for task in tasks]
+        assert not os.path.exists(tmp_path / "escape.dcm")
+        assert not os.path.exists(tmp_path / "output" / "escape.dcm")
+
+    def test_unreadable_zip(self, zip_files, tmp_path):
+        broken = tmp_path / "Triton_1003.zip"
+        broken.write_bytes(b"not a zip archive")
+        missing = str(tmp_path / "Triton_1004.zip")
+
+        manifest = convert_zip_dicoms(
+            zip_files[1:] + [str(broken), missing], str(tmp_path / "output"), workers=1
+        )
+
+        assert [(row["zip"], row["status"]) for row in manifest] == [
+            (str(broken), "error"),
+            (missing, "error"),
+            (zip_files[1], "converted"),
+        ]
+        assert manifest[0]["error"].startswith("BadZipFile:")
+        assert manifest[1]["error"].startswith("FileNotFoundError:")
+
+    def test_zips_are_closed(self, zip_files, tmp_path, monkeypatch):
+        tasks = list_conversion_tasks(zip_files, str(tmp_path / "output"))
+        opened: list = []
+
+        class RecordingZipFile(zipfile.ZipFile):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                opened.append(self)
+
+        monkeypatch.setattr(zipfile, "ZipFile", RecordingZipFile)
+
+        rows = convert_zip_members(tasks)
+
+        assert [row["status"] for row in rows] == ["converted", "skipped", "converted"]
+        assert [zip_ref.filename for zip_ref in opened] == zip_files
+        assert all(zip_ref.fp is None for zip_ref in opened)
+
+    def test_zip_removed_after_listing(self, zip_files, tmp_path):
+        tasks = list_conversion_tasks(zip_files, str(tmp_path / "output"))
+        os.remove(zip_files[0])
+
+        rows = convert_zip_members(tasks)
+
+        assert [row["status"] for row in rows] == ["error", "error", "converted"]
+        assert rows[0]["error"].startswith("FileNotFoundError:")
+
+    def test_flush_errors_in_manifest(self, tmp_path, monkeypatch):
+        zip_file = write_zip(
+            tmp_path / "Triton_1001.zip",
+            {
+                f"{index}.dcm": sample_bytes(sop_class_uid=FUNDUS_PHOTO)
+                for index in range(3)
+            },
+        )
+        tasks = list_conversion_tasks([zip_file], str(tmp_path / "output"))
+        replace = os.replace
+
+        def failing_replace(src, dst):
+            if dst.endswith("1.dcm"):
+                raise OSError("No space left on device")
+            replace(src, dst)
+
+        monkeypatch.setattr(os, "replace", failing_replace)
+        rows = convert_zip_members(tasks, fsync_every=10)
+
+        assert [row["status"] for row in rows] == ["converted", "error", "error"]
+        assert rows[1]["error"] == "OSError: No space left on device"
+        assert rows[1]["output"] == ""
+        assert os.listdir(tmp_path / "output" / "Triton_1001") == ["0.dcm"]
+
+    def test_workers_give_same_output(self, zip_files, tmp_path):
+        serial_dir = str(tmp_path / "serial")
+        parallel_dir = str(tmp_path / "parallel")
+
+        serial = convert_zip_dicoms(zip_files, serial_dir, workers=1, chunksize=1)
+        parallel = convert_zip_dicoms(zip_files, parallel_dir, workers=2, chunksize=1)
+
+        assert without_timings(serial) == [
+            {**row, "output": row["output"].replace(parallel_dir, serial_dir)}
+            for row in without_timings(parallel)
+        ]
+
+        for row in serial:
+            if row["status"] == "converted":
+                with open(row["output"], "rb") as f, open(
+                    row["output"].replace(serial_dir, parallel_dir), "rb"
+                ) as g:
+                    assert f.read() == g.read()
+
+
+class TestConvertDicomMapped:
+    """Unit tests for streaming the pixel data from a memory map."""
+
+    @pytest.mark.parametrize("implicit_vr", [False, True])
+    @pytest.mark.parametrize("bits", [8, 16])
+    def test_matches_convert_dicom(self, implicit_vr, bits, tmp_path):
+        source = make_cfp(
+            str(tmp_path / "source.dcm"),
+            implicit_vr=implicit_vr,
+            bits=bits,
+            rows=100,
+            columns=90,
+        )
+        direct = str(tmp_path / "direct.dcm")
+        mapped = str(tmp_path / "mapped.dcm")
+
+        convert_dicom(source, direct)
+        # a chunk size that does not divide the pixel data
+        convert_dicom_mapped(source, mapped, chunk_size=4097)
+
+        with open(direct, "rb") as f, open(mapped, "rb") as g:
+            assert f.read() == g.read()
+
+    @pytest.mark.parametrize("vr,bits", [("OW", 8), ("OB", 16)])
+    def test_keeps_source_vr(self, vr, bits, tmp_path):
+        source = str(tmp_path / "source.dcm")
+        ds = pydicom.dcmread(make_cfp(source, bits=bits))
+        ds["PixelData"].VR = vr
+        ds.save_as(source, write_like_original=False)
+        direct = str(tmp_path / "direct.dcm")
+        mapped = str(tmp_path / "mapped.dcm")
+
+        convert_dicom(source, direct)
+        convert_dicom_mapped(source, mapped)
+
+        with open(direct, "rb") as f, open(mapped, "rb") as g:
+            assert f.read() == g.read()
+        assert pydicom.dcmread(mapped)["PixelData"].VR == vr
+
+    def test_writer(self, tmp_path):
+        source = make_cfp(str(tmp_path / "source.dcm"), bits=16)
+        direct = str(tmp_path / "direct.dcm")
+        mapped = str(tmp_path / "mapped.dcm")
+
+        convert_dicom(source, direct)
+        with DicomWriter() as writer:
+            convert_dicom(source, mapped, memory_map=True, writer=writer)
+
+        with open(direct, "rb") as f, open(mapped, "rb") as g:
+            assert f.read() == g.read()
+        assert writer.bytes == os.path.getsize(mapped)
+
+    def test_compressed_falls_back(self, tmp_path, monkeypatch):
+        ds = pydicom.dcmread(make_cfp(str(tmp_path / "cfp.dcm")))
+        ds.file_meta.TransferSyntaxUID = pydicom.uid.JPEGBaseline8Bit
+        ds.PixelData = pydicom.encaps.encapsulate([b"\xff\xd8frame\xff\xd9"])
+        ds.save_as(str(tmp_path / "source.dcm"))
+        source = str(tmp_path / "source.dcm")
+        direct = str(tmp_path / "direct.dcm")
+        mapped = str(tmp_path / "mapped.dcm")
+
+        convert_dicom(source, direct)
+
+        def no_map(*args):
+            raise AssertionError("compressed pixel data must not be mapped")
+
+        monkeypatch.setattr(cfpir_converter, "_write_mapped_pixel_data", no_map)
+        convert_dicom_mapped(source, mapped)
+
+        with open(direct, "rb") as f, open(mapped, "rb") as g:
+            assert f.read() == g.read()
+        assert pydicom.dcmread(mapped).PixelData == ds.PixelData
+
+
+class TestConversionCache:
+    """Unit tests for skipping conversions whose input and rules are unchanged."""
+
+    @pytest.fixture(name="zip_files")
+    def fixture_zip_files(self, tmp_path):
+        """A zip of two CFP files and a text file."""
+        return [
+            write_zip(
+                tmp_path / "Triton_1001.zip",
+                {
+                    "a.dcm": sample_bytes(sop_class_uid=FUNDUS_PHOTO),
+                    "b.dcm": sample_bytes(sop_class_uid=FUNDUS_PHOTO),
+                    "notes.txt": b"notes",
+                },
+            )
+        ]
+
+    @staticmethod
+    def convert(zip_files, tmp_path):
+        manifest = convert_zip_dicoms(
+            zip_files,
+            str(tmp_path / "output"),
+            workers=1,
+            cache=ConversionCache(str(tmp_path / "cache.jsonl")),
+        )
+        return [row["status"] for row in manifest]
+
+    def test_skips_unchanged(self, zip_files, tmp_path):
+        assert self.convert(zip_files, tmp_path) == [
+            "converted",
+            "converted",
+            "skipped",
+        ]
+
+        output = tmp_path / "output" / "Triton_1001" / "a.dcm"
+        mtime = os.stat(output).st_mtime_ns
+
+        assert self.convert(zip_files, tmp_path) == [
+            "unchanged",
+            "unchanged",
+            "skipped",
+        ]
+        assert os.stat(output).st_mtime_ns == mtime
+
+    def test_torn_last_line(self, zip_files, tmp_path):
+        self.convert(zip_files, tmp_path)
+
+        with open(tmp_path / "cache.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"output": "')
+
+        cache = ConversionCache(str(tmp_path / "cache.jsonl"))
+
+        assert len(cache.records) == 2
+        assert self.convert(zip_files, tmp_path) == [
+            "unchanged",
+            "unchanged",
+            "skipped",
+        ]
+
+    def test_compact(self, zip_files, tmp_path):
+        self.convert(zip_files, tmp_path)
+        os.remove(tmp_path / "output" / "Triton_1001" / "a.dcm")
+        self.convert(zip_files, tmp_path)
+
+        cache = ConversionCache(str(tmp_path / "cache.jsonl"))
+        records = dict(cache.records)
+
+        with open(cache.path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 3
+
+        cache.compact()
+
+        with open(cache.path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 2
+        assert ConversionCache(cache.path).records == records
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+    def test_output_modified(self, zip_files, tmp_path):
+        self.convert(zip_files, tmp_path)
+        (tmp_path / "output" / "Triton_1001" / "a.dcm").write_bytes(b"truncated")
+
+        assert self.convert(zip_files, tmp_path) == [
+            "converted",
+            "unchanged",
+            "skipped",
+        ]
+
+    def test_output_deleted(self, zip_files, tmp_path):
+        self.convert(zip_files, tmp_path)
+        os.remove(tmp_path / "output" / "Triton_1001" / "b.dcm")
+
+        assert self.convert(zip_files, tmp_path) == [
+            "unchanged",
+            "converted",
+            "skipped",
+        ]
+        assert os.path.exists(tmp_path / "output" / "Triton_1001" / "b.dcm")
+
+    def test_source_changed(self, zip_files, tmp_path):
+        self.convert(zip_files, tmp_path)
+        write_zip(
+            zip_files[0],
+            {
+                "a.dcm": sample_bytes(sop_class_uid=FUNDUS_PHOTO),
+                "b.dcm": sample_bytes(sop_class_uid=FUNDUS_PHOTO),
+            },
+        )
+
+        assert self.convert(zip_files, tmp_path) == ["converted", "converted"]
+
+    def test_rule_fingerprint_changed(self, zip_files, tmp_path, monkeypatch):
+        self.convert(zip_files, tmp_path)
+        monkeypatch.setattr(
+            cfpir_converter.conversion_rules, "fingerprint", "other rules"
+        )
+
+        assert self.convert(zip_files, tmp_path) == [
+            "converted",
+            "converted",
+            "skipped",
+        ]
+        assert self.convert(zip_files, tmp_path) == [
+            "unchanged",
+            "unchanged",
+            "skipped",
+        ]
+
+    def test_clear(self, zip_files, tmp_path):
+        self.convert(zip_files, tmp_path)
+        cache = ConversionCache(str(tmp_path / "cache.jsonl"))
+        cache.clear()
+
+        assert cache.records == {}
+        assert not os.path.exists(cache.path)
+
+    def test_shared_cache(self, tmp_path):
+        path = str(tmp_path / "cache.jsonl")
+
+        assert get_conversion_cache(path) is get_conversion_cache(os.path.relpath(path))
+
+    def test_single_zip(self, zip_files, tmp_path):
+        output = str(tmp_path / "a.dcm")
+        cache = ConversionCache(str(tmp_path / "cache.jsonl"))
+
+        convert_zip_dicom(zip_files[0], output, cache=cache)
+        mtime = os.stat(output).st_mtime_ns
+        convert_zip_dicom(zip_files[0], output, cache=cache)
+
+        assert os.stat(output).st_mtime_ns == mtime
+        assert list(cache.records) == [output]
+
+
+class TestConversionRules:
+    """Unit tests for dispatching conversions to the rule of each SOP class."""
+
+    @pytest.mark.parametrize(
+        "sop_class_uid, name, description",
+        [
+            (FUNDUS_PHOTO, "CFP IR", "CFP/IR"),
+            (OCT_BSCAN, "OCT", "OCT"),
+            (VOLUME_ANALYSIS, "OCTA", "OCTA"),
+            (EN_FACE, "En face", "En face"),
+            (SURFACE_SEGMENTATION, "Surface segmentation", "Segmentation"),
+        ],
+    )
+    def test_dispatch(self, sop_class_uid, name, description, tmp_path):
+        zip_file = write_zip(
+            tmp_path / "scan.zip",
+            {"image.dcm": sample_bytes(sop_class_uid=sop_class_uid)},
+        )
+
+        (row,) = convert_zip_dicoms([zip_file], str(tmp_path / "output"), workers=1)
+
+        assert conversion_rules.rule_for(sop_class_uid).name == name
+        assert row["status"] == "converted", row["error"]
+        assert pydicom.dcmread(row["output"]).StudyDescription == description
+
+    def test_surface_segmentation_without_pixel_data(self, tmp_path):
+        source = write_sample(
+            str(tmp_path / "source.dcm"), sop_class_uid=SURFACE_SEGMENTATION
+        )
+        direct = str(tmp_path / "direct.dcm")
+        mapped = str(tmp_path / "mapped.dcm")
+
+        convert_dicom(source, direct)
+        convert_dicom(source, mapped, memory_map=True)
+        ds = pydicom.dcmread(direct)
+
+        assert "PixelData" not in ds
+        assert ds.PatientName == ""
+        assert (
+            ds.ReferencedSeriesSequence[0].ReferencedInstanceSequence[0]
+            == pydicom.dcmread(source)
+            .ReferencedSeriesSequence[0]
+            .ReferencedInstanceSequence[0]
+        )
+        with open(direct, "rb") as f, open(mapped, "rb") as g:
+            assert f.read() == g.read()
+
+    def test_no_rule_row(self, tmp_path):
+        zip_file = write_zip(
+            tmp_path / "scan.zip",
+            {
+                "other.dcm": sample_bytes(sop_class_uid="1.2.3.4"),
+                "image.dcm": sample_bytes(sop_class_uid=FUNDUS_PHOTO),
+            },
+        )
+
+        rows = convert_zip_dicoms([zip_file], str(tmp_path / "output"), workers=1)
+
+        assert [row["status"] for row in rows] == ["error", "converted"]
+        assert rows[0]["error"] == "No conversion rule for SOP class 1.2.3.4."
+        assert rows[0]["output"] == ""
+        assert os.listdir(tmp_path / "output" / "scan") == ["image.dcm"]
+
+    def test_no_rule_raises(self, tmp_path, capsys):
+        source = write_sample(str(tmp_path / "source.dcm"), sop_class_uid="1.2.3.4")
+
+        assert conversion_rules.default is None
+        with pytest.raises(ValueError):
+            convert_dicom(source, str(tmp_path / "output.dcm"))
+
+        assert "No conversion rule for SOP class 1.2.3.4." in capsys.readouterr().out
+
+    def test_single_zip_uses_rule_of_sop_class(self, tmp_path):
+        zip_file = write_zip(
+            tmp_path / "scan.zip", {"image.dcm": sample_bytes(sop_class_uid=OCT_BSCAN)}
+        )
+        output = str(tmp_path / "output.dcm")
+
+        convert_zip_dicom(zip_file, output)
+
+        assert pydicom.dcmread(output).StudyDescription == "OCT"
+
+    def test_single_zip_without_rule(self, tmp_path, capsys):
+        zip_file = write_zip(
+            tmp_path / "scan.zip", {"other.dcm": sample_bytes(sop_class_uid="1.2.3.4")}
+        )
+        output = str(tmp_path / "output.dcm")
+
+        convert_zip_dicom(zip_file, output)
+
+        assert not os.path.exists(output)
+        assert "No conversion rule for SOP class 1.2.3.4." in capsys.readouterr().out
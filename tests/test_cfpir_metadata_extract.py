@@ -0,0 +1,177 @@
+"""Unit tests for pyfairdatatools.cfpir_metadata_extract module."""
+
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+
+# the DICOM modules import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "pyfairdatatools"))
+
+# pylint: disable=wrong-import-position,import-error
+import cfpir_metadata_extract  # noqa: E402
+from cfpir_metadata_extract import (  # noqa: E402
+    METADATA_COLUMNS,
+    export_dicom_metadata,
+    read_dicom_metadata,
+    save_dicom_info_as_tsv,
+)
+
+from tests.dicom_samples import FUNDUS_PHOTO, make_dataset, write_sample  # noqa: E402
+
+
+@pytest.fixture(name="files")
+def fixture_files(tmp_path):
+    """A fundus photo, a B-scan lacking some elements, a text file and a missing one."""
+    partial = make_dataset()
+    del partial.AcquisitionDateTime
+    del partial.Manufacturer
+    partial.save_as(str(tmp_path / "partial.dcm"), write_like_original=False)
+    (tmp_path / "notes.dcm").write_text("not DICOM")
+
+    return [
+        write_sample(str(tmp_path / "fundus.dcm"), sop_class_uid=FUNDUS_PHOTO),
+        str(tmp_path / "partial.dcm"),
+        str(tmp_path / "notes.dcm"),
+        str(tmp_path / "missing.dcm"),
+    ]
+
+
+def read_tsv(file_path):
+    with open(file_path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f, delimiter="\t"))
+
+
+class TestReadDicomMetadata:
+    """Unit tests for reading the metadata row of one file."""
+
+    def test_dicom_row(self, files):
+        assert read_dicom_metadata(files[0]) == {
+            "domain": "DICOM",
+            "modality": "CFP/IR",
+            "patient_id": "1001",
+            "laterality": "R",
+            "manufacturer": "Topcon",
+            "filepath": os.path.abspath(files[0]),
+            "acquisitiondatetime": "20230101120000",
+        }
+
+    def test_missing_elements_are_empty(self, files):
+        row = read_dicom_metadata(files[1])
+
+        assert row["domain"] == "DICOM"
+        assert row["modality"] == "not CFP/IR"
+        assert row["manufacturer"] == ""
+        assert row["acquisitiondatetime"] == ""
+
+    def test_not_dicom(self, files):
+        row = read_dicom_metadata(files[2])
+
+        assert row["domain"] == "Not DICOM"
+        assert row["filepath"] == os.path.abspath(files[2])
+        assert row["patient_id"] == ""
+
+    def test_unreadable_file(self, files):
+        row = read_dicom_metadata(files[3])
+
+        assert row["domain"].startswith("Error: FileNotFoundError:")
+        assert row["filepath"] == os.path.abspath(files[3])
+        assert list(row) == METADATA_COLUMNS
+
+
+class TestExportDicomMetadata:
+    """Unit tests for exporting the metadata of many files."""
+
+    def test_tsv(self, files, tmp_path):
+        output = str(tmp_path / "metadata.tsv")
+
+        assert export_dicom_metadata(files, output, workers=1) == 4
+
+        rows = read_tsv(output)
+
+        assert rows == [read_dicom_metadata(file) for file in files]
+        assert not os.path.exists(output + ".checkpoint")
+
+    def test_workers_give_same_output(self, files, tmp_path):
+        serial = str(tmp_path / "serial.jsonl")
+        parallel = str(tmp_path / "parallel.jsonl")
+
+        export_dicom_metadata(files, serial, workers=1)
+        export_dicom_metadata(files, parallel, workers=2, chunksize=1)
+
+        with open(serial, encoding="utf-8") as f, open(parallel, encoding="utf-8") as g:
+            assert f.read() == g.read()
+
+    def test_resume_after_interruption(self, files, tmp_path, monkeypatch):
+        output = str(tmp_path / "metadata.jsonl")
+        read = cfpir_metadata_extract.read_dicom_metadata
+        calls: list = []
+
+        def interrupted(file):
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            calls.append(file)
+            return read(file)
+
+        monkeypatch.setattr(cfpir_metadata_extract, "read_dicom_metadata", interrupted)
+
+        with pytest.raises(KeyboardInterrupt):
+            export_dicom_metadata(files, output, workers=1, checkpoint_every=2)
+
+        with open(output + ".checkpoint", encoding="utf-8") as f:
+            assert json.load(f)["done"] == 2
+
+        calls.clear()
+        monkeypatch.setattr(cfpir_metadata_extract, "read_dicom_metadata", read)
+
+        assert export_dicom_metadata(files, output, workers=1) == 4
+
+        with open(output, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+
+        assert rows == [read(file) for file in files]
+        assert not os.path.exists(output + ".checkpoint")
+
+    def test_checkpoint_of_other_files_is_ignored(self, files, tmp_path):
+        output = str(tmp_path / "metadata.tsv")
+        export_dicom_metadata(files[:2], output, workers=1)
+
+        with open(output + ".checkpoint", "w", encoding="utf-8") as f:
+            json.dump({"digest": "other", "done": 2, "size": 10}, f)
+
+        assert export_dicom_metadata(files, output, workers=1) == 4
+        assert len(read_tsv(output)) == 4
+
+    def test_parquet(self, files, tmp_path):
+        pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+        output = str(tmp_path / "metadata.parquet")
+
+        export_dicom_metadata(files, output, workers=1)
+
+        table = pyarrow_parquet.read_table(output)
+
+        assert table.column_names == METADATA_COLUMNS
+        assert table.to_pylist() == [read_dicom_metadata(file) for file in files]
+        assert not os.path.exists(output + ".partial.jsonl")
+
+    def test_invalid_format(self, files, tmp_path):
+        with pytest.raises(ValueError):
+            export_dicom_metadata(
+                files, str(tmp_path / "metadata.tsv"), output_format="csv"
+            )
+
+    def test_save_dicom_info_as_tsv(self, files, tmp_path):
+        output = str(tmp_path / "metadata.tsv")
+
+        save_dicom_info_as_tsv(files, output)
+
+        assert [row["domain"] for row in read_tsv(output)] == [
+            "DICOM",
+            "DICOM",
+            "Not DICOM",
+            read_dicom_metadata(files[3])["domain"],
+        ]
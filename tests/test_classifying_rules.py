@@ -0,0 +1,906 @@
+"""Unit tests for pyfairdatatools.classifying_rules module."""
+
+import os
+import random
+import sys
+import zipfile
+from typing import Dict
+
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+pytest.importorskip("xmltodict")
+pytest.importorskip("defusedxml")
+
+# the DICOM modules import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "pyfairdatatools"))
+
+# pylint: disable=wrong-import-position,import-error
+import classifying_rules  # noqa: E402
+from classifying_rules import (  # noqa: E402
+    DICOM_COLUMNS,
+    ClassifyingRule,
+    DicomEntry,
+    FolderFileCounts,
+    RuleEngine,
+    extract_dicom_columns,
+    extract_dicom_entry,
+    find_dicom_member,
+    get_dicom_summary,
+    load_rules,
+    match_rule,
+    process_dicom_zip,
+    read_dicom_header,
+    save_rules,
+)
+
+from tests.dicom_samples import (  # noqa: E402
+    EN_FACE,
+    FUNDUS_PHOTO,
+    OCT_BSCAN,
+    SURFACE_SEGMENTATION,
+    VOLUME_ANALYSIS,
+    sample_bytes,
+    write_sample,
+)
+
+SAMPLE_CLASSES = [
+    FUNDUS_PHOTO,
+    OCT_BSCAN,
+    VOLUME_ANALYSIS,
+    SURFACE_SEGMENTATION,
+    EN_FACE,
+]
+
+
+class LegacyRule:
+    def __init__(self, name, conditions):
+        self.name = name
+        self.conditions = conditions
+
+    def apply(self, dicom_entry):
+        for condition in self.conditions:
+            if not condition(dicom_entry):
+                return False
+        return True
+
+
+# The lambda rules classifying_rules used before the rule file
+LEGACY_RULES = [
+    # optomed
+    LegacyRule(
+        "OptoMed_CFP_Disc_or_Mac_centered",
+        conditions=[lambda entry: "Aurora" == entry.device],
+    ),
+    # eidon
+    LegacyRule(
+        "Eidon_UWF_Central_IR",
+        conditions=[
+            lambda entry: "0-infrared" in entry.filename.lower()
+            and "Eidon" in entry.device
+        ],
+    ),
+    LegacyRule(
+        "Eidon_UWF_Central_FAF",
+        conditions=[
+            lambda entry: "0-af-" in entry.filename.lower() and "Eidon" in entry.device
+        ],
+    ),
+    LegacyRule(
+        "Eidon_UWF_Central_CFP",
+        conditions=[
+            lambda entry: "0-visible" in entry.filename.lower()
+            and "Eidon" in entry.device
+        ],
+    ),
+    LegacyRule(
+        "Eidon_UWF_Nasal_CFP",
+        conditions=[
+            lambda entry: "3-visible" in entry.filename.lower()
+            and "Eidon" in entry.device
+        ],
+    ),
+    LegacyRule(
+        "Eidon_UWF_Temporal_CFP",
+        conditions=[
+            lambda entry: "4-visible" in entry.filename.lower()
+            and "Eidon" in entry.device
+        ],
+    ),
+    LegacyRule(
+        "Eidon_UWF_Mosaic_CFP",
+        conditions=[
+            lambda entry: "11-visible" in entry.filename.lower()
+            and "Eidon" in entry.device
+        ],
+    ),
+    # maestro
+    LegacyRule(
+        "Maestro2_3D_Wide_OCT",
+        conditions=[
+            lambda entry: "3DOCT-1Maestro2" == entry.device
+            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
+            and str(entry.slicethickness).startswith("0.07")
+        ],
+    ),
+    LegacyRule(
+        "Maestro2_3D_Macula_OCT",
+        conditions=[
+            lambda entry: "3DOCT-1Maestro2" == entry.device
+            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
+            and str(entry.slicethickness).startswith("0.04")
+        ],
+    ),
+    LegacyRule(
+        "Maestro2_Mac_6x6-360x360_OCTA",
+        conditions=[
+            lambda entry: entry.device == "3DOCT-1Maestro2"
+            and "fo-dicom 4.0.8" == entry.implementationversion
+            and str(entry.slicethickness).startswith("0.01")
+            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
+            and entry.filename.endswith(".1.1.dcm")
+        ],
+    ),
+    # triton
+    LegacyRule(
+        "Triton_3D(H)_Radial_OCT",
+        conditions=[
+            lambda entry: "fo-dicom 4.0.8" == entry.implementationversion
+            and "1.2.840.10008.5.1.4.1.1.77.1.5.4" == entry.sopclassuid
+            and str(entry.slicethickness).startswith("0.03")
+            and "Triton plus" == entry.device
+        ],
+    ),
+    LegacyRule(
+        "Triton_Macula_6*6_OCTA",
+        conditions=[
+            lambda entry: entry.device == "Triton plus"
+            and str(entry.slicethickness).startswith("0.01")
+            and "fo-dicom 4.0.8" == entry.implementationversion
+            and entry.filename.endswith(".1.1.dcm")
+        ],
+    ),
+    LegacyRule(
+        "Triton_Macula_12*12_OCTA",
+        conditions=[
+            lambda entry: entry.device == "Triton plus"
+            and str(entry.slicethickness).startswith("0.02")
+            and "fo-dicom 4.0.8" == entry.implementationversion
+            and entry.filename.endswith(".1.1.dcm")
+        ],
+    ),
+    # #spectralis
+    LegacyRule(
+        "Spec_ONH_RC_HR_OCT",
+        conditions=[
+            lambda entry: entry.device == "Spectralis"
+            and (not isinstance(entry.framenumber, str))
+            and (26 <= int(entry.framenumber) <= 28)
+            and str(entry.rows) == "496"
+            and str(entry.columns) == "768"
+            and entry.slicethickness == ""
+        ],
+    ),
+    LegacyRule(
+        "Spec_ONH_RC_HR_OCT_reference_IR",
+        conditions=[
+            lambda entry: entry.device == "Spectralis"
+            and str(entry.rows) == "1536"
+            and str(entry.columns) == "1536"
+        ],
+    ),
+    LegacyRule(
+        "Spec_PPole_Mac_HR_OCT",
+        conditions=[
+            lambda entry: entry.device == "Spectralis"
+            and (not isinstance(entry.framenumber, str))
+            and (60 <= int(entry.framenumber) <= 62)
+            and str(entry.rows) == "496"
+            and str(entry.columns) == "768"
+        ],
+    ),
+    LegacyRule(
+        "Spec_PPole_Mac_HR_OCT_reference_IR",
+        conditions=[
+            lambda entry: entry.device == "Spectralis"
+            and str(entry.rows) == "768"
+            and str(entry.columns) == "768"
+            and str(entry.privatetag) == "N/A"
+            and str(entry.gaze) == "R-1022D"
+        ],
+    ),
+    LegacyRule(
+        "Spec-Mac-20x20-HS_OCTA_reference_Bscan",
+        conditions=[
+            lambda entry: entry.device == "Spectralis"
+            and (not isinstance(entry.framenumber, str))
+            and (511 <= int(entry.framenumber) <= 513)
+            and str(entry.rows) == "496"
+            and str(entry.columns) == "512"
+        ],
+    ),
+    LegacyRule(
+        "Spec-Mac-20x20-HS_OCTA_reference_IR",
+        conditions=[
+            lambda entry: entry.device == "Spectralis"
+            and str(entry.rows) == "768"
+            and str(entry.columns) == "768"
+            and str(entry.privatetag) == "Super Slim"
+        ],
+    )
+    # OCTA
+    # FLIO
+]
+
+
+def legacy_match(entry):
+    matching_rules = [rule for rule in LEGACY_RULES if rule.apply(entry)]
+    if matching_rules:
+        return str(matching_rules[0].name)
+    return "No rules apply."
+
+
+def make_entry(**values):
+    """Return a DicomEntry of an OCT B-scan, with the given fields replaced."""
+    fields = {
+        "filename": "1.2.3.2.1.dcm",
+        "patientid": "1001",
+        "sopclassuid": OCT_BSCAN,
+        "sopinstanceuid": "1.2.3",
+        "laterality": "R",
+        "rows": 496,
+        "columns": 768,
+        "device": "Spectralis",
+        "framenumber": 61,
+        "referencedsopinstance": "1.2.4",
+        "slicethickness": "",
+        "implementationversion": "fo-dicom 4.0.8",
+        "gaze": "N/A",
+        "privatetag": "N/A",
+        "softwareversion": "1.0",
+        "numberoffiles": 1,
+    }
+    fields.update(values)
+
+    return DicomEntry(*(fields[field] for field in DicomEntry.__slots__))
+
+
+def legacy_dicom_entry(file):
+    """Read a DicomEntry the way extract_dicom_entry did before header-only reads."""
+    # pylint: disable=too-many-statements
+    dicom = pydicom.dcmread(file).to_json_dict()
+    ds = pydicom.dcmread(file)
+
+    filename = os.path.basename(file)
+    patientid = dicom["00100020"]["Value"][0]
+    sopclassuid = dicom["00080016"]["Value"][0]
+    sopinstanceuid = dicom["00080018"]["Value"][0]
+
+    folder_path = os.path.dirname(file)
+    filecount = len(
+        [
+            f
+            for f in os.listdir(folder_path)
+            if os.path.isfile(os.path.join(folder_path, f))
+        ]
+    )
+    implementationversion = ds.file_meta.ImplementationVersionName
+    rows = columns = device = framenumber = referencedsopinstance = "N/A"
+    slicethickness = privatetag = gaze = softwareversion = "N/A"
+
+    if sopclassuid == FUNDUS_PHOTO:
+        rows = dicom["00280010"]["Value"][0]
+        columns = dicom["00280011"]["Value"][0]
+        laterality = dicom["00200062"]["Value"][0]
+        device = dicom["00081090"]["Value"][0]
+        softwareversion = dicom["00181020"]["Value"][0]
+        if "00511017" in dicom:
+            privatetag = dicom["00511017"]["Value"][0]
+        if "00220006" in dicom and "00080100" in dicom["00220006"]["Value"][0]:
+            gaze = dicom["00220006"]["Value"][0]["00080100"]["Value"][0]
+    elif sopclassuid == OCT_BSCAN:
+        shared = dicom["52009229"]["Value"][0]
+        rows = dicom["00280010"]["Value"][0]
+        columns = dicom["00280011"]["Value"][0]
+        laterality = dicom["00200062"]["Value"][0]
+        device = dicom["00081090"]["Value"][0]
+        framenumber = dicom["00280008"]["Value"][0]
+        softwareversion = dicom["00181020"]["Value"][0]
+        referencedsopinstance = shared["00081140"]["Value"][0]["00081155"]["Value"][0]
+        slicethickness = shared["00289110"]["Value"][0]["00180050"]["Value"][0]
+    elif sopclassuid == VOLUME_ANALYSIS:
+        shared = dicom["52009229"]["Value"][0]
+        laterality = shared["00209071"]["Value"][0]["00209072"]["Value"][0]
+        rows = dicom["00280010"]["Value"][0]
+        columns = dicom["00280011"]["Value"][0]
+        framenumber = dicom["00280008"]["Value"][0]
+        device = dicom["00081090"]["Value"][0]
+        slicethickness = shared["00289110"]["Value"][0]["00180050"]["Value"][0]
+        referencedsopinstance = dicom["00200052"]["Value"][0]
+    elif sopclassuid == SURFACE_SEGMENTATION:
+        laterality = dicom["00200062"]["Value"][0]
+        device = dicom["00081090"]["Value"][0]
+        referencedsopinstance = dicom["00081115"]["Value"][0]["0008114A"]["Value"][0][
+            "00081155"
+        ]["Value"][0]
+    else:
+        laterality = dicom["00200062"]["Value"][0]
+        rows = dicom["00280010"]["Value"][0]
+        columns = dicom["00280011"]["Value"][0]
+        device = dicom["00081090"]["Value"][0]
+        referencedsopinstance = dicom["00082112"]["Value"][0]["00081155"]["Value"][0]
+
+    return DicomEntry(
+        filename,
+        patientid,
+        sopclassuid,
+        sopinstanceuid,
+        laterality,
+        rows,
+        columns,
+        device,
+        framenumber,
+        referencedsopinstance,
+        slicethickness,
+        implementationversion,
+        gaze,
+        privatetag,
+        softwareversion,
+        filecount,
+    )
+
+
+@pytest.fixture(name="samples")
+def fixture_samples(tmp_path):
+    """Write a sample of every classified SOP class, each in its own folder."""
+    samples = {}
+
+    for index, sop_class_uid in enumerate(SAMPLE_CLASSES):
+        folder = tmp_path / str(index)
+        folder.mkdir()
+        samples[sop_class_uid] = write_sample(
+            str(folder / "sample.dcm"), sop_class_uid=sop_class_uid, frames=3
+        )
+
+    return samples
+
+
+class TestDicomHeader:
+    """Unit tests for reading DicomEntry values from the header only."""
+
+    @pytest.mark.parametrize("sop_class_uid", SAMPLE_CLASSES)
+    def test_matches_full_read(self, samples, sop_class_uid):
+        file = samples[sop_class_uid]
+
+        assert extract_dicom_entry(file) == legacy_dicom_entry(file)
+
+    def test_header_has_no_pixel_data(self, samples):
+        ds = read_dicom_header(samples[OCT_BSCAN])
+
+        assert "PixelData" not in ds
+        assert ds.SOPClassUID == OCT_BSCAN
+
+    def test_value_types(self, samples):
+        bscan = extract_dicom_entry(samples[OCT_BSCAN])
+        fundus = extract_dicom_entry(samples[FUNDUS_PHOTO])
+
+        assert bscan.slicethickness == 0.0703125
+        assert isinstance(bscan.slicethickness, float)
+        assert bscan.framenumber == 3
+        assert isinstance(bscan.framenumber, int)
+        assert fundus.gaze == "R-1022D"
+        assert fundus.privatetag == "N/A"
+        assert fundus.numberoffiles == 1
+
+    def test_sequence_values(self, samples):
+        volume = extract_dicom_entry(samples[VOLUME_ANALYSIS])
+        segmentation = extract_dicom_entry(samples[SURFACE_SEGMENTATION])
+        en_face = extract_dicom_entry(samples[EN_FACE])
+
+        assert volume.laterality == "R"
+        assert (
+            volume.referencedsopinstance
+            == pydicom.dcmread(samples[VOLUME_ANALYSIS]).FrameOfReferenceUID
+        )
+        assert segmentation.rows == "N/A"
+        assert segmentation.referencedsopinstance == (
+            pydicom.dcmread(samples[SURFACE_SEGMENTATION])
+            .ReferencedSeriesSequence[0]
+            .ReferencedInstanceSequence[0]
+            .ReferencedSOPInstanceUID
+        )
+        assert en_face.referencedsopinstance == (
+            pydicom.dcmread(samples[EN_FACE])
+            .SourceImageSequence[0]
+            .ReferencedSOPInstanceUID
+        )
+
+    def test_unknown_sop_class(self, tmp_path):
+        file = write_sample(str(tmp_path / "other.dcm"), sop_class_uid="1.2.3.4")
+
+        entry = extract_dicom_entry(file)
+
+        assert entry.sopinstanceuid == "Unknown SOP Class UID: 1.2.3.4"
+        assert entry.device == "N/A"
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            extract_dicom_entry(str(tmp_path / "missing.dcm"))
+
+    def test_private_tag(self, tmp_path):
+        ds = pydicom.dcmread(
+            write_sample(str(tmp_path / "fundus.dcm"), sop_class_uid=FUNDUS_PHOTO)
+        )
+        ds.add_new(0x00511017, "LO", "Super Slim")
+        ds.save_as(str(tmp_path / "fundus.dcm"))
+
+        entry = classifying_rules.extract_dicom_entry(str(tmp_path / "fundus.dcm"))
+
+        assert entry.privatetag == "Super Slim"
+
+
+class TestFindDicomMember:
+    """Unit tests for picking the DICOM member of a zip archive."""
+
+    def test_single_dicom_file(self):
+        assert (
+            find_dicom_member(["scan/", "scan/image.dcm", "scan/notes.txt"])
+            == "scan/image.dcm"
+        )
+
+    def test_prefers_first_frame_file(self):
+        names = ["scan/1.2.3.2.1.dcm", "scan/1.2.3.1.1.dcm", "scan/1.2.3.3.1.dcm"]
+
+        assert find_dicom_member(names) == "scan/1.2.3.1.1.dcm"
+
+    def test_skips_macosx_resource_forks(self):
+        names = ["__MACOSX/scan/._image.dcm", "scan/image.dcm"]
+
+        assert find_dicom_member(names) == "scan/image.dcm"
+        assert find_dicom_member(["__MACOSX/scan/._1.2.1.1.dcm"]) is None
+
+    def test_skips_hidden_first_frame_files(self):
+        names = ["scan/.1.2.1.1.dcm", "scan/a.dcm", "scan/b.dcm"]
+
+        assert find_dicom_member(names) is None
+
+    def test_no_dicom_file(self):
+        assert find_dicom_member(["scan/notes.txt"]) is None
+        assert find_dicom_member(["scan/a.dcm", "scan/b.dcm"]) is None
+
+
+class TestDicomZip:
+    """Unit tests for classifying a DICOM zip without extracting it."""
+
+    @staticmethod
+    def write_zip(file_path, members):
+        with zipfile.ZipFile(file_path, "w") as zip_ref:
+            for name, data in members.items():
+                zip_ref.writestr(name, data)
+
+        return str(file_path)
+
+    def test_matches_extracted_file(self, tmp_path):
+        data = sample_bytes(sop_class_uid=OCT_BSCAN)
+        zip_path = self.write_zip(
+            tmp_path / "scan.zip",
+            {"scan/": b"", "scan/1.2.3.1.1.dcm": data, "scan/1.2.3.2.1.dcm": data},
+        )
+        extracted = tmp_path / "scan"
+        extracted.mkdir()
+        (extracted / "1.2.3.1.1.dcm").write_bytes(data)
+        (extracted / "1.2.3.2.1.dcm").write_bytes(data)
+
+        summary = process_dicom_zip(zip_path, raise_errors=True)
+
+        assert summary == get_dicom_summary(str(extracted / "1.2.3.1.1.dcm"))
+        assert summary["protocol"] == "Maestro2_3D_Wide_OCT"
+
+    def test_counts_files_of_member_folder(self, tmp_path, monkeypatch):
+        filecounts = []
+        dicom_entry_from_dataset = classifying_rules.dicom_entry_from_dataset
+
+        def spy(ds, filename, filecount):
+            filecounts.append(filecount)
+            return dicom_entry_from_dataset(ds, filename, filecount)
+
+        monkeypatch.setattr(classifying_rules, "dicom_entry_from_dataset", spy)
+        zip_path = self.write_zip(
+            tmp_path / "scan.zip",
+            {
+                "scan/": b"",
+                "scan/1.2.3.1.1.dcm": sample_bytes(),
+                "scan/1.2.3.2.1.dcm": b"",
+                "scan/notes.txt": b"",
+                "scan/nested/": b"",
+                "scan/nested/other.dcm": b"",
+                "other.txt": b"",
+            },
+        )
+
+        process_dicom_zip(zip_path, raise_errors=True)
+
+        assert filecounts == [3]
+
+    def test_no_dicom_member(self, tmp_path, capsys):
+        zip_path = self.write_zip(tmp_path / "scan.zip", {"notes.txt": b""})
+
+        assert process_dicom_zip(zip_path) is None
+        assert "no DICOM file" in capsys.readouterr().out
+
+        with pytest.raises(ValueError):
+            process_dicom_zip(zip_path, raise_errors=True)
+
+
+class TestRuleEngine:
+    """Unit tests for dispatching entries through the indexed rules."""
+
+    @pytest.fixture(name="rule_list")
+    def fixture_rule_list(self):
+        """Rules spread over every (device, sopclassuid) bucket."""
+        specs = [
+            {"name": "first frame", "filename endswith": ".1.1.dcm"},
+            {"name": "spectralis", "device ==": "Spectralis", "rows between": [1, 500]},
+            {"name": "oct", "sopclassuid ==": OCT_BSCAN, "columns ==": 768},
+            {
+                "name": "spectralis oct",
+                "device ==": "Spectralis",
+                "sopclassuid ==": OCT_BSCAN,
+            },
+            {"name": "any", "patientid startswith": "1"},
+        ]
+
+        return [ClassifyingRule.from_spec(spec) for spec in specs]
+
+    @staticmethod
+    def linear_match(rule_list, entry):
+        for rule in rule_list:
+            if rule.apply(entry):
+                return rule.name
+        return None
+
+    @pytest.mark.parametrize(
+        "values, expected",
+        [
+            ({"filename": "1.2.3.1.1.dcm"}, "first frame"),
+            ({}, "spectralis"),
+            ({"rows": 768}, "oct"),
+            ({"rows": 768, "columns": 512}, "spectralis oct"),
+            ({"device": "Cirrus"}, "oct"),
+            ({"device": "Cirrus", "sopclassuid": FUNDUS_PHOTO}, "any"),
+            ({"device": "Cirrus", "columns": 512, "patientid": "2001"}, None),
+        ],
+    )
+    def test_first_match_across_buckets(self, rule_list, values, expected):
+        entry = make_entry(**values)
+        rule = RuleEngine(rule_list).match(entry)
+
+        assert (rule.name if rule else None) == expected
+        assert self.linear_match(rule_list, entry) == expected
+
+    def test_candidates(self, rule_list):
+        engine = RuleEngine(rule_list)
+
+        assert [rule.name for rule in engine.candidates(make_entry())] == [
+            "first frame",
+            "spectralis",
+            "oct",
+            "spectralis oct",
+            "any",
+        ]
+        assert [
+            rule.name for rule in engine.candidates(make_entry(device="Cirrus"))
+        ] == ["first frame", "oct", "any"]
+        assert [
+            rule.name
+            for rule in engine.candidates(
+                make_entry(device="Cirrus", sopclassuid=FUNDUS_PHOTO)
+            )
+        ] == ["first frame", "any"]
+
+    def test_report_ambiguous(self, rule_list, capsys):
+        engine = RuleEngine(rule_list)
+        entry = make_entry(filename="scan.1.1.dcm")
+
+        assert engine.match(entry, report_ambiguous=True).name == "first frame"
+        assert capsys.readouterr().out == (
+            "Warning: scan.1.1.dcm matches several rules (first frame, spectralis,"
+            " oct, spectralis oct, any), using first frame.\n"
+        )
+
+        entry = make_entry(device="Cirrus", sopclassuid=FUNDUS_PHOTO)
+
+        assert engine.match(entry, report_ambiguous=True).name == "any"
+        assert capsys.readouterr().out == ""
+
+    def test_report_ambiguous_once_per_combination(self, rule_list, capsys):
+        engine = RuleEngine(rule_list)
+
+        engine.match(make_entry(filename="scan.1.1.dcm"), report_ambiguous=True)
+        capsys.readouterr()
+        engine.match(make_entry(filename="other.1.1.dcm"), report_ambiguous=True)
+
+        assert capsys.readouterr().out == ""
+
+        engine.match(make_entry(), report_ambiguous=True)
+
+        assert capsys.readouterr().out == (
+            "Warning: 1.2.3.2.1.dcm matches several rules (spectralis, oct,"
+            " spectralis oct, any), using spectralis.\n"
+        )
+
+    def test_no_warning_by_default(self, rule_list, capsys):
+        RuleEngine(rule_list).match(make_entry(filename="scan.1.1.dcm"))
+
+        assert capsys.readouterr().out == ""
+
+    def test_match_rule_reports_ambiguous(self, rule_list, capsys, monkeypatch):
+        monkeypatch.setattr(classifying_rules, "rule_engine", RuleEngine(rule_list))
+
+        assert match_rule(make_entry(filename="scan.1.1.dcm")) == "first frame"
+        assert "matches several rules" in capsys.readouterr().out
+        assert match_rule(make_entry(rows=768, columns=512)) == "spectralis oct"
+        assert match_rule(make_entry(device="Cirrus", patientid="2001")) == "oct"
+        assert match_rule(make_entry(device="Cirrus", columns=1)) == "any"
+        assert (
+            match_rule(make_entry(device="Cirrus", columns=1, patientid="2"))
+            == "No rules apply."
+        )
+
+
+class TestRuleFile:
+    """Unit tests for the declarative classifying rule file."""
+
+    def test_matches_legacy_rules(self):
+        values: Dict[str, list] = {
+            "filename": [
+                "A_0-infrared.dcm",
+                "A_0-AF-.dcm",
+                "A_0-visible.dcm",
+                "A_3-visible.dcm",
+                "A_4-visible.dcm",
+                "A_11-visible.dcm",
+                "1.2.3.1.1.dcm",
+                "b.dcm",
+            ],
+            "device": [
+                "Aurora",
+                "Eidon",
+                "3DOCT-1Maestro2",
+                "Triton plus",
+                "Spectralis",
+                "Cirrus",
+            ],
+            "sopclassuid": [OCT_BSCAN, FUNDUS_PHOTO],
+            "slicethickness": [0.0703125, 0.04, 0.01, 0.03, 0.02, ""],
+            "framenumber": ["N/A", 27, 61, 512, 128],
+            "rows": [496, 768, 1536],
+            "columns": [512, 768, 1536],
+            "privatetag": ["N/A", "Super Slim"],
+            "gaze": ["R-1022D", "N/A"],
+        }
+        rng = random.Random(0)
+        protocols = set()
+
+        for _ in range(20000):
+            entry = make_entry(
+                **{key: rng.choice(options) for key, options in values.items()}
+            )
+            protocol = match_rule(entry)
+
+            assert protocol == legacy_match(entry), entry
+            protocols.add(protocol)
+
+        assert protocols == {rule.name for rule in LEGACY_RULES} | {"No rules apply."}
+
+    @pytest.mark.parametrize(
+        "condition", ["colour ==", "device", "device ~=", "device  =="]
+    )
+    def test_invalid_condition(self, condition, capsys):
+        with pytest.raises(ValueError):
+            ClassifyingRule.from_spec({"name": "bad", condition: "Spectralis"})
+
+        assert f"Invalid condition {condition} in rule bad." in capsys.readouterr().out
+
+    def test_values_are_not_code(self):
+        value = "'\") or True or (\"'"
+        rule = ClassifyingRule.from_spec(
+            {"name": "quoted", "filename contains": value, "rows between": [1, 9]}
+        )
+
+        assert not rule.apply(make_entry(filename="scan.dcm", rows=5))
+        assert not rule.apply(make_entry(filename=f"{value}.dcm"))
+        assert rule.apply(make_entry(filename=f"{value}.dcm", rows=5))
+        assert not rule.apply(make_entry(filename=f"{value}.dcm", rows="N/A"))
+
+    @pytest.mark.parametrize("extension", [".yaml", ".json"])
+    def test_save_load_round_trip(self, extension, tmp_path):
+        file_path = str(tmp_path / f"rules{extension}")
+        rule_list = [
+            ClassifyingRule.from_spec(
+                {
+                    "name": "Spectralis volume",
+                    "device ==": "Spectralis",
+                    "framenumber between": [26, 28],
+                    "filename icontains": "OD",
+                }
+            )
+        ] + load_rules()
+
+        save_rules(rule_list, file_path)
+        loaded = load_rules(file_path)
+
+        assert [rule.spec for rule in loaded] == [rule.spec for rule in rule_list]
+        assert [(rule.name, rule.device, rule.sopclassuid) for rule in loaded] == [
+            (rule.name, rule.device, rule.sopclassuid) for rule in rule_list
+        ]
+
+        entry = make_entry(filename="scan_od.dcm", framenumber=27)
+
+        assert RuleEngine(loaded).match(entry).name == "Spectralis volume"
+        assert (
+            RuleEngine(loaded).match(make_entry(framenumber=61)).name
+            == RuleEngine(rule_list).match(make_entry(framenumber=61)).name
+        )
+
+
+class TestFolderFileCounts:
+    """Unit tests for the cached number of files per folder."""
+
+    @staticmethod
+    def age_folder(folder_path, seconds=10):
+        """Move the mtime of a folder out of the coarse mtime window."""
+        mtime_ns = os.stat(folder_path).st_mtime_ns - seconds * 1_000_000_000
+        os.utime(folder_path, ns=(mtime_ns, mtime_ns))
+
+    @staticmethod
+    def count_listings(monkeypatch):
+        listings: list = []
+        scandir = os.scandir
+
+        def counting_scandir(path):
+            listings.append(path)
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+
+        return listings
+
+    def test_reused_while_unchanged(self, tmp_path, monkeypatch):
+        (tmp_path / "a.dcm").write_bytes(b"")
+        (tmp_path / "b.dcm").write_bytes(b"")
+        (tmp_path / "nested").mkdir()
+        self.age_folder(tmp_path)
+        counts = FolderFileCounts()
+        listings = self.count_listings(monkeypatch)
+
+        assert counts.get(str(tmp_path)) == 2
+        assert counts.get(str(tmp_path)) == 2
+        assert len(listings) == 1
+
+        counts.clear()
+
+        assert counts.get(str(tmp_path)) == 2
+        assert len(listings) == 2
+
+    def test_refreshed_after_file_added(self, tmp_path):
+        (tmp_path / "a.dcm").write_bytes(b"")
+        self.age_folder(tmp_path)
+        counts = FolderFileCounts()
+
+        assert counts.get(str(tmp_path)) == 1
+
+        (tmp_path / "b.dcm").write_bytes(b"")
+        self.age_folder(tmp_path)
+
+        assert counts.get(str(tmp_path)) == 2
+
+    def test_refreshed_when_only_ctime_changes(self, tmp_path):
+        (tmp_path / "a.dcm").write_bytes(b"")
+        self.age_folder(tmp_path)
+        counts = FolderFileCounts()
+
+        assert counts.get(str(tmp_path)) == 1
+
+        # a coarse mtime filesystem does not see the new file in the mtime
+        stat = os.stat(tmp_path)
+        (tmp_path / "b.dcm").write_bytes(b"")
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        assert counts.get(str(tmp_path)) == 2
+
+    def test_recent_folder_is_listed_again(self, tmp_path, monkeypatch):
+        (tmp_path / "a.dcm").write_bytes(b"")
+        counts = FolderFileCounts()
+        listings = self.count_listings(monkeypatch)
+
+        assert counts.get(str(tmp_path)) == 1
+        assert counts.get(str(tmp_path)) == 1
+        assert len(listings) == 2
+
+    def test_entry_uses_folder_count(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(classifying_rules, "folder_file_counts", FolderFileCounts())
+        file = write_sample(str(tmp_path / "a.dcm"))
+        (tmp_path / "b.dcm").write_bytes(b"")
+
+        assert extract_dicom_entry(file).numberoffiles == 2
+
+    def test_caller_filecount_is_used(self, tmp_path, monkeypatch):
+        class NoCounts:
+            def get(self, folder_path):
+                raise AssertionError(f"{folder_path} should not be listed")
+
+        monkeypatch.setattr(classifying_rules, "folder_file_counts", NoCounts())
+        file = write_sample(str(tmp_path / "a.dcm"))
+
+        assert extract_dicom_entry(file, filecount=7).numberoffiles == 7
+        assert get_dicom_summary(file, filecount=7)["patientid"] == "1001"
+
+
+class TestDicomColumns:
+    """Unit tests for classifying many files into columns."""
+
+    @pytest.fixture(name="files")
+    def fixture_files(self, tmp_path):
+        """A B-scan, a fundus photo, a file that is not DICOM, a missing file and a
+        truncated file."""
+        (tmp_path / "notes.dcm").write_text("not DICOM")
+        (tmp_path / "truncated.dcm").write_bytes(sample_bytes()[:200])
+
+        return [
+            write_sample(str(tmp_path / "bscan.dcm"), sop_class_uid=OCT_BSCAN),
+            write_sample(str(tmp_path / "fundus.dcm"), sop_class_uid=FUNDUS_PHOTO),
+            str(tmp_path / "notes.dcm"),
+            str(tmp_path / "missing.dcm"),
+            str(tmp_path / "truncated.dcm"),
+        ]
+
+    def test_column_layout(self, files):
+        columns = extract_dicom_columns(files)
+
+        assert tuple(columns) == DICOM_COLUMNS
+        assert DICOM_COLUMNS[1:-2] == DicomEntry.__slots__
+        assert all(len(values) == len(files) for values in columns.values())
+        assert columns["file"] == files
+
+    def test_rows_match_entries(self, files):
+        columns = extract_dicom_columns(files)
+
+        for index, file in enumerate(files[:2]):
+            entry = extract_dicom_entry(file)
+
+            assert {
+                field: columns[field][index] for field in DicomEntry.__slots__
+            } == entry.to_dict()
+            assert columns["protocol"][index] == match_rule(entry)
+            assert columns["error"][index] == ""
+
+        assert columns["protocol"][0] == "Maestro2_3D_Wide_OCT"
+
+    def test_error_rows(self, files):
+        columns = extract_dicom_columns(files)
+
+        assert columns["filename"][2:] == ["notes.dcm", "missing.dcm", "truncated.dcm"]
+        assert columns["error"][2].startswith("InvalidDicomError:")
+        assert columns["error"][3].startswith("FileNotFoundError:")
+        assert columns["error"][4].startswith("KeyError:")
+        for field in ("patientid", "sopclassuid", "numberoffiles", "protocol"):
+            assert columns[field][2:] == [None, None, None]
+
+    def test_other_errors_are_raised(self, files, monkeypatch):
+        def fail(file, filecount=None):
+            raise RuntimeError("bug")
+
+        monkeypatch.setattr(classifying_rules, "extract_dicom_entry", fail)
+
+        with pytest.raises(RuntimeError):
+            extract_dicom_columns(files)
+
+    def test_dicom_summary(self, files):
+        assert get_dicom_summary(files[0]) == {
+            "domain": "DICOM",
+            "patientid": "1001",
+            "laterality": "R",
+            "protocol": "Maestro2_3D_Wide_OCT",
+        }
+        assert get_dicom_summary(files[1])["protocol"] == "No rules apply."
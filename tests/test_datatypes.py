@@ -0,0 +1,109 @@
+"""Unit tests for pyfairdatatools.datatypes module."""
+
+import json
+import os
+
+from pyfairdatatools.datatypes import (
+    DATATYPE_DICTIONARY_PATH,
+    DatatypeDictionary,
+    datatype_dictionary,
+)
+
+
+class TestDatatypeDictionary:
+    """Unit tests for the DatatypeDictionary class."""
+
+    def test_code_names_and_aliases(self):
+        ekg = datatype_dictionary.get("ekg")
+
+        assert ekg["code_name"] == "ekg"
+        assert datatype_dictionary.get("ecg") is ekg
+        assert datatype_dictionary.get("invalid") is None
+        assert "redcap_data" in datatype_dictionary
+        assert ["ekg"] not in datatype_dictionary
+
+    def test_json_cache_skips_yaml(self, tmp_path):
+        cache_path = tmp_path / "datatype_dictionary.json"
+        first = DatatypeDictionary(cache_path=str(cache_path))
+
+        assert "ekg" in first
+        assert cache_path.exists()
+
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        cached["datatype_dictionary"] = [{"code_name": "cached_only"}]
+        cache_path.write_text(json.dumps(cached), encoding="utf-8")
+
+        second = DatatypeDictionary(cache_path=str(cache_path))
+
+        assert "cached_only" in second
+        assert "ekg" not in second
+
+    def test_stale_json_cache_is_ignored(self, tmp_path):
+        cache_path = tmp_path / "datatype_dictionary.json"
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "source_mtime_ns": 0,
+                    "datatype_dictionary": [{"code_name": "cached_only"}],
+                }
+            ),
+            encoding="utf-8",
+        )
+
+        dictionary = DatatypeDictionary(cache_path=str(cache_path))
+
+        assert "ekg" in dictionary
+        assert "cached_only" not in dictionary
+
+    def test_json_cache_of_another_file_is_ignored(self, tmp_path):
+        cache_path = tmp_path / "datatype_dictionary.json"
+        assert DatatypeDictionary(cache_path=str(cache_path)).entries
+
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        cached["datatype_dictionary"] = [{"code_name": "cached_only"}]
+        cache_path.write_text(json.dumps(cached), encoding="utf-8")
+
+        copy_path = tmp_path / "datatype_dictionary.yaml"
+        copy_path.write_text(
+            "datatype_dictionary:\n  - code_name: copied\n", encoding="utf-8"
+        )
+        source_stat = os.stat(DATATYPE_DICTIONARY_PATH)
+        os.utime(copy_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+
+        dictionary = DatatypeDictionary(
+            file_path=str(copy_path), cache_path=str(cache_path)
+        )
+
+        assert "copied" in dictionary
+        assert "cached_only" not in dictionary
+
+    def test_json_cache_is_written_atomically(self, tmp_path):
+        cache_path = tmp_path / "datatype_dictionary.json"
+
+        assert DatatypeDictionary(cache_path=str(cache_path)).entries
+
+        assert os.listdir(tmp_path) == ["datatype_dictionary.json"]
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        assert cached["source_path"] == os.path.abspath(DATATYPE_DICTIONARY_PATH)
+        assert cached["source_size"] == os.path.getsize(DATATYPE_DICTIONARY_PATH)
+
+    def test_dump_and_clear(self, tmp_path):
+        dictionary = DatatypeDictionary(cache_path=str(tmp_path / "cache.json"))
+        dump_path = tmp_path / "dump.json"
+
+        dictionary.dump(str(dump_path))
+        dictionary.clear()
+
+        dumped = json.loads(dump_path.read_text(encoding="utf-8"))
+        assert dumped["datatype_dictionary"] == dictionary.entries
+
+    def test_default_cache_path(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PYFAIRDATATOOLS_CACHE_DIR", str(tmp_path))
+
+        assert DatatypeDictionary().entries
+        assert os.listdir(tmp_path) == ["datatype_dictionary.json"]
+
+    def test_tests_use_temporary_cache(self, cache_dir):
+        assert DatatypeDictionary().json_cache_path == str(
+            cache_dir / "datatype_dictionary.json"
+        )
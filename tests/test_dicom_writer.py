@@ -0,0 +1,112 @@
+"""Unit tests for pyfairdatatools.dicom_writer module."""
+
+import os
+import sys
+
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+
+# the DICOM modules import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "pyfairdatatools"))
+
+# pylint: disable=wrong-import-position,import-error
+from dicom_writer import DicomWriter  # noqa: E402
+
+from tests.dicom_samples import make_dataset  # noqa: E402
+
+
+class TestDicomWriter:
+    """Unit tests for writing DICOM files atomically."""
+
+    @staticmethod
+    def temp_files(folder):
+        return [name for name in os.listdir(folder) if name.endswith(".tmp")]
+
+    def test_atomic_rename(self, tmp_path):
+        file_path = str(tmp_path / "image.dcm")
+        seen = []
+
+        def append(_fp):
+            seen.append((os.path.exists(file_path), self.temp_files(tmp_path)))
+
+        size = DicomWriter().write(make_dataset(), file_path, append)
+
+        assert seen == [(False, [f"image.dcm.{os.getpid()}.tmp"])]
+        assert os.path.getsize(file_path) == size
+        assert self.temp_files(tmp_path) == []
+        assert pydicom.dcmread(file_path).PatientID == "1001"
+
+    def test_replaces_existing_file(self, tmp_path):
+        file_path = tmp_path / "image.dcm"
+        file_path.write_bytes(b"old")
+
+        DicomWriter().write(make_dataset(), str(file_path))
+
+        assert pydicom.dcmread(str(file_path)).PatientID == "1001"
+
+    def test_temp_file_removed_on_error(self, tmp_path):
+        file_path = str(tmp_path / "image.dcm")
+        writer = DicomWriter()
+
+        def append(_fp):
+            raise RuntimeError("disk full")
+
+        with pytest.raises(RuntimeError):
+            writer.write(make_dataset(), file_path, append)
+
+        assert os.listdir(tmp_path) == []
+        assert writer.files == 0
+        assert writer.bytes == 0
+
+    def test_deferred_renames(self, tmp_path):
+        paths = [str(tmp_path / f"{index}.dcm") for index in range(5)]
+        writer = DicomWriter(fsync_every=3)
+
+        for path in paths[:2]:
+            writer.write(make_dataset(), path)
+
+        assert not any(os.path.exists(path) for path in paths)
+        assert len(self.temp_files(tmp_path)) == 2
+
+        writer.write(make_dataset(), paths[2])
+
+        assert all(os.path.exists(path) for path in paths[:3])
+        assert self.temp_files(tmp_path) == []
+
+        with writer:
+            writer.write(make_dataset(), paths[3])
+            writer.write(make_dataset(), paths[4])
+
+            assert not os.path.exists(paths[4])
+
+        assert all(os.path.exists(path) for path in paths)
+        assert self.temp_files(tmp_path) == []
+
+    def test_counters(self, tmp_path):
+        writer = DicomWriter()
+        sizes = [
+            writer.write(make_dataset(rows=rows), str(tmp_path / f"{rows}.dcm"))
+            for rows in (16, 32)
+        ]
+        stats = writer.stats()
+
+        assert stats["files"] == 2
+        assert stats["bytes"] == sum(sizes)
+        assert sizes == [
+            os.path.getsize(tmp_path / "16.dcm"),
+            os.path.getsize(tmp_path / "32.dcm"),
+        ]
+        assert stats["seconds"] > 0
+        assert stats["files_per_second"] == pytest.approx(2 / stats["seconds"])
+        assert stats["bytes_per_second"] == pytest.approx(sum(sizes) / stats["seconds"])
+
+        writer.clear()
+
+        assert writer.stats() == {
+            "files": 0,
+            "bytes": 0,
+            "seconds": 0.0,
+            "files_per_second": 0.0,
+            "bytes_per_second": 0.0,
+        }
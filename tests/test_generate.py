@@ -5,6 +5,7 @@
 import json
 from os import path
 
+from pyfairdatatools import generate, licenses
 from pyfairdatatools.generate import (
     generate_changelog_file,
     generate_dataset_description,
@@ -13,6 +14,7 @@ from pyfairdatatools.generate import (
     generate_readme,
     generate_study_description,
 )
+from pyfairdatatools.licenses import LicenseTextStore
 
 
 class TestGenerateDatasetDescription:
@@ -620,7 +622,21 @@ class TestGenerateLicense:
 
         assert path.exists(file) is True
 
-    def test_valid_license_with_identifier(self, tmp_path):
+    def test_valid_license_with_identifier(self, tmp_path, monkeypatch):
+        urls = []
+
+        def request(url):
+            urls.append(url)
+            return {"licenseText": "MIT License"}
+
+        # fetch from a stub instead of spdx.org, into an empty store
+        monkeypatch.setattr(licenses.utils, "requestJSON", request)
+        monkeypatch.setattr(
+            generate,
+            "license_text_store",
+            LicenseTextStore(cache_dir=str(tmp_path), bundle_path=None),
+        )
+
         identifier = "MIT"
 
         file = tmp_path / "license.md"
@@ -633,6 +649,22 @@ class TestGenerateLicense:
         )
 
         assert path.exists(file) is True
+        assert urls == ["https://spdx.org/licenses/MIT.json"]
+
+        with open(file, encoding="utf-8") as f:
+            assert f.read() == "MIT License"
+
+    def test_valid_license_offline(self, tmp_path, monkeypatch):
+        store = LicenseTextStore(cache_dir=str(tmp_path), offline=True)
+        store.put("MIT", "MIT License")
+        monkeypatch.setattr(generate, "license_text_store", store)
+
+        file = tmp_path / "license.md"
+
+        generate_license_file(file_path=file, file_type="md", identifier="MIT")
+
+        with open(file, encoding="utf-8") as f:
+            assert f.read() == "MIT License"
 
 
 class TestGenerateDatatypeDescription:
@@ -0,0 +1,148 @@
+"""Unit tests for pyfairdatatools.identifier module."""
+
+import csv
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+pytest.importorskip("pydicom")
+pytest.importorskip("xmltodict")
+pytest.importorskip("defusedxml")
+
+# the DICOM modules import each other by module name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "pyfairdatatools"))
+
+# pylint: disable=wrong-import-position,import-error
+from identifier import (  # noqa: E402
+    MANIFEST_FIELDS,
+    identify_many,
+    identify_zip,
+    list_zip_files,
+)
+
+from tests.dicom_samples import sample_bytes  # noqa: E402
+
+
+@pytest.fixture(name="zip_folder")
+def fixture_zip_folder(tmp_path):
+    """Write a DICOM, an environmental sensor, an unknown and a broken zip."""
+    folder = tmp_path / "zips"
+    (folder / "nested").mkdir(parents=True)
+
+    with zipfile.ZipFile(folder / "Maestro_1001.zip", "w") as zip_ref:
+        zip_ref.writestr("scan/1.2.3.1.1.dcm", sample_bytes())
+
+    with zipfile.ZipFile(folder / "nested" / "ENV-1002-AB12.zip", "w") as zip_ref:
+        zip_ref.writestr("readings.csv", "time,value\n")
+
+    with zipfile.ZipFile(folder / "other.zip", "w") as zip_ref:
+        zip_ref.writestr("notes.txt", "")
+
+    (folder / "Triton_1003.zip").write_bytes(b"not a zip archive")
+    (folder / "notes.txt").write_text("")
+
+    return folder
+
+
+class TestIdentifyZip:
+    """Unit tests for classifying one zip file into a manifest row."""
+
+    def test_dicom_row(self, zip_folder):
+        row = identify_zip(str(zip_folder / "Maestro_1001.zip"))
+
+        assert row["status"] == "ok"
+        assert row["error"] == ""
+        assert row["patient_id"] == "1001"
+        assert "patientid" not in row
+        assert row["domain"] == "DICOM"
+        assert row["protocol"] == "Maestro2_3D_Wide_OCT"
+
+    def test_env_row(self, zip_folder):
+        row = identify_zip(str(zip_folder / "nested" / "ENV-1002-AB12.zip"))
+
+        assert row["status"] == "ok"
+        assert row["patient_id"] == "AIREADI-1002"
+        assert row["sensor_id"] == "AB12"
+
+    def test_skipped_rows(self, zip_folder):
+        unknown = identify_zip(str(zip_folder / "other.zip"))
+        not_zip = identify_zip(str(zip_folder / "notes.txt"))
+
+        assert unknown["status"] == "skipped"
+        assert unknown["error"] == "Unknown file type"
+        assert not_zip["status"] == "skipped"
+        assert not_zip["error"] == "Not a zip file"
+
+    def test_error_row(self, zip_folder):
+        row = identify_zip(str(zip_folder / "Triton_1003.zip"))
+
+        assert row["status"] == "error"
+        assert row["error"].startswith("BadZipFile:")
+
+    def test_list_zip_files(self, zip_folder):
+        zip_files = list_zip_files(str(zip_folder))
+
+        assert [os.path.relpath(file, zip_folder) for file in zip_files] == [
+            "Maestro_1001.zip",
+            "Triton_1003.zip",
+            os.path.join("nested", "ENV-1002-AB12.zip"),
+            "other.zip",
+        ]
+        assert list_zip_files(str(zip_folder / "*.zip")) == sorted(
+            file for file in zip_files if "nested" not in file
+        )
+
+
+class TestIdentifyMany:
+    """Unit tests for writing the manifest of many zip files."""
+
+    def test_tsv_manifest(self, zip_folder, tmp_path):
+        output = str(tmp_path / "manifest.tsv")
+
+        counts = identify_many(str(zip_folder), output, workers=1)
+
+        with open(output, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f, delimiter="\t")
+            rows = {os.path.basename(row["file"]): row for row in reader}
+
+        assert reader.fieldnames == MANIFEST_FIELDS
+        assert counts == {"ok": 2, "skipped": 1, "error": 1}
+        assert rows["Maestro_1001.zip"]["patient_id"] == "1001"
+        assert rows["ENV-1002-AB12.zip"]["sensor_id"] == "AB12"
+        assert rows["ENV-1002-AB12.zip"]["protocol"] == "environmental_sensor"
+        assert rows["other.zip"]["status"] == "skipped"
+        assert rows["Triton_1003.zip"]["status"] == "error"
+        assert rows["Triton_1003.zip"]["protocol"] == ""
+
+    def test_jsonl_manifest(self, zip_folder, tmp_path):
+        output = str(tmp_path / "manifest.jsonl")
+        files = [str(zip_folder / "Maestro_1001.zip"), str(zip_folder / "notes.txt")]
+
+        counts = identify_many(files, output, workers=1)
+
+        with open(output, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+
+        assert counts == {"ok": 1, "skipped": 1, "error": 0}
+        assert [row["file"] for row in rows] == files
+        assert rows[0] == identify_zip(files[0])
+        assert rows[1]["error"] == "Not a zip file"
+
+    def test_workers_give_same_manifest(self, zip_folder, tmp_path):
+        serial = str(tmp_path / "serial.jsonl")
+        parallel = str(tmp_path / "parallel.jsonl")
+
+        identify_many(str(zip_folder), serial, workers=1)
+        identify_many(str(zip_folder), parallel, workers=2, chunksize=1)
+
+        with open(serial, encoding="utf-8") as f, open(parallel, encoding="utf-8") as g:
+            assert f.read() == g.read()
+
+    def test_invalid_format(self, zip_folder, tmp_path):
+        with pytest.raises(ValueError):
+            identify_many(
+                str(zip_folder), str(tmp_path / "manifest"), manifest_format="csv"
+            )
@@ -0,0 +1,132 @@
+"""Unit tests for pyfairdatatools.licenses module."""
+
+import json
+
+from pyfairdatatools import licenses
+from pyfairdatatools.licenses import LicenseRegistry, LicenseTextStore, license_registry
+
+
+class TestLicenseRegistry:
+    """Unit tests for the LicenseRegistry class."""
+
+    def test_get(self):
+        item = license_registry.get("CC-BY-4.0")
+
+        assert item["name"] == "Creative Commons Attribution 4.0 International"
+        assert license_registry.get("invalid") is None
+
+    def test_get_by_name_and_reference(self):
+        item = license_registry.get("MIT")
+
+        assert license_registry.get_by_name(item["name"]) is item
+        assert license_registry.get_by_reference(item["reference"]) is item
+
+    def test_is_deprecated(self):
+        assert license_registry.is_deprecated("GPL-3.0") is True
+        assert license_registry.is_deprecated("GPL-3.0-only") is False
+        assert license_registry.is_deprecated("invalid") is False
+
+    def test_contains(self):
+        assert "MIT" in license_registry
+        assert "invalid" not in license_registry
+        assert ["MIT"] not in license_registry
+
+    def test_loads_once_and_clears(self, tmp_path):
+        file_path = tmp_path / "licenses.json"
+        file_path.write_text(
+            json.dumps({"licenses": [{"licenseId": "A", "name": "License A"}]}),
+            encoding="utf-8",
+        )
+        registry = LicenseRegistry(file_path=str(file_path))
+
+        assert "A" in registry
+
+        file_path.write_text(json.dumps({"licenses": []}), encoding="utf-8")
+
+        assert "A" in registry
+
+        registry.clear()
+
+        assert "A" not in registry
+
+
+class TestLicenseTextStore:
+    """Unit tests for the LicenseTextStore class."""
+
+    @staticmethod
+    def fake_request(calls):
+        def request(url):
+            calls.append(url)
+            return {"licenseText": f"text from {url}"}
+
+        return request
+
+    def test_fetches_once(self, tmp_path, monkeypatch):
+        calls: list = []
+        monkeypatch.setattr(licenses.utils, "requestJSON", self.fake_request(calls))
+        store = LicenseTextStore(cache_dir=str(tmp_path), bundle_path=None)
+
+        assert store.get("MIT", "https://spdx.org/licenses/MIT.json") == (
+            "text from https://spdx.org/licenses/MIT.json"
+        )
+        store.get("MIT", "https://spdx.org/licenses/MIT.json")
+
+        assert len(calls) == 1
+
+    def test_reads_cache_from_disk(self, tmp_path, monkeypatch):
+        calls: list = []
+        monkeypatch.setattr(licenses.utils, "requestJSON", self.fake_request(calls))
+        LicenseTextStore(cache_dir=str(tmp_path), bundle_path=None).get(
+            "MIT", "https://spdx.org/licenses/MIT.json"
+        )
+
+        store = LicenseTextStore(
+            cache_dir=str(tmp_path), bundle_path=None, offline=True
+        )
+
+        assert store.get("MIT") == "text from https://spdx.org/licenses/MIT.json"
+        assert len(calls) == 1
+
+    def test_unwritable_cache_dir(self, tmp_path, monkeypatch):
+        calls: list = []
+        monkeypatch.setattr(licenses.utils, "requestJSON", self.fake_request(calls))
+        not_a_folder = tmp_path / "file"
+        not_a_folder.write_text("", encoding="utf-8")
+        store = LicenseTextStore(
+            cache_dir=str(not_a_folder / "cache"), bundle_path=None
+        )
+
+        assert store.get("MIT", "https://spdx.org/licenses/MIT.json") == (
+            "text from https://spdx.org/licenses/MIT.json"
+        )
+        assert store.get("MIT") == "text from https://spdx.org/licenses/MIT.json"
+        assert len(calls) == 1
+
+    def test_offline_bundle(self, tmp_path, monkeypatch):
+        calls: list = []
+        monkeypatch.setattr(licenses.utils, "requestJSON", self.fake_request(calls))
+        bundle_path = tmp_path / "license_texts.json"
+        bundle_path.write_text(json.dumps({"MIT": "bundled MIT"}), encoding="utf-8")
+
+        store = LicenseTextStore(
+            cache_dir=str(tmp_path), bundle_path=str(bundle_path), offline=True
+        )
+
+        assert store.get("MIT", "https://spdx.org/licenses/MIT.json") == "bundled MIT"
+        assert (
+            store.get("Apache-2.0", "https://spdx.org/licenses/Apache-2.0.json") is None
+        )
+        assert not calls
+
+    def test_export_bundle(self, tmp_path):
+        store = LicenseTextStore(
+            cache_dir=str(tmp_path), bundle_path=None, offline=True
+        )
+        store.put("MIT", "cached MIT")
+        bundle_path = tmp_path / "bundle.json"
+
+        store.export_bundle(str(bundle_path), identifiers=["MIT", "Apache-2.0"])
+
+        assert json.loads(bundle_path.read_text(encoding="utf-8")) == {
+            "MIT": "cached MIT"
+        }
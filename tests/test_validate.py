@@ -1,13 +1,27 @@
 """Unit tests for pyfairdatatools.validate module."""
 
 # pylint: disable=too-many-lines
+import json
+import os
 from copy import deepcopy
 from typing import Any, Dict
 
+import pytest
+
+from pyfairdatatools import validate
 from pyfairdatatools.validate import (
+    SchemaRegistry,
+    ValidationIssue,
+    collect_validation_issues,
+    folder_to_dict_parallel,
+    is_valid_language_code,
+    iter_folder_structure_issues,
+    path_to_dict,
     validate_dataset_description,
     validate_datatype_dictionary,
+    validate_folder_structure,
     validate_license,
+    validate_many,
     validate_participants,
     validate_readme,
     validate_study_description,
@@ -1297,3 +1311,415 @@ class TestValidateDatatypeDescription:
         output = validate_datatype_dictionary(data)
 
         assert output is True
+
+
+class TestSchemaRegistry:
+    """Unit tests for the SchemaRegistry validator cache."""
+
+    @staticmethod
+    def write_schema(schemas_dir, schema):
+        with open(
+            os.path.join(schemas_dir, "sample.schema.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(schema, f)
+
+    def test_validator_is_reused(self, tmp_path):
+        self.write_schema(tmp_path, {"type": "object"})
+        registry = SchemaRegistry(schemas_dir=str(tmp_path))
+
+        assert registry.get("sample") is registry.get("sample")
+
+    def test_changed_schema_is_reloaded(self, tmp_path):
+        self.write_schema(tmp_path, {"type": "object"})
+        registry = SchemaRegistry(schemas_dir=str(tmp_path))
+        first = registry.get("sample")
+
+        self.write_schema(tmp_path, {"type": "array"})
+        schema_file = registry.schema_path("sample")
+        stat = os.stat(schema_file)
+        os.utime(schema_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        second = registry.get("sample")
+
+        assert second is not first
+        assert second.is_valid([]) is True
+
+    def test_clear(self, tmp_path):
+        self.write_schema(tmp_path, {"type": "object"})
+        registry = SchemaRegistry(schemas_dir=str(tmp_path))
+        first = registry.get("sample")
+
+        registry.clear()
+
+        assert registry.get("sample") is not first
+
+
+class TestCollectValidationIssues:
+    """Unit tests for collect_validation_issues."""
+
+    def test_valid_study_description(self):
+        data = deepcopy(TestValidateStudyDescription.observational_study_valid_data)
+
+        assert collect_validation_issues("study_description", data) == []
+
+    def test_study_description_reports_every_issue(self, capsys):
+        data = deepcopy(TestValidateStudyDescription.observational_study_valid_data)
+        data["statusModule"]["overallStatus"] = "Terminated"
+        del data["statusModule"]["whyStopped"]
+        del data["eligibilityModule"]["samplingMethod"]
+        del data["identificationModule"]
+
+        issues = collect_validation_issues("study_description", data)
+
+        assert [issue.rule for issue in issues] == [
+            "required",
+            "whyStopped",
+            "samplingMethod",
+        ]
+        assert (
+            ValidationIssue(
+                "$.statusModule.whyStopped",
+                "",
+                "whyStopped",
+                "whyStopped is required for Withdrawn, Terminated, and Suspended overallStatus.",  # pylint: disable=line-too-long
+            )
+            in issues
+        )
+        assert capsys.readouterr().out == ""
+
+    def test_dataset_description_schema_issue(self):
+        data = deepcopy(TestValidateDatasetDescription.valid_data)
+        del data["identifier"]
+        data["relatedIdentifier"][0]["relationType"] = "HasMetadata"
+        del data["relatedIdentifier"][0]["schemeType"]
+
+        issues = collect_validation_issues("dataset_description", data)
+
+        assert [issue.rule for issue in issues] == ["required", "schemeType"]
+        assert issues[0].path == "$"
+        assert issues[1].path == "$.relatedIdentifier[0].schemeType"
+
+    def test_issue_to_dict(self):
+        data = deepcopy(TestValidateDatasetDescription.valid_data)
+        data["language"] = "invalid"
+
+        issues = collect_validation_issues("dataset_description", data)
+
+        assert [issue.to_dict()["rule"] for issue in issues] == ["language"]
+
+
+class TestQuietValidation:
+    """Unit tests for the quiet parameter of the validate_* functions."""
+
+    def test_prints_unless_quiet(self, capsys):
+        data = deepcopy(TestValidateDatasetDescription.valid_data)
+        data["language"] = "invalid"
+
+        assert validate_dataset_description(data) is False
+        assert capsys.readouterr().out == "language code is invalid.\n"
+
+        assert validate_dataset_description(data, quiet=True) is False
+        assert capsys.readouterr().out == ""
+
+    @pytest.mark.parametrize(
+        "validate_record",
+        [
+            validate_dataset_description,
+            validate_study_description,
+            validate.validate_readme,
+            validate.validate_participants,
+        ],
+    )
+    def test_unexpected_error_is_raised_without_printing(
+        self, validate_record, capsys, monkeypatch
+    ):
+        def fail(kind, data):
+            raise RuntimeError("registry failure")
+
+        monkeypatch.setattr(validate.schema_registry, "validate", fail)
+
+        with pytest.raises(RuntimeError):
+            validate_record({}, quiet=True)
+
+        assert capsys.readouterr().out == ""
+
+
+class TestValidateMany:
+    """Unit tests for the validate_many batch entry point."""
+
+    def records(self):
+        valid = deepcopy(TestValidateDatasetDescription.valid_data)
+
+        invalid_language = deepcopy(valid)
+        invalid_language["language"] = "invalid"
+
+        missing_identifier = deepcopy(valid)
+        del missing_identifier["identifier"]
+
+        return [valid, invalid_language, missing_identifier, valid]
+
+    def test_in_process(self):
+        results = list(validate_many("dataset_description", self.records(), workers=1))
+
+        assert [(index, ok) for index, ok, _ in results] == [
+            (0, True),
+            (1, False),
+            (2, False),
+            (3, True),
+        ]
+        assert results[0][2] == []
+        assert results[1][2] == ["language code is invalid."]
+
+    def test_worker_pool_matches_in_process(self):
+        records = self.records()
+
+        pooled = list(
+            validate_many("dataset_description", records, workers=2, chunksize=1)
+        )
+
+        assert pooled == list(validate_many("dataset_description", records, workers=1))
+
+    def test_study_description(self):
+        records = [
+            deepcopy(TestValidateStudyDescription.observational_study_valid_data),
+            deepcopy(TestValidateStudyDescription.interventional_study_valid_data),
+        ]
+
+        results = list(validate_many("study_description", records, workers=1))
+
+        assert [ok for _, ok, _ in results] == [True, True]
+
+    def test_collect_all(self):
+        results = list(
+            validate_many(
+                "dataset_description", self.records(), workers=1, collect_all=True
+            )
+        )
+
+        assert [issue.rule for issue in results[1][2]] == ["language"]
+
+    def test_invalid_kind(self):
+        with pytest.raises(ValueError):
+            validate_many("readme", [])
+
+
+class TestIsValidLanguageCode:
+    """Unit tests for the indexed language code lookup."""
+
+    def test_valid_code(self):
+        assert is_valid_language_code("en") is True
+        assert is_valid_language_code("en-US") is True
+
+    def test_invalid_code(self):
+        assert is_valid_language_code("") is False
+        assert is_valid_language_code("invalid") is False
+        assert is_valid_language_code(["en"]) is False
+
+    def test_matches_linear_scan(self):
+        """The index gives the answers of the previous file read and scan."""
+        codes = ["en", "en-US", "zu", "invalid", ""]
+
+        with open(
+            os.path.join(
+                os.path.dirname(__file__),
+                "..",
+                "pyfairdatatools",
+                "assets",
+                "languages.json",
+            ),
+            encoding="utf-8",
+        ) as f:
+            languages = json.load(f)
+
+        scanned = [
+            any(language["code"] == code for language in languages) for code in codes
+        ]
+
+        assert [is_valid_language_code(code) for code in codes] == scanned
+
+
+class TestValidateFolderStructure:
+    """Unit tests for validate_folder_structure function."""
+
+    required_files = [
+        "CHANGELOG.md",
+        "LICENSE.txt",
+        "README.md",
+        "dataset_description.json",
+        "participants.json",
+        "participants.tsv",
+    ]
+
+    def make_tree(self, root):
+        for file_name in self.required_files:
+            (root / file_name).write_text("", encoding="utf-8")
+
+        for folder in ["activity_monitor", "eye_fundus_photography"]:
+            (root / folder / "site_1").mkdir(parents=True)
+            (root / folder / "README.md").write_text("", encoding="utf-8")
+            (root / folder / "site_1" / "data.csv").write_text("", encoding="utf-8")
+
+        return root
+
+    def test_valid_folder_structure(self, tmp_path):
+        root = str(self.make_tree(tmp_path))
+
+        assert validate_folder_structure(root) is True
+        assert validate_folder_structure(root, streaming=True) is True
+
+    def test_missing_required_files(self, tmp_path):
+        root = self.make_tree(tmp_path)
+        (root / "README.md").unlink()
+        (root / "LICENSE.txt").unlink()
+
+        assert validate_folder_structure(str(root)) is False
+        assert validate_folder_structure(str(root), streaming=True) is False
+
+        issues = list(iter_folder_structure_issues(str(root)))
+        assert [issue.rule for issue in issues] == ["required", "required"]
+        assert len(list(iter_folder_structure_issues(str(root), True))) == 1
+
+    def test_folder_in_place_of_file(self, tmp_path):
+        root = self.make_tree(tmp_path)
+        (root / "README.md").unlink()
+        (root / "README.md").mkdir()
+
+        assert validate_folder_structure(str(root)) is False
+
+        issues = list(iter_folder_structure_issues(str(root)))
+        assert [(issue.path, issue.rule) for issue in issues] == [
+            ("$['README.md']", "const")
+        ]
+
+    def test_parallel_walker_matches_path_to_dict(self, tmp_path):
+        root = self.make_tree(tmp_path)
+        (root / "activity_monitor" / "site_1" / "deep" / "deeper").mkdir(parents=True)
+
+        assert folder_to_dict_parallel(str(root), workers=4) == path_to_dict(str(root))
+        assert not folder_to_dict_parallel(str(tmp_path / "missing"))
+
+    def test_parallel_validation(self, tmp_path):
+        root = self.make_tree(tmp_path)
+
+        assert validate_folder_structure(str(root), workers=4) is True
+
+        (root / "README.md").unlink()
+
+        assert validate_folder_structure(str(root), workers=4) is False
+
+    @staticmethod
+    def age_folders(root, seconds=10):
+        """Move the mtime of every folder out of the coarse mtime window."""
+        for folder, _, _ in os.walk(root):
+            stat = os.stat(folder)
+            mtime_ns = stat.st_mtime_ns - seconds * 1_000_000_000
+            os.utime(folder, ns=(stat.st_atime_ns, mtime_ns))
+
+    @staticmethod
+    def count_calls(monkeypatch, name):
+        calls: list = []
+        function = getattr(validate, name)
+
+        def counting(*args):
+            calls.append(args)
+            return function(*args)
+
+        monkeypatch.setattr(validate, name, counting)
+
+        return calls
+
+    def test_incremental_validation(self, tmp_path, monkeypatch):
+        (tmp_path / "dataset").mkdir()
+        root = self.make_tree(tmp_path / "dataset")
+        self.age_folders(root)
+        snapshot_path = str(tmp_path / "snapshot.json")
+
+        assert validate_folder_structure(str(root), snapshot_path=snapshot_path)
+
+        validated = self.count_calls(monkeypatch, "_level_schema")
+        listed = self.count_calls(monkeypatch, "_scan_level")
+
+        assert validate_folder_structure(str(root), snapshot_path=snapshot_path)
+        assert not validated
+        assert not listed
+
+        (root / "README.md").unlink()
+        self.age_folders(root)
+
+        assert not validate_folder_structure(str(root), snapshot_path=snapshot_path)
+        assert listed == [(str(root),)]
+        assert len(validated) == 1
+
+        assert not validate_folder_structure(str(root), snapshot_path=snapshot_path)
+        assert len(listed) == 1
+        assert len(validated) == 1
+
+    def test_incremental_validation_within_one_mtime_tick(self, tmp_path):
+        (tmp_path / "dataset").mkdir()
+        root = self.make_tree(tmp_path / "dataset")
+        snapshot_path = str(tmp_path / "snapshot.json")
+
+        # the folders were just modified, so the listing is not trusted
+        assert validate_folder_structure(str(root), snapshot_path=snapshot_path)
+
+        (root / "README.md").unlink()
+
+        assert not validate_folder_structure(str(root), snapshot_path=snapshot_path)
+
+    def test_snapshot_lookup(self, tmp_path):
+        snapshot = validate.FolderSnapshot(str(tmp_path / "snapshot.json"), ".")
+        stat = {"mtime_ns": 10**18, "ctime_ns": 10**18, "nlink": 2}
+        listed_ns = stat["mtime_ns"] + snapshot.MTIME_WINDOW_NS
+        snapshot.previous = {"#": {**stat, "listed_ns": listed_ns, "issues": []}}
+
+        assert snapshot.lookup("#", stat) is snapshot.previous["#"]
+        assert snapshot.lookup("other#", stat) is None
+        assert snapshot.lookup("#", None) is None
+
+        for field, value in stat.items():
+            assert snapshot.lookup("#", {**stat, field: value + 1}) is None
+
+        snapshot.previous["#"]["listed_ns"] = listed_ns - 1
+
+        assert snapshot.lookup("#", stat) is None
+
+    def test_missing_folder(self, tmp_path):
+        missing = str(tmp_path / "missing")
+
+        assert validate_folder_structure(missing) is False
+        assert validate_folder_structure(missing, streaming=True) is False
+
+    def test_nested_folder_rules(self, tmp_path, monkeypatch):
+        schemas_dir = tmp_path / "schemas"
+        schemas_dir.mkdir()
+        (schemas_dir / "folder_structure.schema.json").write_text(
+            json.dumps(
+                {
+                    "type": "object",
+                    "properties": {
+                        "data": {
+                            "type": "object",
+                            "required": ["README.md"],
+                            "additionalProperties": {"type": "object"},
+                        }
+                    },
+                    "required": ["data"],
+                }
+            ),
+            encoding="utf-8",
+        )
+        monkeypatch.setattr(
+            validate, "schema_registry", SchemaRegistry(schemas_dir=str(schemas_dir))
+        )
+
+        root = tmp_path / "dataset"
+        (root / "data" / "site_1").mkdir(parents=True)
+        (root / "data" / "notes.txt").write_text("", encoding="utf-8")
+
+        issues = list(iter_folder_structure_issues(str(root)))
+
+        assert [(issue.path, issue.rule) for issue in issues] == [
+            ("$.data", "required"),
+            ("$.data['notes.txt']", "type"),
+        ]
+        assert validate_folder_structure(str(root)) is False